@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of the per-step overhead of simulated annealing (sensai.local_search.SimulatedAnnealing), using a trivial
+state and operators whose cost computations are negligible, such that the measured throughput (steps/sec) reflects the
+overhead of the step loop (operator choice, acceptance, clock checks and statistics collection).
+
+Usage: python benchmarks/local_search_step_loop.py [maxSteps]
+"""
+import logging
+import random
+import sys
+import time
+
+from sensai.local_search import SAState, SAOperator, SACostValueNumeric, SimulatedAnnealing, SAProbabilitySchedule, \
+    SAProbabilityFunctionLinear
+
+
+class CounterState(SAState):
+    """A state consisting of a single integer, where the cost is the integer's absolute value"""
+    def __init__(self, r: random.Random):
+        self.x = 1000
+        self.numParamChoices = 0
+        super().__init__(r)
+
+    def computeCostValue(self):
+        return SACostValueNumeric(abs(self.x))
+
+    def getStateRepresentation(self):
+        return self.x
+
+    def applyStateRepresentation(self, representation):
+        pass
+
+
+class AddOperator(SAOperator[CounterState]):
+    def __init__(self, state: CounterState, delta: int):
+        super().__init__(state)
+        self.delta = delta
+
+    def applyStateChange(self, delta):
+        self.state.x += delta
+
+    def costDelta(self, delta):
+        return SACostValueNumeric(abs(self.state.x + delta) - abs(self.state.x))
+
+    def chooseParams(self):
+        self.state.numParamChoices += 1
+        return (self.delta,), None
+
+
+def measureThroughput(maxSteps=None, duration=None, **saParams) -> float:
+    opsAndWeights = [(lambda s: AddOperator(s, 1), 1), (lambda s: AddOperator(s, -1), 1)]
+    sa = SimulatedAnnealing(lambda: SAProbabilitySchedule(None, SAProbabilityFunctionLinear(p0=0.5, p1=0.01)), opsAndWeights,
+        maxSteps=maxSteps, duration=duration, **saParams)
+    states = []
+    startTime = time.time()
+    sa.optimise(lambda r: states.append(CounterState(r)) or states[-1])
+    return states[0].numParamChoices / (time.time() - startTime)
+
+
+def main(maxSteps=500000):
+    configurations = {
+        "maxSteps": dict(maxSteps=maxSteps),
+        "duration": dict(duration=2),
+        "maxSteps, collectStats": dict(maxSteps=maxSteps, collectStats=True),
+        "duration, collectStats": dict(duration=2, collectStats=True),
+    }
+    for name, params in configurations.items():
+        throughput = measureThroughput(**params)
+        print(f"{name}: {throughput:.0f} steps/s")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main(*[int(arg) for arg in sys.argv[1:]])
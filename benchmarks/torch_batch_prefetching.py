@@ -0,0 +1,46 @@
+"""
+Benchmarks the training throughput (samples/sec) of NNOptimiser on the CPU with and without background
+prefetching of batches (see sensai.torch.torch_data.BatchPrefetcher).
+
+Usage: python benchmarks/torch_batch_prefetching.py [numRows] [numFeatures]
+"""
+import logging
+import sys
+import time
+
+import torch
+
+from sensai.torch import NNOptimiser, NNLossEvaluatorRegression
+from sensai.torch.torch_base import TorchModelFromModuleFactory
+from sensai.torch.torch_data import TorchDataSetFromTensors
+from sensai.torch.torch_modules import MultiLayerPerceptron
+
+
+def measureThroughput(dataSet: TorchDataSetFromTensors, epochs: int, batchSize: int, **nnOptimiserParams) -> float:
+    inputDim = dataSet.x.shape[1]
+    model = TorchModelFromModuleFactory(lambda: MultiLayerPerceptron(inputDim, 1, (64, 64), hidActivationFn=torch.relu,
+        outputActivationFn=None), cuda=False)
+    optimiser = NNOptimiser(lossEvaluator=NNLossEvaluatorRegression(), cuda=False, trainFraction=1.0, epochs=epochs,
+        batchSize=batchSize, **nnOptimiserParams)
+    startTime = time.time()
+    optimiser.fit(model, dataSet)
+    return epochs * dataSet.size() / (time.time() - startTime)
+
+
+def main(numRows=200000, numFeatures=100, epochs=3, batchSize=256):
+    x = torch.rand((numRows, numFeatures))
+    y = x.sum(dim=1, keepdim=True)
+    dataSet = TorchDataSetFromTensors(x, y, False)
+    configurations = {
+        "synchronous": dict(),
+        "prefetching (depth=2, workers=1)": dict(prefetchQueueDepth=2, prefetchWorkers=1),
+        "prefetching (depth=4, workers=2)": dict(prefetchQueueDepth=4, prefetchWorkers=2),
+    }
+    for name, params in configurations.items():
+        throughput = measureThroughput(dataSet, epochs, batchSize, **params)
+        print(f"{name}: {throughput:.0f} samples/sec")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main(*[int(a) for a in sys.argv[1:3]])
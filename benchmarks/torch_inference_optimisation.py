@@ -0,0 +1,56 @@
+"""
+Benchmarks the inference latency and throughput of a TorchModel on the CPU for the eager module and for modules
+that were optimised via TorchModel.optimiseForInference (TorchScript tracing with and without dynamic int8 quantisation).
+
+Usage: python benchmarks/torch_inference_optimisation.py [numFeatures] [hiddenDim]
+"""
+import logging
+import sys
+import time
+
+import numpy as np
+import torch
+
+from sensai.torch.torch_models import MultiLayerPerceptronTorchModel
+
+
+def measure(model: MultiLayerPerceptronTorchModel, x: np.ndarray, repetitions: int) -> float:
+    model.apply(x)  # warm-up
+    startTime = time.perf_counter()
+    for _ in range(repetitions):
+        model.apply(x)
+    return (time.perf_counter() - startTime) / repetitions
+
+
+def createModel(numFeatures: int, hiddenDim: int, stateDict=None) -> MultiLayerPerceptronTorchModel:
+    model = MultiLayerPerceptronTorchModel(False, (hiddenDim, hiddenDim), torch.relu, None)
+    model.inputDim, model.outputDim = numFeatures, 1
+    module = model.createTorchModule()
+    if stateDict is not None:
+        module.load_state_dict(stateDict)
+    model.setTorchModule(module)
+    return model
+
+
+def main(numFeatures=100, hiddenDim=512):
+    eagerModel = createModel(numFeatures, hiddenDim)
+    stateDict = eagerModel.getTorchModule().state_dict()
+    tracedModel = createModel(numFeatures, hiddenDim, stateDict)
+    tracedModel.optimiseForInference()
+    quantisedModel = createModel(numFeatures, hiddenDim, stateDict)
+    quantisedModel.optimiseForInference(quantise=True)
+    models = {"eager": eagerModel, "traced": tracedModel, "traced+quantised": quantisedModel}
+
+    singleRow = np.random.rand(1, numFeatures).astype(np.float32)
+    largeBatch = np.random.rand(8192, numFeatures).astype(np.float32)
+    for name, model in models.items():
+        latency = measure(model, singleRow, 1000)
+        batchDuration = measure(model, largeBatch, 20)
+        maxDeviation = np.max(np.abs(model.apply(largeBatch) - eagerModel.apply(largeBatch)))
+        print(f"{name}: latency (1 row) {latency * 1e6:.1f}us, throughput {len(largeBatch) / batchDuration:.0f} rows/s, "
+              f"max. deviation from eager {maxDeviation:.2e}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main(*[int(a) for a in sys.argv[1:3]])
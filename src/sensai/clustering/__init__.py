@@ -1,2 +1,4 @@
-from .greedy_clustering import GreedyAgglomerativeClustering
+from .greedy_clustering import GreedyAgglomerativeClustering, MergeCandidateDeterminationStrategy, \
+    MergeCandidateDeterminationStrategyAllPairs, MergeCandidateDeterminationStrategyNeighbours
 from .base.clustering import SKLearnClusteringModel, ClusteringModel
+from .incremental_clustering import IncrementalClusteringModel
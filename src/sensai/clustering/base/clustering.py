@@ -1,6 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Union, Set, Callable, Iterable, Optional
+from typing import Union, Set, Callable, Iterable, Optional, Dict
 
 import numpy as np
 import pandas as pd
@@ -37,6 +37,55 @@ class ClusteringModel(PickleLoadSaveMixin, ABC):
 
         self._clusterDict = {}
         self._numClusters: Optional[int] = None
+        self._initClusterGrouping()
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+        if "_sortedClusterIdentifiers" not in state:
+            self._initClusterGrouping()
+            if self.isFitted:
+                self._computeClusterGrouping()
+
+    def _initClusterGrouping(self):
+        # the datapoints sorted by cluster label, such that each cluster is a contiguous slice
+        self._sortedDatapoints: Optional[np.ndarray] = None
+        self._sortedClusterIdentifiers: Optional[np.ndarray] = None
+        self._clusterStartIndices: Optional[np.ndarray] = None
+        self._clusterSizes: Optional[np.ndarray] = None
+        self._clusterIndexByIdentifier: Optional[Dict[int, int]] = None
+        self._clusterCentroids: Optional[np.ndarray] = None
+        self._clusterRadii: Optional[np.ndarray] = None
+
+    def _computeClusterGrouping(self):
+        sortOrder = np.argsort(self._labels, kind="stable")
+        self._sortedDatapoints = self._datapoints[sortOrder]
+        self._sortedClusterIdentifiers, self._clusterStartIndices, self._clusterSizes = \
+            np.unique(self._labels[sortOrder], return_index=True, return_counts=True)
+        self._clusterIndexByIdentifier = {clusterId: i for i, clusterId in enumerate(self._sortedClusterIdentifiers.tolist())}
+        self._clusterCentroids = None
+        self._clusterRadii = None
+
+    def _computeClusterStatistics(self):
+        """
+        Computes the centroids and radii of all clusters (including the noise cluster) at once
+        """
+        if self._clusterCentroids is None:
+            datapoints = self._sortedDatapoints
+            self._clusterCentroids = np.add.reduceat(datapoints, self._clusterStartIndices, axis=0) / self._clusterSizes[:, None]
+            distances = np.linalg.norm(datapoints - np.repeat(self._clusterCentroids, self._clusterSizes, axis=0), axis=1)
+            self._clusterRadii = np.maximum.reduceat(distances, self._clusterStartIndices)
+
+    def _hasDefaultClusterCentroids(self) -> bool:
+        """
+        :return: whether the cluster class computes centroids as the mean of the datapoints (i.e. as in _computeClusterStatistics)
+        """
+        return type(self).Cluster._computeCentroid is ClusteringModel.Cluster._computeCentroid
+
+    def _hasDefaultClusterRadii(self) -> bool:
+        """
+        :return: whether the cluster class computes radii as the maximum distance to the mean (i.e. as in _computeClusterStatistics)
+        """
+        return self._hasDefaultClusterCentroids() and type(self).Cluster._computeRadius is ClusteringModel.Cluster._computeRadius
 
     class Cluster:
         def __init__(self, datapoints: np.ndarray, identifier: Union[int, str]):
@@ -88,7 +137,7 @@ class ClusteringModel(PickleLoadSaveMixin, ABC):
         :return: generator of clusters
         """
         percentageToLog = 0
-        for i, clusterId in enumerate(self._nonNoiseClusterIdentifiers):
+        for i, clusterId in enumerate(sorted(self._nonNoiseClusterIdentifiers)):
             # logging process through the loop
             percentageGenerated = int(100 * i / self.numClusters)
             if percentageGenerated == percentageToLog:
@@ -109,6 +158,15 @@ class ClusteringModel(PickleLoadSaveMixin, ABC):
         :param condition: if provided, only clusters fulfilling the condition will be included
         :return: pandas DataFrame containing coarse information about the clusters
         """
+        if condition is None and type(self).Cluster.summaryDict is ClusteringModel.Cluster.summaryDict and self._hasDefaultClusterRadii():
+            # summarise all clusters at once, without creating cluster objects
+            self._computeClusterStatistics()
+            isIncluded = np.isin(self._sortedClusterIdentifiers, list(self._nonNoiseClusterIdentifiers))
+            return pd.DataFrame({
+                "centroid": list(self._clusterCentroids[isIncluded]),
+                "numMembers": self._clusterSizes[isIncluded],
+                "radius": self._clusterRadii[isIncluded]
+            }, index=pd.Index(self._sortedClusterIdentifiers[isIncluded], name="identifier"))
         summary_dicts = [cluster.summaryDict() for cluster in self.clusters(condition=condition)]
         return pd.DataFrame(summary_dicts).set_index("identifier", drop=True)
 
@@ -117,17 +175,30 @@ class ClusteringModel(PickleLoadSaveMixin, ABC):
         labels = self._computeLabels(data)
         if len(labels) != len(data):
             raise Exception(f"Bad Implementation: number of labels does not match number of datapoints")
+        self._applyLabels(data, labels)
+
+    def _applyLabels(self, data: np.ndarray, labels: np.ndarray) -> None:
+        """
+        Sets the clustering result, relabelling clusters which do not fulfill the size bounds as noise
+
+        :param data: the datapoints
+        :param labels: the cluster labels of the datapoints
+        """
         # Relabel clusters that do not fulfill size bounds as noise
         if self.minClusterSize != -np.inf or self.maxClusterSize != np.inf:
-            for clusterId, clusterSize in zip(*np.unique(labels, return_counts=True)):
-                if not self.minClusterSize <= clusterSize <= self.maxClusterSize:
-                    labels[labels == clusterId] = self.noiseLabel
+            _, inverseIndices, clusterSizes = np.unique(labels, return_inverse=True, return_counts=True)
+            isSizeViolated = (clusterSizes < self.minClusterSize) | (clusterSizes > self.maxClusterSize)
+            labels = np.where(isSizeViolated[inverseIndices.reshape(-1)], self.noiseLabel, labels)
 
         self._datapoints = data
-        self._clusterIdentifiers = set(labels)
         self._labels = labels
+        self._clusterDict = {}
+        self._computeClusterGrouping()
+        self._clusterIdentifiers = set(self._sortedClusterIdentifiers.tolist())
         if self.noiseLabel is not None:
             self._nonNoiseClusterIdentifiers = self._clusterIdentifiers.difference({self.noiseLabel})
+        else:
+            self._nonNoiseClusterIdentifiers = self._clusterIdentifiers
         log.info(f"{self} found {self.numClusters} clusters")
 
     @property
@@ -152,11 +223,20 @@ class ClusteringModel(PickleLoadSaveMixin, ABC):
     # unfortunately, there seems to be no way to annotate the return type correctly
     # https://github.com/python/mypy/issues/3993
     def getCluster(self, clusterId: int) -> Cluster:
-        if clusterId not in self.labels:
-            raise KeyError(f"no cluster for id {clusterId}")
+        assert self.isFitted
         result = self._clusterDict.get(clusterId)
         if result is None:
-            result = self.Cluster(self.datapoints[self.labels == clusterId], identifier=clusterId)
+            clusterIndex = self._clusterIndexByIdentifier.get(clusterId)
+            if clusterIndex is None:
+                raise KeyError(f"no cluster for id {clusterId}")
+            start = self._clusterStartIndices[clusterIndex]
+            result = self.Cluster(self._sortedDatapoints[start:start + self._clusterSizes[clusterIndex]], identifier=clusterId)
+            # use the statistics computed for all clusters at once unless the cluster class computes them differently
+            if self._hasDefaultClusterCentroids():
+                self._computeClusterStatistics()
+                result._centroid = self._clusterCentroids[clusterIndex]
+                if self._hasDefaultClusterRadii():
+                    result._radius = self._clusterRadii[clusterIndex]
             self._clusterDict[clusterId] = result
         return result
 
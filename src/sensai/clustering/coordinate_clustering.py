@@ -1,12 +1,13 @@
 import geopandas as gp
 import logging
 import numpy as np
-from shapely.geometry import MultiPoint
+import pandas as pd
 from typing import Callable, Union, Iterable
 
 from .base.clustering import ClusteringModel, SKLearnClustererProtocol, SKLearnClusteringModel
 from ..util.cache import LoadSaveInterface
-from ..util.coordinates import validateCoordinates, extractCoordinatesArray, TCoordinates, GeoDataFrameWrapper
+from ..util.coordinates import validateCoordinates, extractCoordinatesArray, TCoordinates, GeoDataFrameWrapper, \
+    multipointsFromCoordinateGroups, multipointToCoordinatesArray
 from ..util.tracking import timed
 
 log = logging.getLogger(__name__)
@@ -53,7 +54,7 @@ class CoordinateClusteringModel(ClusteringModel, GeoDataFrameWrapper):
             """
             :return: The cluster's coordinates as a MultiPoint object
             """
-            return MultiPoint(self.datapoints)
+            return multipointsFromCoordinateGroups(self.datapoints, [len(self.datapoints)])[0]
 
         @classmethod
         def load(cls, path):
@@ -69,7 +70,7 @@ class CoordinateClusteringModel(ClusteringModel, GeoDataFrameWrapper):
             if len(gdf) != 1:
                 raise Exception(f"Expected {path} to contain a single row, instead got {len(gdf)}")
             identifier, multipoint = gdf.identifier.values[0], gdf.geometry.values[0]
-            return cls(np.array([[p.x, p.y] for p in multipoint]), identifier)
+            return cls(multipointToCoordinatesArray(multipoint), identifier)
 
         def save(self, path, crs="EPSG:3857"):
             """
@@ -108,13 +109,21 @@ class CoordinateClusteringModel(ClusteringModel, GeoDataFrameWrapper):
         :param includeNoise:
         :return: GeoDataFrame with all clusters indexed by their identifier
         """
-        geodf = gp.GeoDataFrame()
-        geodf.crs = crs
-        # TODO or not TODO: parallelize this or improve performance some another way
-        for cluster in self.clusters(condition):
-            geodf = geodf.append(cluster.toGeoDF(crs=crs))
-        if includeNoise:
-            geodf = geodf.append(self.noiseCluster().toGeoDF(crs=crs))
+        if condition is None:
+            # use the datapoints as grouped by cluster at fit time (see ClusteringModel.fit)
+            isIncluded = np.isin(self._sortedClusterIdentifiers, list(self._nonNoiseClusterIdentifiers))
+            if includeNoise:
+                isIncluded |= self._sortedClusterIdentifiers == self.noiseLabel
+            coordinates = self._sortedDatapoints[np.repeat(isIncluded, self._clusterSizes)]
+            identifiers, clusterSizes = self._sortedClusterIdentifiers[isIncluded], self._clusterSizes[isIncluded]
+        else:
+            clusters = list(self.clusters(condition))
+            if includeNoise:
+                clusters.append(self.noiseCluster())
+            coordinates = np.concatenate([c.datapoints for c in clusters]) if len(clusters) > 0 else np.zeros((0, 2))
+            identifiers, clusterSizes = [c.identifier for c in clusters], [len(c) for c in clusters]
+        geodf = gp.GeoDataFrame({"geometry": multipointsFromCoordinateGroups(coordinates, clusterSizes)},
+            index=pd.Index(identifiers, name="identifier"), crs=crs)
         return geodf
 
     def plot(self, includeNoise=False, condition=None, **kwargs):
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import heapq
 import logging
 import math
-import queue
 from abc import ABC, abstractmethod
-from typing import List, Sequence
+from typing import List, Sequence, Callable, Iterable, Iterator, Optional, Dict, Set
+
+import numpy as np
 
 log = logging.getLogger(__name__)
 
@@ -51,15 +53,64 @@ class GreedyAgglomerativeClustering(object):
             """
             pass
 
-    def __init__(self, clusters: Sequence[Cluster]):
+    def __init__(self, clusters: Sequence[Cluster], mergeCandidateDeterminationStrategy: "MergeCandidateDeterminationStrategy" = None,
+            heapCompactionRatio=0.5, minHeapSizeForCompaction=10000):
         """
         :param clusters: the initial clusters, which are to be agglomerated into larger clusters
+        :param mergeCandidateDeterminationStrategy: the strategy which determines the clusters with which a cluster may be merged
+            (and for which merge costs are thus computed); if None, consider all pairs of clusters.
+            For large numbers of initial clusters, use a strategy which restricts merges to neighbouring clusters
+            (see MergeCandidateDeterminationStrategyNeighbours).
+        :param heapCompactionRatio: the fraction of invalidated (evaporated) merges in the priority queue above which the queue is
+            compacted, i.e. rebuilt from the remaining valid merges
+        :param minHeapSizeForCompaction: the minimum size of the priority queue for compaction to be considered
         """
-        self.prioritisedMerges = queue.PriorityQueue()
+        self.prioritisedMerges = []
         self.wrappedClusters = []
+        self.heapCompactionRatio = heapCompactionRatio
+        self.minHeapSizeForCompaction = minHeapSizeForCompaction
+        self.numHeapCompactions = 0
+        self._numEvaporatedQueuedMerges = 0
+        self._mergeSequenceNumber = 0
         for idx, c in enumerate(clusters):
             self.wrappedClusters.append(GreedyAgglomerativeClustering.WrappedCluster(c, idx, self))
-        
+        self.unmergedClusterIndices: Dict[int, None] = dict.fromkeys(range(len(self.wrappedClusters)))
+        if mergeCandidateDeterminationStrategy is None:
+            mergeCandidateDeterminationStrategy = MergeCandidateDeterminationStrategyAllPairs()
+        self.mergeCandidateDeterminationStrategy = mergeCandidateDeterminationStrategy
+        self.mergeCandidateDeterminationStrategy.setClusterer(self)
+
+    def _pushMerge(self, merge: "GreedyAgglomerativeClustering.ClusterMerge"):
+        # the sequence number serves as a tie-breaker, such that merges with equal costs are processed in order of creation
+        heapq.heappush(self.prioritisedMerges, (merge.mergeCost, self._mergeSequenceNumber, merge))
+        self._mergeSequenceNumber += 1
+
+    def _popMerge(self) -> Optional["GreedyAgglomerativeClustering.ClusterMerge"]:
+        """
+        :return: the valid merge with the lowest cost or None if there is no such merge
+        """
+        while self.prioritisedMerges:
+            merge = heapq.heappop(self.prioritisedMerges)[2]
+            if merge.evaporated:
+                self._numEvaporatedQueuedMerges -= 1
+            else:
+                # mark the merge as evaporated, as it is no longer queued (such that it is not counted upon removal)
+                merge.evaporated = True
+                return merge
+        return None
+
+    def _onMergeEvaporated(self):
+        self._numEvaporatedQueuedMerges += 1
+        heapSize = len(self.prioritisedMerges)
+        if heapSize >= self.minHeapSizeForCompaction and self._numEvaporatedQueuedMerges > self.heapCompactionRatio * heapSize:
+            self._compactHeap()
+
+    def _compactHeap(self):
+        self.prioritisedMerges = [entry for entry in self.prioritisedMerges if not entry[2].evaporated]
+        heapq.heapify(self.prioritisedMerges)
+        self._numEvaporatedQueuedMerges = 0
+        self.numHeapCompactions += 1
+
     def applyClustering(self) -> List[Cluster]:
         """
         Applies greedy agglomerative clustering to the clusters given at construction, merging
@@ -71,62 +122,79 @@ class GreedyAgglomerativeClustering(object):
         # compute all possible merges, adding them to the priority queue
         self.log.info("Computing initial merges")
         for idx, wc in enumerate(self.wrappedClusters):
-            self.log.debug("Computing potential merges for cluster index %d" % idx)
-            wc.computeMerges(False)
-        
+            self.log.debug("Computing potential merges for cluster index %d", idx)
+            wc.computeMerges(True)
+        self.log.info(f"Computed {len(self.prioritisedMerges)} initial merges")
+
         # greedily apply the least-cost merges
         steps = 0
-        while not self.prioritisedMerges.empty():
-            self.log.debug("Clustering step %d" % (steps+1))
-            haveMerge = False
-            while not haveMerge and not self.prioritisedMerges.empty():
-                merge = self.prioritisedMerges.get()
-                if not merge.evaporated:
-                    haveMerge = True
-            if haveMerge:
-                merge.apply()
+        while True:
+            merge = self._popMerge()
+            if merge is None:
+                break
             steps += 1
-        
-        result = filter(lambda wc: not wc.isMerged, self.wrappedClusters)
-        result = list(map(lambda wc: wc.cluster, result))
-        return result
-        
+            self.log.debug("Clustering step %d", steps)
+            merge.apply()
+        self.log.info(f"Clustering completed after {steps} merges ({self.numHeapCompactions} compactions of the priority queue)")
+
+        return [self.wrappedClusters[idx].cluster for idx in self.unmergedClusterIndices]
+
+    def findUnmergedClusterIndex(self, idx: int) -> int:
+        """
+        :param idx: the index of an initial cluster
+        :return: the index of the (unmerged) cluster into which the initial cluster with the given index has been merged
+            (the given index itself if the cluster has not been merged into another cluster)
+        """
+        wrappedClusters = self.wrappedClusters
+        root = idx
+        while wrappedClusters[root].mergedIntoIdx is not None:
+            root = wrappedClusters[root].mergedIntoIdx
+        # path compression
+        while wrappedClusters[idx].mergedIntoIdx is not None and wrappedClusters[idx].mergedIntoIdx != root:
+            nextIdx = wrappedClusters[idx].mergedIntoIdx
+            wrappedClusters[idx].mergedIntoIdx = root
+            idx = nextIdx
+        return root
+
     class WrappedCluster(object):
         """
         Wrapper for clusters which stores additional data required for clustering (internal use only)
         """
-        def __init__(self, cluster, idx, clusterer):
+        def __init__(self, cluster, idx, clusterer: "GreedyAgglomerativeClustering"):
             self.isMerged = False
+            self.mergedIntoIdx: Optional[int] = None
             self.merges = []
             self.cluster = cluster
             self.idx = idx
             self.clusterer = clusterer
-            
+
         def removeMerges(self):
             for merge in self.merges:
-                merge.evaporated = True
+                if not merge.evaporated:
+                    merge.evaporated = True
+                    self.clusterer._onMergeEvaporated()
             self.merges = []
 
-        def computeMerges(self, allPairs):
-            # add new merges to queue
-            startIdx = 0 if allPairs else self.idx + 1
-            otherIdx = startIdx
+        def computeMerges(self, initial: bool):
+            """
+            Computes the potential merges of this cluster, adding them to the priority queue
+
+            :param initial: whether this is the initial computation of merges (where merges with all candidates are computed only for one
+                of the two clusters involved)
+            """
             wrappedClusters = self.clusterer.wrappedClusters
-            while otherIdx < len(wrappedClusters):
-                if otherIdx != self.idx:
-                    other = wrappedClusters[otherIdx]
-                    if not other.isMerged:
-                        mergeCost = self.cluster.mergeCost(other.cluster)
-                        if not math.isinf(mergeCost):
-                            merge = GreedyAgglomerativeClustering.ClusterMerge(self, other, mergeCost)
-                            self.merges.append(merge)
-                            other.merges.append(merge)
-                            self.clusterer.prioritisedMerges.put(merge)
-                otherIdx += 1
-        
+            for otherIdx in self.clusterer.mergeCandidateDeterminationStrategy.iterCandidateIndices(self, initial):
+                other = wrappedClusters[otherIdx]
+                mergeCost = self.cluster.mergeCost(other.cluster)
+                if not math.isinf(mergeCost):
+                    merge = GreedyAgglomerativeClustering.ClusterMerge(self, other, mergeCost)
+                    self.merges.append(merge)
+                    other.merges.append(merge)
+                    self.clusterer._pushMerge(merge)
+
         def __str__(self):
             return "Cluster[idx=%d]" % self.idx
-        
+
     class ClusterMerge(object):
         """
         Represents a potential merge
@@ -141,14 +209,128 @@ class GreedyAgglomerativeClustering(object):
 
         def apply(self):
             c1, c2 = self.c1, self.c2
-            self.log.debug("Merging %s into %s..." % (str(c1), str(c2)))
+            clusterer = c1.clusterer
+            self.log.debug("Merging %s into %s...", c1, c2)
             c1.cluster.merge(c2.cluster)
             c2.isMerged = True
+            c2.mergedIntoIdx = c1.idx
+            del clusterer.unmergedClusterIndices[c2.idx]
             c1.removeMerges()
             c2.removeMerges()
-            self.log.debug("Computing new merge costs for %s..." % str(c1))
-            c1.computeMerges(True)
-        
+            clusterer.mergeCandidateDeterminationStrategy.notifyMerged(c1, c2)
+            self.log.debug("Computing new merge costs for %s...", c1)
+            c1.computeMerges(False)
+
         def __lt__(self, other):
             return self.mergeCost < other.mergeCost
 
+
+class MergeCandidateDeterminationStrategy(ABC):
+    """
+    Determines the clusters with which a cluster may be merged in GreedyAgglomerativeClustering
+    """
+    def __init__(self):
+        self.clusterer: Optional[GreedyAgglomerativeClustering] = None
+
+    def setClusterer(self, clusterer: GreedyAgglomerativeClustering):
+        """
+        Initialises this strategy for use with the given clusterer (called by the clusterer at construction)
+
+        :param clusterer: the clusterer
+        """
+        self.clusterer = clusterer
+
+    @abstractmethod
+    def iterCandidateIndices(self, wc: GreedyAgglomerativeClustering.WrappedCluster, initial: bool) -> Iterator[int]:
+        """
+        :param wc: the (unmerged) cluster for which to determine merge candidates
+        :param initial: whether this is the initial computation of merges; if so, each pair of clusters shall be considered only once,
+            i.e. only candidates with indices greater than the index of the given cluster shall be returned
+        :return: the indices of the unmerged clusters with which the given cluster may be merged (not including the cluster itself)
+        """
+        pass
+
+    def notifyMerged(self, c1: GreedyAgglomerativeClustering.WrappedCluster, c2: GreedyAgglomerativeClustering.WrappedCluster):
+        """
+        Informs the strategy that cluster c2 has been merged into cluster c1
+
+        :param c1: the cluster into which c2 was merged
+        :param c2: the merged cluster
+        """
+        pass
+
+
+class MergeCandidateDeterminationStrategyAllPairs(MergeCandidateDeterminationStrategy):
+    """
+    Considers all pairs of (unmerged) clusters, requiring a quadratic number of merge cost computations initially
+    and a linear number after each merge
+    """
+    def iterCandidateIndices(self, wc: GreedyAgglomerativeClustering.WrappedCluster, initial: bool) -> Iterator[int]:
+        if initial:
+            yield from range(wc.idx + 1, len(self.clusterer.wrappedClusters))
+        else:
+            for idx in self.clusterer.unmergedClusterIndices:
+                if idx != wc.idx:
+                    yield idx
+
+
+class MergeCandidateDeterminationStrategyNeighbours(MergeCandidateDeterminationStrategy):
+    """
+    Restricts merges to clusters which are neighbours, where the neighbourhood relation is given for the initial clusters
+    (and is assumed to be symmetric, i.e. missing reverse relations are added) and a merged cluster is a neighbour of all the
+    neighbours of its constituents.
+    The number of merge cost computations is thus linear in the number of neighbour relations, making the clustering of large
+    numbers of initial clusters feasible.
+    """
+    def __init__(self, neighbourIndicesFn: Callable[[int], Iterable[int]]):
+        """
+        :param neighbourIndicesFn: a function which maps the index of an initial cluster to the indices of its neighbouring initial clusters
+        """
+        super().__init__()
+        self.neighbourIndicesFn = neighbourIndicesFn
+        self._neighbourIndices: Dict[int, Set[int]] = {}
+
+    @classmethod
+    def fromDelaunayTriangulation(cls, points: np.ndarray) -> "MergeCandidateDeterminationStrategyNeighbours":
+        """
+        :param points: an array of shape (n, d) containing the coordinates representing the initial clusters (e.g. their centroids)
+        :return: a strategy which considers clusters neighbours if they are adjacent in the Delaunay triangulation of the points
+        """
+        from ..util.graph import delaunayGraph
+        graph = delaunayGraph(points)
+        return cls(lambda idx: graph.neighbors(idx) if idx in graph else ())
+
+    @classmethod
+    def fromRadius(cls, points: np.ndarray, radius: float) -> "MergeCandidateDeterminationStrategyNeighbours":
+        """
+        :param points: an array of shape (n, d) containing the coordinates representing the initial clusters (e.g. their centroids)
+        :param radius: the maximum (Euclidean) distance between the points of neighbouring clusters
+        :return: a strategy which considers clusters neighbours if their points are within the given distance of each other
+        """
+        from scipy.spatial import cKDTree
+        neighbourIndices = cKDTree(points).query_ball_point(points, radius)
+        return cls(lambda idx: neighbourIndices[idx])
+
+    def setClusterer(self, clusterer: GreedyAgglomerativeClustering):
+        super().setClusterer(clusterer)
+        self._neighbourIndices = {idx: set() for idx in range(len(clusterer.wrappedClusters))}
+        for idx in range(len(clusterer.wrappedClusters)):
+            for neighbourIdx in self.neighbourIndicesFn(idx):
+                if neighbourIdx != idx:
+                    self._neighbourIndices[idx].add(neighbourIdx)
+                    self._neighbourIndices[neighbourIdx].add(idx)
+
+    def iterCandidateIndices(self, wc: GreedyAgglomerativeClustering.WrappedCluster, initial: bool) -> Iterator[int]:
+        if initial:
+            for idx in sorted(self._neighbourIndices[wc.idx]):
+                if idx > wc.idx:
+                    yield idx
+        else:
+            # resolve neighbours which have since been merged into other clusters, storing the result for subsequent queries
+            neighbourIndices = {self.clusterer.findUnmergedClusterIndex(idx) for idx in self._neighbourIndices[wc.idx]}
+            neighbourIndices.discard(wc.idx)
+            self._neighbourIndices[wc.idx] = neighbourIndices
+            yield from sorted(neighbourIndices)
+
+    def notifyMerged(self, c1: GreedyAgglomerativeClustering.WrappedCluster, c2: GreedyAgglomerativeClustering.WrappedCluster):
+        self._neighbourIndices[c1.idx].update(self._neighbourIndices.pop(c2.idx))
@@ -0,0 +1,200 @@
+import logging
+from typing import Optional, List
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from .base.clustering import ClusteringModel
+
+log = logging.getLogger(__name__)
+
+
+class IncrementalClusteringModel(ClusteringModel):
+    """
+    Clustering model which supports the incremental addition of datapoints (see partialFit) and the assignment of new
+    datapoints to the clusters found so far (see predictLabels).
+
+    Datapoints are assigned to micro-clusters, i.e. groups of datapoints which lie within a given radius of the micro-cluster's
+    centre; a datapoint which is not within the radius of any existing micro-cluster starts a new micro-cluster.
+    The micro-clusters are periodically consolidated: their centres are updated to the mean of their datapoints, and
+    micro-clusters whose centres are within the linkage distance of each other are joined to form the actual clusters.
+    The results of a consolidation (i.e. the labels, clusters and summaries provided via the ClusteringModel interface) remain
+    unchanged until the next consolidation.
+    Micro-cluster centres are managed in a KD-tree, such that the assignment of a datapoint takes logarithmic time in the number
+    of micro-clusters.
+
+    :param microClusterRadius: the maximum distance between a datapoint and the centre of the micro-cluster it is assigned to
+    :param linkageDistance: the maximum distance between the centres of micro-clusters which are to be joined to form a cluster;
+        if None, use twice the micro-cluster radius
+    :param consolidationInterval: the number of datapoints to be added via partialFit after which the micro-clusters are
+        consolidated automatically
+    :param noiseLabel: label that is associated with the noise cluster or None
+    :param minClusterSize: if not None, clusters below this size will be labeled as noise
+    :param maxClusterSize: if not None, clusters above this size will be labeled as noise
+    """
+    def __init__(self, microClusterRadius: float, linkageDistance: float = None, consolidationInterval=10000, noiseLabel=-1,
+            minClusterSize: int = None, maxClusterSize: int = None):
+        super().__init__(noiseLabel=noiseLabel, minClusterSize=minClusterSize, maxClusterSize=maxClusterSize)
+        self.microClusterRadius = microClusterRadius
+        self.linkageDistance = linkageDistance if linkageDistance is not None else 2 * microClusterRadius
+        self.consolidationInterval = consolidationInterval
+        self._resetMicroClusters()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}[microClusterRadius={self.microClusterRadius}, linkageDistance={self.linkageDistance}]"
+
+    def _resetMicroClusters(self):
+        # the datapoints added so far and the indices of the micro-clusters they are assigned to (in batches)
+        self._datapointBatches: List[np.ndarray] = []
+        self._microClusterIndexBatches: List[np.ndarray] = []
+        self._microClusterSums: Optional[np.ndarray] = None
+        self._microClusterCounts = np.zeros(0, dtype=np.int64)
+        # the KD-tree of the micro-cluster centres (as of the last consolidation) and the labels of these micro-clusters
+        self._consolidatedTree: Optional[cKDTree] = None
+        self._consolidatedMicroClusterLabels: Optional[np.ndarray] = None
+        # the centres of the micro-clusters created since the last consolidation
+        self._pendingMicroClusterCentres: List[np.ndarray] = []
+        self._numDatapointsSinceConsolidation = 0
+
+    @property
+    def numMicroClusters(self) -> int:
+        return len(self._microClusterCounts)
+
+    def _assignToMicroClusters(self, data: np.ndarray) -> np.ndarray:
+        """
+        Assigns the given datapoints to micro-clusters, creating new micro-clusters where necessary and updating the
+        micro-cluster statistics
+
+        :param data: the datapoints
+        :return: the indices of the micro-clusters the datapoints were assigned to
+        """
+        microClusterIndices = np.full(len(data), -1, dtype=np.int64)
+
+        # assign to consolidated micro-clusters
+        numConsolidated = 0
+        if self._consolidatedTree is not None:
+            numConsolidated = self._consolidatedTree.n
+            distances, indices = self._consolidatedTree.query(data, distance_upper_bound=self.microClusterRadius)
+            isAssigned = np.isfinite(distances)
+            microClusterIndices[isAssigned] = indices[isAssigned]
+
+        # assign remaining datapoints to micro-clusters created since the last consolidation
+        unassignedIndices = np.flatnonzero(microClusterIndices == -1)
+        if len(unassignedIndices) > 0 and len(self._pendingMicroClusterCentres) > 0:
+            distances, indices = cKDTree(np.array(self._pendingMicroClusterCentres)).query(data[unassignedIndices],
+                distance_upper_bound=self.microClusterRadius)
+            isAssigned = np.isfinite(distances)
+            microClusterIndices[unassignedIndices[isAssigned]] = numConsolidated + indices[isAssigned]
+            unassignedIndices = unassignedIndices[~isAssigned]
+
+        # create new micro-clusters for the remaining datapoints: each datapoint that is not yet covered becomes the centre of a
+        # new micro-cluster comprising all uncovered datapoints within the radius
+        if len(unassignedIndices) > 0:
+            unassignedData = data[unassignedIndices]
+            unassignedTree = cKDTree(unassignedData)
+            newMicroClusterIndex = numConsolidated + len(self._pendingMicroClusterCentres)
+            for i in range(len(unassignedIndices)):
+                if microClusterIndices[unassignedIndices[i]] != -1:
+                    continue
+                neighbourIndices = np.array(unassignedTree.query_ball_point(unassignedData[i], self.microClusterRadius), dtype=np.int64)
+                neighbourIndices = unassignedIndices[neighbourIndices]
+                microClusterIndices[neighbourIndices[microClusterIndices[neighbourIndices] == -1]] = newMicroClusterIndex
+                self._pendingMicroClusterCentres.append(unassignedData[i])
+                newMicroClusterIndex += 1
+
+        # update the micro-cluster statistics
+        numMicroClusters = numConsolidated + len(self._pendingMicroClusterCentres)
+        counts = np.bincount(microClusterIndices, minlength=numMicroClusters)
+        sums = np.stack([np.bincount(microClusterIndices, weights=data[:, j], minlength=numMicroClusters) for j in range(data.shape[1])],
+            axis=1)
+        if self._microClusterSums is None:
+            self._microClusterSums, self._microClusterCounts = sums, counts
+        else:
+            numPrevious = len(self._microClusterCounts)
+            sums[:numPrevious] += self._microClusterSums
+            counts[:numPrevious] += self._microClusterCounts
+            self._microClusterSums, self._microClusterCounts = sums, counts
+
+        self._datapointBatches.append(data)
+        self._microClusterIndexBatches.append(microClusterIndices)
+        return microClusterIndices
+
+    def _consolidateMicroClusters(self) -> np.ndarray:
+        """
+        Updates the centres of all micro-clusters and joins them to form clusters
+
+        :return: the cluster labels of all datapoints added so far
+        """
+        centres = self._microClusterSums / self._microClusterCounts[:, None]
+        self._consolidatedTree = cKDTree(centres)
+        self._pendingMicroClusterCentres = []
+        self._numDatapointsSinceConsolidation = 0
+
+        # join micro-clusters which are within the linkage distance of each other (connected components)
+        pairs = self._consolidatedTree.query_pairs(self.linkageDistance, output_type="ndarray")
+        numMicroClusters = len(centres)
+        adjacency = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(numMicroClusters, numMicroClusters))
+        _, microClusterLabels = connected_components(adjacency, directed=False)
+
+        if len(self._datapointBatches) > 1:
+            self._datapointBatches = [np.concatenate(self._datapointBatches)]
+            self._microClusterIndexBatches = [np.concatenate(self._microClusterIndexBatches)]
+        return microClusterLabels[self._microClusterIndexBatches[0]]
+
+    def _applyLabels(self, data: np.ndarray, labels: np.ndarray) -> None:
+        super()._applyLabels(data, labels)
+        # determine the final labels of the micro-clusters (which may have been relabelled as noise because of size bounds)
+        self._consolidatedMicroClusterLabels = np.empty(self.numMicroClusters, dtype=self.labels.dtype)
+        self._consolidatedMicroClusterLabels[self._microClusterIndexBatches[0]] = self.labels
+
+    def _computeLabels(self, x: np.ndarray) -> np.ndarray:
+        self._resetMicroClusters()
+        self._assignToMicroClusters(x)
+        return self._consolidateMicroClusters()
+
+    def partialFit(self, data: np.ndarray) -> None:
+        """
+        Adds the given datapoints to the model, assigning them to micro-clusters; if the number of datapoints added since the last
+        consolidation reaches the consolidation interval, the micro-clusters are consolidated (see consolidate)
+
+        :param data: the datapoints to add
+        """
+        data = np.asarray(data, dtype=float)
+        self._assignToMicroClusters(data)
+        self._numDatapointsSinceConsolidation += len(data)
+        if self._numDatapointsSinceConsolidation >= self.consolidationInterval:
+            self.consolidate()
+
+    def consolidate(self) -> None:
+        """
+        Consolidates the micro-clusters, updating the clusters (and labels) provided by this model to reflect all datapoints
+        added so far
+        """
+        if len(self._datapointBatches) == 0:
+            raise Exception("No datapoints were added")
+        log.info(f"Consolidating {self.numMicroClusters} micro-clusters of {self}")
+        labels = self._consolidateMicroClusters()
+        self._applyLabels(self._datapointBatches[0], labels)
+
+    def predictLabels(self, data: np.ndarray) -> np.ndarray:
+        """
+        Assigns the given datapoints to the clusters found as of the last consolidation, without adding them to the model.
+        A datapoint is assigned the label of the closest micro-cluster if it is within the micro-cluster radius of the micro-cluster's
+        centre and is labelled as noise otherwise (unless there is no noise label, in which case the closest micro-cluster's label
+        is always used).
+
+        :param data: the datapoints
+        :return: the array of cluster labels
+        """
+        assert self.isFitted
+        data = np.asarray(data, dtype=float)
+        if self.noiseLabel is None:
+            _, indices = self._consolidatedTree.query(data)
+            return self._consolidatedMicroClusterLabels[indices]
+        distances, indices = self._consolidatedTree.query(data, distance_upper_bound=self.microClusterRadius)
+        isAssigned = np.isfinite(distances)
+        labels = np.full(len(data), self.noiseLabel, dtype=self._consolidatedMicroClusterLabels.dtype)
+        labels[isAssigned] = self._consolidatedMicroClusterLabels[indices[isAssigned]]
+        return labels
@@ -1,5 +1,6 @@
 from .crossval import VectorClassificationModelCrossValidator, VectorRegressionModelCrossValidator, \
-    VectorClassificationModelCrossValidationData, VectorRegressionModelCrossValidationData
+    VectorClassificationModelCrossValidationData, VectorRegressionModelCrossValidationData, \
+    CrossValidationPruner, CrossValidationPrunerMedian, CrossValidationPrunerBestRelative
 from .eval_util import RegressionEvaluationUtil, ClassificationEvaluationUtil, MultiDataEvaluationUtil, \
     evalModelViaEvaluator, createEvaluationUtil, createVectorModelEvaluator, createVectorModelCrossValidator
 from .evaluator import VectorClassificationModelEvaluator, VectorRegressionModelEvaluator, \
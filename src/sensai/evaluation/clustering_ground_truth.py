@@ -6,10 +6,11 @@ import geopandas as gp
 import logging
 import numpy as np
 from geopandas import GeoDataFrame
-from shapely.geometry import Polygon, MultiPoint, MultiPolygon
+from shapely.geometry import Polygon, MultiPolygon
 from typing import Sequence, Union, Optional
 
-from ..util.coordinates import extractCoordinatesArray, TCoordinates, GeoDataFrameWrapper
+from ..util.coordinates import extractCoordinatesArray, TCoordinates, GeoDataFrameWrapper, multipointsFromCoordinateGroups, \
+    pointsFromCoordinates
 
 log = logging.getLogger(__name__)
 
@@ -46,36 +47,58 @@ class PolygonAnnotatedCoordinates(GeoDataFrameWrapper):
         self.clusterPolygons = MultiPolygon(polygons[1:])
         self.noisePolygon = self.regionPolygon.difference(self.clusterPolygons)
 
-        self.regionMultipoint = MultiPoint(coordinates).intersection(self.regionPolygon)
-        if self.regionMultipoint.is_empty:
+        # determine the points in the region and the cluster polygons they belong to via spatial joins
+        points = gp.GeoDataFrame(geometry=pointsFromCoordinates(coordinates))
+        isInRegion = points.intersects(self.regionPolygon).values
+        if not np.any(isInRegion):
             raise Exception(f"The ground truth region contains no datapoints. "
                             f"This can happen if you have provided unsuitable coordinates")
-        self.noiseMultipoint = self.regionMultipoint.intersection(self.noisePolygon)
+        regionPoints = points[isInRegion].reset_index(drop=True)
+        clusterPolygonsGDF = gp.GeoDataFrame(geometry=list(self.clusterPolygons.geoms))
+        joined = gp.sjoin(regionPoints, clusterPolygonsGDF, "inner", "intersects")
+        # the cluster index of each point in the region (0 for noise, i for the i-th cluster polygon)
+        regionClusterIndices = np.zeros(len(regionPoints), dtype=int)
+        regionClusterIndices[joined.index.values] = joined["index_right"].values + 1
+        numNoisePoints = np.count_nonzero(regionClusterIndices == 0)
         if self.noiseLabel is None and not self.noisePolygon.is_empty:
-            raise Exception(f"No noise_label was provided but there is noise: {len(self.noiseMultipoint)} datapoints"
+            raise Exception(f"No noise_label was provided but there is noise: {numNoisePoints} datapoints"
                             f"in annotated area do not belong to any cluster polygon")
-        self.clustersMultipoints = []
         intermediatePolygon = Polygon()
-        for i, clusterPolygon in enumerate(self.clusterPolygons, start=1):
+        for i, clusterPolygon in enumerate(self.clusterPolygons.geoms, start=1):
             if not intermediatePolygon.intersection(clusterPolygon).is_empty:
                 raise Exception(f"The polygons should be non-intersecting: polygon {i} intersects with previous polygons")
             intermediatePolygon = intermediatePolygon.union(clusterPolygon)
-            clusterMultipoint = self.regionMultipoint.intersection(clusterPolygon)
-            if clusterMultipoint.is_empty:
+        clusterSizes = np.bincount(regionClusterIndices, minlength=len(clusterPolygonsGDF) + 1)
+        for i, clusterSize in enumerate(clusterSizes[1:], start=1):
+            if clusterSize == 0:
                 raise Exception(f"The annotated cluster for polygon {i} is empty - check your data!")
-            self.clustersMultipoints.append(clusterMultipoint)
+
+        # store the coordinates in the region grouped by cluster (noise first)
+        sortOrder = np.argsort(regionClusterIndices, kind="stable")
+        self._regionCoordinates = coordinates[isInRegion][sortOrder]
+        self._clusterSizes = clusterSizes
+        multipoints = multipointsFromCoordinateGroups(self._regionCoordinates, clusterSizes)
+        self.regionMultipoint = multipointsFromCoordinateGroups(self._regionCoordinates, [len(self._regionCoordinates)])[0]
+        self.noiseMultipoint = multipoints[0]
+        self.clustersMultipoints = list(multipoints[1:])
+
+    def _clusterLabels(self, includeNoise: bool) -> np.ndarray:
+        """
+        :return: the labels of the noise cluster (if included) and the clusters in order
+        """
+        numClusters = len(self.clustersMultipoints)
+        if self.noiseLabel is not None and includeNoise:
+            return np.arange(self.noiseLabel, self.noiseLabel + numClusters + 1)
+        return np.arange(numClusters)
 
     def toGeoDF(self, crs='epsg:3857', include_noise=True):
         """
         :return: GeoDataFrame with clusters as MultiPoint instance indexed by the clusters' identifiers
         """
         clusters = self.clustersMultipoints
-        firstLabel = 0
         if self.noiseLabel is not None and include_noise:
             clusters = [self.noiseMultipoint] + clusters
-            firstLabel = self.noiseLabel
-        gdf = gp.GeoDataFrame({"geometry": clusters,
-                               "identifier": list(range(firstLabel, firstLabel + len(clusters), 1))}, crs=crs)
+        gdf = gp.GeoDataFrame({"geometry": clusters, "identifier": self._clusterLabels(include_noise)}, crs=crs)
         gdf.set_index("identifier", drop=True, inplace=True)
         return gdf
 
@@ -100,9 +123,7 @@ class PolygonAnnotatedCoordinates(GeoDataFrameWrapper):
 
         :return: tuple of arrays of the type (coordinates, labels)
         """
-        coords, labels = [], []
-        for row in self.toGeoDF(include_noise=True).itertuples():
-            clusterMultipoint, label = row.geometry, row.Index
-            coords += [[p.x, p.y] for p in clusterMultipoint]
-            labels += [label] * len(clusterMultipoint)
-        return np.array(coords), np.array(labels)
+        # without a noise label, there are no noise points and the labels pertain to the clusters only
+        clusterSizes = self._clusterSizes if self.noiseLabel is not None else self._clusterSizes[1:]
+        labels = np.repeat(self._clusterLabels(True), clusterSizes)
+        return self._regionCoordinates, labels
@@ -2,7 +2,7 @@ import copy
 import logging
 import warnings
 from abc import ABC, abstractmethod
-from typing import Tuple, Any, Generator, Generic, TypeVar, List
+from typing import Tuple, Any, Generator, Generic, TypeVar, List, Optional, Sequence, Dict
 
 import numpy as np
 
@@ -30,6 +30,8 @@ class PredictorModelCrossValidationData(ABC, Generic[TModel, TEvalData, TEvalSta
         self.predictorModels = predictorModels
         self.evalDataList = evalDataList
         self.testIndicesList = testIndicesList
+        # whether the evaluation was aborted by a pruner, i.e. evalDataList contains results for only some of the folds
+        self.pruned = False
 
     @property
     def trainedModels(self):
@@ -64,6 +66,117 @@ class PredictorModelCrossValidationData(ABC, Generic[TModel, TEvalData, TEvalSta
 TCrossValData = TypeVar("TCrossValData", bound=PredictorModelCrossValidationData)
 
 
+class CrossValidationPruner(ABC):
+    """
+    Decides, based on the results of the folds that have already been evaluated, whether the evaluation of the remaining folds
+    of a cross-validation can be skipped, because the evaluated model is clearly inferior to the models evaluated previously.
+    The pruner must be informed (via tell/tellMetrics) about the results of completed evaluations; this is done automatically by
+    the hyper-parameter search classes.
+    """
+    def __init__(self, metricName: str, minimiseMetric: bool, minFolds=2):
+        """
+        :param metricName: the name of the metric (as computed for a single fold, e.g. "RRSE") on which to base the decision
+        :param minimiseMetric: whether lower values of the metric are better
+        :param minFolds: the minimum number of folds that must be evaluated before a model can be pruned
+        """
+        self.metricName = metricName
+        self.minimiseMetric = minimiseMetric
+        self.minFolds = minFolds
+
+    def _isWorse(self, value: float, reference: float) -> bool:
+        return value > reference if self.minimiseMetric else value < reference
+
+    def isPruned(self, foldMetricValues: Sequence[float]) -> bool:
+        """
+        :param foldMetricValues: the values of the metric for the folds evaluated so far
+        :return: True if the remaining folds shall not be evaluated
+        """
+        if len(foldMetricValues) < self.minFolds:
+            return False
+        return self._isPruned(float(np.mean(foldMetricValues)))
+
+    @abstractmethod
+    def _isPruned(self, meanMetricValue: float) -> bool:
+        """
+        :param meanMetricValue: the mean metric value of the folds evaluated so far
+        :return: True if the remaining folds shall not be evaluated
+        """
+        pass
+
+    @abstractmethod
+    def tell(self, meanMetricValue: float):
+        """
+        Informs the pruner about the result of a completed (non-pruned) cross-validation
+
+        :param meanMetricValue: the mean metric value across all folds
+        """
+        pass
+
+    def tellMetrics(self, metrics: Dict[str, Any]):
+        """
+        Informs the pruner about the metrics dictionary of an evaluation, as returned by the cross-validator's computeMetrics
+        method; results of pruned evaluations are ignored
+
+        :param metrics: the metrics dictionary
+        """
+        if not metrics.get("pruned", False):
+            self.tell(metrics[f"mean[{self.metricName}]"])
+
+
+class CrossValidationPrunerMedian(CrossValidationPruner):
+    """
+    Implements the median stopping rule: a model is pruned if the mean metric value of the folds evaluated so far is
+    worse than the median of the results of previously completed cross-validations
+    """
+    def __init__(self, metricName: str, minimiseMetric: bool, minFolds=2, minCompletedEvaluations=5):
+        """
+        :param metricName: the name of the metric (as computed for a single fold, e.g. "RRSE") on which to base the decision
+        :param minimiseMetric: whether lower values of the metric are better
+        :param minFolds: the minimum number of folds that must be evaluated before a model can be pruned
+        :param minCompletedEvaluations: the number of completed cross-validations that are required before any model is pruned
+        """
+        super().__init__(metricName, minimiseMetric, minFolds=minFolds)
+        self.minCompletedEvaluations = minCompletedEvaluations
+        self._completedValues = []
+
+    def _isPruned(self, meanMetricValue: float) -> bool:
+        if len(self._completedValues) < self.minCompletedEvaluations:
+            return False
+        return self._isWorse(meanMetricValue, float(np.median(self._completedValues)))
+
+    def tell(self, meanMetricValue: float):
+        self._completedValues.append(meanMetricValue)
+
+
+class CrossValidationPrunerBestRelative(CrossValidationPruner):
+    """
+    Prunes a model if the mean metric value of the folds evaluated so far is worse than the best result of previously completed
+    cross-validations by more than a given relative margin
+    """
+    def __init__(self, metricName: str, minimiseMetric: bool, relativeMargin=0.1, minFolds=2):
+        """
+        :param metricName: the name of the metric (as computed for a single fold, e.g. "RRSE") on which to base the decision
+        :param minimiseMetric: whether lower values of the metric are better
+        :param relativeMargin: the margin, relative to the absolute value of the best result, by which a model's result may be worse
+            than the best result without being pruned
+        :param minFolds: the minimum number of folds that must be evaluated before a model can be pruned
+        """
+        super().__init__(metricName, minimiseMetric, minFolds=minFolds)
+        self.relativeMargin = relativeMargin
+        self._bestValue = None
+
+    def _isPruned(self, meanMetricValue: float) -> bool:
+        if self._bestValue is None:
+            return False
+        margin = abs(self._bestValue) * self.relativeMargin
+        bound = self._bestValue + margin if self.minimiseMetric else self._bestValue - margin
+        return self._isWorse(meanMetricValue, bound)
+
+    def tell(self, meanMetricValue: float):
+        if self._bestValue is None or self._isWorse(self._bestValue, meanMetricValue):
+            self._bestValue = meanMetricValue
+
+
 class VectorModelCrossValidator(MetricsDictProvider, Generic[TCrossValData], ABC):
     def __init__(self, data: InputOutputData, folds: int = 5, randomSeed=42, returnTrainedModels=False, evaluatorParams: dict = None):
         """
@@ -95,25 +208,47 @@ class VectorModelCrossValidator(MetricsDictProvider, Generic[TCrossValData], ABC
     def _createResultData(self, trainedModels, evalDataList, testIndicesList, predictedVarNames) -> TCrossValData:
         pass
 
-    def evalModel(self, model: VectorModel):
+    def evalModel(self, model: VectorModel, pruner: Optional[CrossValidationPruner] = None) -> TCrossValData:
+        """
+        Evaluates the given model on all folds
+
+        :param model: the model to evaluate
+        :param pruner: a pruner which is asked after each fold whether the remaining folds shall be skipped; if the evaluation
+            is aborted, the resulting data's pruned flag is set and it contains the results of the evaluated folds only
+        :return: the cross-validation result data
+        """
         trainedModels = [] if self.returnTrainedModels else None
         evalDataList = []
         testIndicesList = []
         predictedVarNames = None
-        for evaluator in self.modelEvaluators:
+        foldMetricValues = []
+        pruned = False
+        for i, evaluator in enumerate(self.modelEvaluators):
             modelToFit: VectorModel = copy.deepcopy(model) if self.returnTrainedModels else model
             evaluator.fitModel(modelToFit)
             if predictedVarNames is None:
                 predictedVarNames = modelToFit.getPredictedVariableNames()
             if self.returnTrainedModels:
                 trainedModels.append(modelToFit)
-            evalDataList.append(evaluator.evalModel(modelToFit))
+            evalData = evaluator.evalModel(modelToFit)
+            evalDataList.append(evalData)
             testIndicesList.append(evaluator.testData.outputs.index)
-        return self._createResultData(trainedModels, evalDataList, testIndicesList, predictedVarNames)
+            if pruner is not None and i < len(self.modelEvaluators) - 1:
+                foldMetricValues.append(evalData.getEvalStats().getAll()[pruner.metricName])
+                if pruner.isPruned(foldMetricValues):
+                    log.info(f"Pruning evaluation of {model.getName()} after {i+1} folds ({pruner.metricName} values: {foldMetricValues})")
+                    pruned = True
+                    break
+        result = self._createResultData(trainedModels, evalDataList, testIndicesList, predictedVarNames)
+        result.pruned = pruned
+        return result
 
-    def _computeMetrics(self, model: VectorModel):
-        data = self.evalModel(model)
-        return data.getEvalStatsCollection().aggStats()
+    def _computeMetrics(self, model: VectorModel, pruner: Optional[CrossValidationPruner] = None):
+        data = self.evalModel(model, pruner=pruner)
+        metrics = data.getEvalStatsCollection().aggStats()
+        if pruner is not None:
+            metrics["pruned"] = data.pruned
+        return metrics
 
 
 class VectorRegressionModelCrossValidationData(PredictorModelCrossValidationData[VectorRegressionModel, RegressionModelEvaluationData, RegressionEvalStats, RegressionEvalStatsCollection]):
@@ -1,9 +1,11 @@
+import copy
+
 import numpy as np
 import pandas as pd
 import seaborn as sns
 from abc import ABC, abstractmethod
 from matplotlib import pyplot as plt
-from typing import Generic, TypeVar, List, Union, Dict, Sequence
+from typing import Generic, TypeVar, List, Union, Dict, Sequence, Optional
 
 from ...util.tracking import timed
 from ...vector_model import VectorModel
@@ -119,10 +121,69 @@ class EvalStatsCollection(Generic[TEvalStats], ABC):
                ", ".join([f"{key}={self.aggStats()[key]:.4f}" for key in self.metrics]) + "]"
 
 
+class GrowableArray:
+    """
+    A contiguous one-dimensional array to which values can be appended efficiently: the underlying storage grows in chunks
+    (doubling its capacity), such that appending n values requires amortised O(n) time and no per-element Python objects
+    """
+    def __init__(self, initialCapacity=1024):
+        self._initialCapacity = initialCapacity
+        self._array: Optional[np.ndarray] = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, values: Union[np.ndarray, Sequence]):
+        values = np.asarray(values).reshape(-1)
+        n = len(values)
+        if self._array is None:
+            self._array = np.empty(max(n, self._initialCapacity), dtype=values.dtype)
+        else:
+            if values.dtype != self._array.dtype:
+                try:
+                    dtype = np.result_type(self._array.dtype, values.dtype)
+                except TypeError:
+                    dtype = np.dtype(object)
+                if dtype != self._array.dtype:
+                    self._array = self._array.astype(dtype)
+            if self._size + n > len(self._array):
+                newArray = np.empty(max(2 * len(self._array), self._size + n), dtype=self._array.dtype)
+                newArray[:self._size] = self._array[:self._size]
+                self._array = newArray
+        self._array[self._size:self._size + n] = values
+        self._size += n
+
+    def append(self, value):
+        self.extend([value])
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        :return: a read-only array view of the values that were added (without copying)
+        """
+        if self._array is None:
+            view = np.zeros(0)
+        else:
+            view = self._array[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def __getstate__(self):
+        # do not persist unused capacity
+        d = self.__dict__.copy()
+        if self._array is not None:
+            d["_array"] = self.values.copy()
+        return d
+
+
 class PredictionEvalStats(EvalStats[TMetric], ABC):
     """
     Collects data for the evaluation of predicted labels (including multi-dimensional predictions)
-    and computes corresponding metrics
+    and computes corresponding metrics.
+    The data is stored in contiguous numpy arrays (which are accessible via y_true and y_predicted).
+    Quantities that are required by several metrics can be cached by subclasses in the dictionary returned by
+    _getCachedIntermediates; the cache is cleared whenever data is added.
     """
     def __init__(self, y_predicted: PredictionArray, y_true: PredictionArray,
                  metrics: List[TMetric], additionalMetrics: List[TMetric] = None):
@@ -133,14 +194,48 @@ class PredictionEvalStats(EvalStats[TMetric], ABC):
         :param metrics: list of metrics to be computed on the provided data
         :param additionalMetrics: the metrics to additionally compute. This should only be provided if metrics is None
         """
-        self.y_true = []
-        self.y_predicted = []
-        self.y_true_multidim = None
-        self.y_predicted_multidim = None
+        self._y_true = GrowableArray()
+        self._y_predicted = GrowableArray()
+        self._y_true_multidim: Optional[List[GrowableArray]] = None
+        self._y_predicted_multidim: Optional[List[GrowableArray]] = None
+        self._intermediates = {}
         if y_predicted is not None:
             self._addAll(y_predicted, y_true)
         super().__init__(metrics, additionalMetrics=additionalMetrics)
 
+    @property
+    def y_true(self) -> np.ndarray:
+        """
+        The ground truth values as a read-only array (use tolist() to obtain a list)
+        """
+        return self._y_true.values
+
+    @property
+    def y_predicted(self) -> np.ndarray:
+        """
+        The predicted values as a read-only array (use tolist() to obtain a list)
+        """
+        return self._y_predicted.values
+
+    @property
+    def y_true_multidim(self) -> Optional[List[np.ndarray]]:
+        if self._y_true_multidim is None:
+            return None
+        return [a.values for a in self._y_true_multidim]
+
+    @property
+    def y_predicted_multidim(self) -> Optional[List[np.ndarray]]:
+        if self._y_predicted_multidim is None:
+            return None
+        return [a.values for a in self._y_predicted_multidim]
+
+    def _getCachedIntermediates(self) -> dict:
+        """
+        :return: a dictionary in which intermediate results that are shared by several metrics can be cached
+            (until further data is added)
+        """
+        return self._intermediates
+
     def _add(self, y_predicted, y_true):
         """
         Adds a single pair of values to the evaluation
@@ -148,8 +243,19 @@ class PredictionEvalStats(EvalStats[TMetric], ABC):
             y_predicted: the value predicted by the model
             y_true: the true value
         """
-        self.y_true.append(y_true)
-        self.y_predicted.append(y_predicted)
+        self._y_true.append(y_true)
+        self._y_predicted.append(y_predicted)
+        self._intermediates = {}
+
+    def addAll(self, y_predicted, y_true):
+        """
+        Adds multiple predicted values and the corresponding ground truth values to the evaluation, e.g. the predictions
+        for a chunk of the evaluation data (see _addAll for the supported types)
+
+        :param y_predicted: the predicted values
+        :param y_true: the corresponding ground truth values
+        """
+        self._addAll(y_predicted, y_true)
 
     def _addAll(self, y_predicted, y_true):
         """
@@ -171,21 +277,81 @@ class PredictionEvalStats(EvalStats[TMetric], ABC):
             dim = y_predicted_multidim.shape[1]
             if dim != y_true_multidim.shape[1]:
                 raise Exception("Dimension mismatch")
-            if self.y_true_multidim is None:
-                self.y_predicted_multidim = [[] for _ in range(dim)]
-                self.y_true_multidim = [[] for _ in range(dim)]
-            if len(self.y_predicted_multidim) != dim:
+            if self._y_true_multidim is None:
+                self._y_predicted_multidim = [GrowableArray() for _ in range(dim)]
+                self._y_true_multidim = [GrowableArray() for _ in range(dim)]
+            if len(self._y_predicted_multidim) != dim:
                 raise Exception("Dimension mismatch")
             for i in range(dim):
-                self.y_predicted_multidim[i].extend(y_predicted_multidim[:, i])
-                self.y_true_multidim[i].extend(y_true_multidim[:, i])
+                self._y_predicted_multidim[i].extend(y_predicted_multidim[:, i])
+                self._y_true_multidim[i].extend(y_true_multidim[:, i])
             # convert to flat data for this stats object
             y_predicted = y_predicted_multidim.reshape(-1)
             y_true = y_true_multidim.reshape(-1)
         else:
             raise Exception(f"Unhandled data types: {type(y_predicted)}, {type(y_true)}")
-        self.y_true.extend(y_true)
-        self.y_predicted.extend(y_predicted)
+        self._y_true.extend(y_true)
+        self._y_predicted.extend(y_predicted)
+        self._intermediates = {}
+
+
+class StreamingEvalStats(EvalStats[TMetric], ABC):
+    """
+    Base class for evaluation statistics which do not store the individual predictions but maintain mergeable accumulators
+    from which the metrics are computed.
+    Such statistics can be updated batch by batch (for the evaluation of data sets that do not fit into memory) and
+    can be merged (for combining partial results that were computed by different workers).
+    """
+    @abstractmethod
+    def update(self, y_predicted: PredictionArray, y_true: PredictionArray):
+        """
+        Adds a batch of predictions and the corresponding ground truth values
+
+        :param y_predicted: the predicted values
+        :param y_true: the ground truth values (of the same shape as y_predicted)
+        """
+        pass
+
+    @abstractmethod
+    def merge(self, other: "StreamingEvalStats") -> "StreamingEvalStats":
+        """
+        Adds the data accumulated by another instance (of the same type) to this instance
+
+        :param other: the instance whose data to add
+        :return: self
+        """
+        pass
+
+    @abstractmethod
+    def getNumDataPoints(self) -> int:
+        pass
+
+    @staticmethod
+    def _toFlatArray(y: PredictionArray) -> np.ndarray:
+        if isinstance(y, pd.DataFrame) or isinstance(y, pd.Series):
+            y = y.values
+        return np.asarray(y).reshape(-1)
+
+
+class StreamingEvalStatsCollection(EvalStatsCollection[TEvalStats]):
+    """
+    A collection of streaming evaluation statistics (e.g. one per fold or one per worker), whose global statistics are
+    obtained by merging
+    """
+    def __init__(self, evalStatsList: List[StreamingEvalStats]):
+        super().__init__(evalStatsList)
+        self.globalStats = None
+
+    def getGlobalStats(self) -> StreamingEvalStats:
+        """
+        Gets an evaluation statistics object that combines the data from all contained eval stats objects
+        """
+        if self.globalStats is None:
+            globalStats = copy.deepcopy(self.statsList[0])
+            for evalStats in self.statsList[1:]:
+                globalStats.merge(evalStats)
+            self.globalStats = globalStats
+        return self.globalStats
 
 
 def meanStats(evalStatsList: Sequence[EvalStats]) -> Dict[str, float]:
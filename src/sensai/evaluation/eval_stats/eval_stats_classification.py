@@ -2,10 +2,11 @@ import numpy as np
 import pandas as pd
 import sklearn
 from abc import ABC, abstractmethod
-from sklearn.metrics import confusion_matrix, accuracy_score
-from typing import List, Sequence
+from sklearn.metrics import accuracy_score
+from typing import List, Sequence, Optional
 
-from .eval_stats_base import PredictionArray, PredictionEvalStats, EvalStatsCollection, Metric
+from .eval_stats_base import PredictionArray, PredictionEvalStats, EvalStatsCollection, Metric, StreamingEvalStats, \
+    StreamingEvalStatsCollection, GrowableArray
 from ...util.plot import plotMatrix
 
 
@@ -28,6 +29,11 @@ class ClassificationMetric(Metric["ClassificationEvalStats"], ABC):
 class ClassificationMetricAccuracy(ClassificationMetric):
     name = "ACC"
 
+    def computeValueForEvalStats(self, evalStats: "ClassificationEvalStats"):
+        # use the (cached) confusion matrix, which is shared with other metrics and plots
+        counts = evalStats.getConfusionMatrix().confusionMatrix
+        return np.trace(counts) / np.sum(counts)
+
     def _computeValue(self, y_true, y_predicted, y_predictedClassProbabilities):
         return accuracy_score(y_true=y_true, y_pred=y_predicted)
 
@@ -38,12 +44,10 @@ class ClassificationMetricGeometricMeanOfTrueClassProbability(ClassificationMetr
 
     def _computeValue(self, y_true, y_predicted, y_predictedClassProbabilities):
         y_predicted_proba_true_class = np.zeros(len(y_true))
-        for i in range(len(y_true)):
-            trueClass = y_true[i]
-            if trueClass not in y_predictedClassProbabilities.columns:
-                y_predicted_proba_true_class[i] = 0
-            else:
-                y_predicted_proba_true_class[i] = y_predictedClassProbabilities[trueClass].iloc[i]
+        trueClassColumnIndices = y_predictedClassProbabilities.columns.get_indexer(y_true)
+        isKnownClass = trueClassColumnIndices >= 0
+        y_predicted_proba_true_class[isKnownClass] = \
+            y_predictedClassProbabilities.values[np.nonzero(isKnownClass)[0], trueClassColumnIndices[isKnownClass]]
         # the 1e-3 below prevents lp = -inf due to single entries with y_predicted_proba_true_class=0
         lp = np.log(np.maximum(1e-3, y_predicted_proba_true_class))
         return np.exp(lp.sum() / len(lp))
@@ -57,12 +61,10 @@ class ClassificationMetricTopNAccuracy(ClassificationMetric):
         super().__init__(name=f"Top{n}Accuracy")
 
     def _computeValue(self, y_true, y_predicted, y_predictedClassProbabilities):
-        labels = y_predictedClassProbabilities.columns
-        cnt = 0
-        for i, rowValues in enumerate(y_predictedClassProbabilities.values.tolist()):
-            pairs = sorted(zip(labels, rowValues), key=lambda x: x[1], reverse=True)
-            if y_true[i] in (x[0] for x in pairs[:self.n]):
-                cnt += 1
+        # column indices of the n most probable classes for each row (ties are resolved in favour of the first column)
+        topNColumnIndices = np.argsort(-y_predictedClassProbabilities.values, axis=1, kind="stable")[:, :self.n]
+        trueClassColumnIndices = y_predictedClassProbabilities.columns.get_indexer(y_true)
+        cnt = np.sum(np.any(topNColumnIndices == trueClassColumnIndices[:, np.newaxis], axis=1))
         return cnt / len(y_true)
 
 
@@ -78,20 +80,21 @@ class ClassificationEvalStats(PredictionEvalStats["ClassificationMetric"]):
         """
         :param y_predicted: the predicted class labels
         :param y_true: the true class labels
-        :param y_predictedClassProbabilities: a data frame whose columns are the class labels and whose values are probabilities
+        :param y_predictedClassProbabilities: a data frame whose columns are the class labels and whose values are probabilities.
+            If provided, class probabilities must also be provided for all further data that is added (see addAll).
         :param labels: the list of class labels
         :param metrics: the metrics to compute for evaluation; if None, use default metrics
         :param additionalMetrics: the metrics to additionally compute
         """
         self.labels = labels
-        self.y_predictedClassProbabilities = y_predictedClassProbabilities
         self._probabilitiesAvailable = y_predictedClassProbabilities is not None
+        # the class probabilities, stored column by column
+        self._classProbabilityColumns: Optional[list] = None
+        self._classProbabilities: Optional[List[GrowableArray]] = None
         if self._probabilitiesAvailable:
-            colSet = set(y_predictedClassProbabilities.columns)
-            if colSet != set(labels):
-                raise ValueError(f"Set of columns in class probabilities data frame ({colSet}) does not correspond to labels ({labels}")
-            if len(y_predictedClassProbabilities) != len(y_true):
-                raise ValueError("Row count in class probabilities data frame does not match ground truth")
+            self._classProbabilityColumns = list(y_predictedClassProbabilities.columns)
+            self._classProbabilities = [GrowableArray() for _ in self._classProbabilityColumns]
+            self._addClassProbabilities(y_predictedClassProbabilities, y_true)
 
         if metrics is None:
             metrics = [ClassificationMetricAccuracy(), ClassificationMetricGeometricMeanOfTrueClassProbability()]
@@ -103,8 +106,70 @@ class ClassificationEvalStats(PredictionEvalStats["ClassificationMetric"]):
 
         super().__init__(y_predicted, y_true, metrics, additionalMetrics=additionalMetrics)
 
+    def __setstate__(self, state):
+        # convert the class probabilities of instances that were pickled by earlier versions (which stored a data frame)
+        if "y_predictedClassProbabilities" in state:
+            probabilities: Optional[pd.DataFrame] = state.pop("y_predictedClassProbabilities")
+            state["_classProbabilityColumns"] = None
+            state["_classProbabilities"] = None
+            if probabilities is not None:
+                state["_classProbabilityColumns"] = list(probabilities.columns)
+                state["_classProbabilities"] = [GrowableArray() for _ in probabilities.columns]
+                for a, column in zip(state["_classProbabilities"], probabilities.columns):
+                    a.extend(probabilities[column].values)
+        self.__dict__ = state
+
+    @property
+    def y_predictedClassProbabilities(self) -> Optional[pd.DataFrame]:
+        """
+        The data frame of predicted class probabilities (whose columns are the class labels), or None if class probabilities
+        were not provided
+        """
+        if not self._probabilitiesAvailable:
+            return None
+        intermediates = self._getCachedIntermediates()
+        df = intermediates.get("classProbabilities")
+        if df is None:
+            df = pd.DataFrame({i: a.values for i, a in enumerate(self._classProbabilities)})
+            df.columns = self._classProbabilityColumns
+            intermediates["classProbabilities"] = df
+        return df
+
+    def _addClassProbabilities(self, y_predictedClassProbabilities: pd.DataFrame, y_true: PredictionArray):
+        colSet = set(y_predictedClassProbabilities.columns)
+        if colSet != set(self.labels):
+            raise ValueError(f"Set of columns in class probabilities data frame ({colSet}) does not correspond to labels ({self.labels}")
+        if len(y_predictedClassProbabilities) != len(y_true):
+            raise ValueError("Row count in class probabilities data frame does not match ground truth")
+        for a, column in zip(self._classProbabilities, self._classProbabilityColumns):
+            a.extend(y_predictedClassProbabilities[column].values)
+
+    def addAll(self, y_predicted, y_true, y_predictedClassProbabilities: pd.DataFrame = None):
+        """
+        Adds multiple predicted values and the corresponding ground truth values to the evaluation, e.g. the predictions
+        for a chunk of the evaluation data
+
+        :param y_predicted: the predicted class labels
+        :param y_true: the true class labels
+        :param y_predictedClassProbabilities: a data frame whose columns are the class labels and whose values are probabilities;
+            must be provided if and only if class probabilities were provided at construction
+        """
+        if (y_predictedClassProbabilities is not None) != self._probabilitiesAvailable:
+            raise ValueError("Class probabilities must be provided if and only if they were provided at construction")
+        if self._probabilitiesAvailable:
+            self._addClassProbabilities(y_predictedClassProbabilities, y_true)
+        self._addAll(y_predicted, y_true)
+
     def getConfusionMatrix(self) -> "ConfusionMatrix":
-        return ConfusionMatrix(self.y_true, self.y_predicted)
+        """
+        :return: the confusion matrix (which is cached until further data is added)
+        """
+        intermediates = self._getCachedIntermediates()
+        confusionMatrix = intermediates.get("confusionMatrix")
+        if confusionMatrix is None:
+            confusionMatrix = ConfusionMatrix(self.y_true, self.y_predicted)
+            intermediates["confusionMatrix"] = confusionMatrix
+        return confusionMatrix
 
     def getAccuracy(self):
         return self.computeMetricValue(ClassificationMetricAccuracy())
@@ -144,9 +209,166 @@ class ClassificationEvalStatsCollection(EvalStatsCollection[ClassificationEvalSt
 class ConfusionMatrix:
     def __init__(self, y_true, y_predicted):
         self.labels = sklearn.utils.multiclass.unique_labels(y_true, y_predicted)
-        self.confusionMatrix = confusion_matrix(y_true, y_predicted, labels=self.labels)
+        # count all (true, predicted) label index pairs in a single vectorised pass (the labels are sorted)
+        numLabels = len(self.labels)
+        trueIndices = np.searchsorted(self.labels, y_true)
+        predictedIndices = np.searchsorted(self.labels, y_predicted)
+        self.confusionMatrix = np.bincount(trueIndices * numLabels + predictedIndices, minlength=numLabels * numLabels) \
+            .reshape(numLabels, numLabels)
+
+    @classmethod
+    def fromCounts(cls, labels: np.ndarray, counts: np.ndarray) -> "ConfusionMatrix":
+        """
+        :param labels: the (sorted) class labels
+        :param counts: the matrix of counts, where rows correspond to true classes and columns to predicted classes
+        :return: the confusion matrix
+        """
+        confusionMatrix = cls.__new__(cls)
+        confusionMatrix.labels = labels
+        confusionMatrix.confusionMatrix = counts
+        return confusionMatrix
 
     def plot(self, normalize=True, titleAdd: str = None):
         title = 'Normalized Confusion Matrix' if normalize else 'Confusion Matrix (Counts)'
         return plotMatrix(self.confusionMatrix, title, self.labels, self.labels, 'true class', 'predicted class', normalize=normalize,
             titleAdd=titleAdd)
+
+
+class StreamingClassificationMetric(Metric["StreamingClassificationEvalStats"], ABC):
+    requiresProbabilities = False
+
+
+class StreamingClassificationMetricAccuracy(StreamingClassificationMetric):
+    name = ClassificationMetricAccuracy.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingClassificationEvalStats"):
+        counts = evalStats.getConfusionCounts()
+        return np.trace(counts) / np.sum(counts)
+
+
+class StreamingClassificationMetricGeometricMeanOfTrueClassProbability(StreamingClassificationMetric):
+    name = ClassificationMetricGeometricMeanOfTrueClassProbability.name
+    requiresProbabilities = True
+
+    def computeValueForEvalStats(self, evalStats: "StreamingClassificationEvalStats"):
+        return np.exp(evalStats.sumLogTrueClassProbabilities / evalStats.getNumDataPoints())
+
+
+class StreamingClassificationEvalStats(StreamingEvalStats[StreamingClassificationMetric]):
+    """
+    Evaluation statistics for classification which maintain mergeable accumulators (confusion counts and the sum of
+    log-probabilities of the true classes) instead of storing the predictions.
+    The metrics have the same names as the ones computed by ClassificationEvalStats.
+    """
+    def __init__(self, y_predicted: PredictionArray = None, y_true: PredictionArray = None,
+            y_predictedClassProbabilities: pd.DataFrame = None, labels: PredictionArray = None,
+            metrics: Sequence[StreamingClassificationMetric] = None, additionalMetrics: Sequence[StreamingClassificationMetric] = None):
+        """
+        :param y_predicted: an initial batch of predicted class labels (optional)
+        :param y_true: the true class labels corresponding to y_predicted
+        :param y_predictedClassProbabilities: a data frame whose columns are the class labels and whose values are the probabilities
+            corresponding to y_predicted (optional)
+        :param labels: the list of class labels; further labels are added as they are encountered
+        :param metrics: the metrics to compute for evaluation; if None, use default metrics
+        :param additionalMetrics: the metrics to additionally compute
+        """
+        if metrics is None:
+            metrics = [StreamingClassificationMetricAccuracy(), StreamingClassificationMetricGeometricMeanOfTrueClassProbability()]
+        self._labels = []
+        self._labelIndex = pd.Index([])
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self.sumLogTrueClassProbabilities = 0.0
+        self._probabilitiesAvailable = None
+        if labels is not None:
+            self._addLabels(labels)
+        super().__init__(list(metrics), additionalMetrics=additionalMetrics)
+        if y_predicted is not None:
+            self.update(y_predicted, y_true, y_predictedClassProbabilities=y_predictedClassProbabilities)
+
+    def _addLabels(self, labels):
+        newLabels = [l for l in pd.unique(np.asarray(labels)) if l not in self._labelIndex]
+        if len(newLabels) > 0:
+            self._labels.extend(newLabels)
+            self._labelIndex = pd.Index(self._labels)
+            numLabels = len(self._labels)
+            counts = np.zeros((numLabels, numLabels), dtype=np.int64)
+            counts[:self._counts.shape[0], :self._counts.shape[1]] = self._counts
+            self._counts = counts
+
+    def _updateProbabilitiesAvailable(self, available: bool):
+        if self._probabilitiesAvailable is None:
+            self._probabilitiesAvailable = available
+        elif self._probabilitiesAvailable != available:
+            raise ValueError("Class probabilities must be provided either for all or for none of the data points")
+
+    def getNumDataPoints(self) -> int:
+        return int(np.sum(self._counts))
+
+    def update(self, y_predicted: PredictionArray, y_true: PredictionArray, y_predictedClassProbabilities: pd.DataFrame = None):
+        """
+        Adds a batch of predictions and the corresponding ground truth values
+
+        :param y_predicted: the predicted class labels
+        :param y_true: the true class labels
+        :param y_predictedClassProbabilities: a data frame whose columns are the class labels and whose values are the probabilities
+            corresponding to y_predicted; must be provided either for all batches or for none
+        """
+        y_predicted = self._toFlatArray(y_predicted)
+        y_true = self._toFlatArray(y_true)
+        if len(y_predicted) != len(y_true):
+            raise Exception(f"Lengths differ (predicted {len(y_predicted)}, truth {len(y_true)})")
+        self._updateProbabilitiesAvailable(y_predictedClassProbabilities is not None)
+        self._addLabels(y_true)
+        self._addLabels(y_predicted)
+        numLabels = len(self._labels)
+        pairIndices = self._labelIndex.get_indexer(y_true) * numLabels + self._labelIndex.get_indexer(y_predicted)
+        self._counts += np.bincount(pairIndices, minlength=numLabels * numLabels).reshape(numLabels, numLabels)
+        if y_predictedClassProbabilities is not None:
+            if len(y_predictedClassProbabilities) != len(y_true):
+                raise ValueError("Row count in class probabilities data frame does not match ground truth")
+            trueClassColumnIndices = y_predictedClassProbabilities.columns.get_indexer(y_true)
+            isKnownClass = trueClassColumnIndices >= 0
+            trueClassProbabilities = np.zeros(len(y_true))
+            trueClassProbabilities[isKnownClass] = \
+                y_predictedClassProbabilities.values[np.nonzero(isKnownClass)[0], trueClassColumnIndices[isKnownClass]]
+            # the 1e-3 below prevents -inf due to single entries with probability 0 (as in the non-streaming metric)
+            self.sumLogTrueClassProbabilities += float(np.sum(np.log(np.maximum(1e-3, trueClassProbabilities))))
+
+    def merge(self, other: "StreamingClassificationEvalStats") -> "StreamingClassificationEvalStats":
+        if other.getNumDataPoints() == 0:
+            return self
+        self._updateProbabilitiesAvailable(other._probabilitiesAvailable)
+        self._addLabels(other._labels)
+        indices = self._labelIndex.get_indexer(other._labels)
+        self._counts[np.ix_(indices, indices)] += other._counts
+        self.sumLogTrueClassProbabilities += other.sumLogTrueClassProbabilities
+        return self
+
+    def getConfusionCounts(self) -> np.ndarray:
+        """
+        :return: the matrix of counts, where rows correspond to true classes and columns to predicted classes (in the order
+            of getLabels)
+        """
+        return self._counts
+
+    def getLabels(self) -> list:
+        return list(self._labels)
+
+    def getConfusionMatrix(self) -> ConfusionMatrix:
+        order = np.argsort(self._labels)
+        return ConfusionMatrix.fromCounts(np.asarray(self._labels)[order], self._counts[np.ix_(order, order)])
+
+    def getAccuracy(self):
+        return self.computeMetricValue(StreamingClassificationMetricAccuracy())
+
+    def getAll(self):
+        """Gets a dictionary with all metrics"""
+        d = {}
+        for metric in self.metrics:
+            if not metric.requiresProbabilities or self._probabilitiesAvailable:
+                d[metric.name] = self.computeMetricValue(metric)
+        return d
+
+
+class StreamingClassificationEvalStatsCollection(StreamingEvalStatsCollection[StreamingClassificationEvalStats]):
+    pass
@@ -6,14 +6,78 @@ from matplotlib import pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 from typing import List, Sequence
 
-from .eval_stats_base import PredictionEvalStats, Metric, EvalStatsCollection, PredictionArray
+from .eval_stats_base import PredictionEvalStats, Metric, EvalStatsCollection, PredictionArray, StreamingEvalStats, \
+    StreamingEvalStatsCollection
+from ...util.math import QuantileSketch
 
 log = logging.getLogger(__name__)
 
 
+class RegressionErrorStatistics:
+    """
+    Provides the quantities on which regression metrics are based (errors, absolute errors, sums of squares, etc.).
+    Each quantity is computed (in a vectorised manner) upon first access only, such that it can be shared by all metrics
+    that require it
+    """
+    def __init__(self, y_true: np.ndarray, y_predicted: np.ndarray):
+        self.y_true = np.asarray(y_true, dtype=np.float64)
+        self.y_predicted = np.asarray(y_predicted, dtype=np.float64)
+        self._errors = None
+        self._absErrors = None
+        self._sumSquaredErrors = None
+        self._trueDeviations = None
+        self._sumSquaredTrueDeviations = None
+
+    def __len__(self):
+        return len(self.y_true)
+
+    @property
+    def errors(self) -> np.ndarray:
+        """The errors (predicted minus true values)"""
+        if self._errors is None:
+            self._errors = self.y_predicted - self.y_true
+        return self._errors
+
+    @property
+    def absErrors(self) -> np.ndarray:
+        if self._absErrors is None:
+            self._absErrors = np.abs(self.errors)
+        return self._absErrors
+
+    @property
+    def sumSquaredErrors(self) -> float:
+        if self._sumSquaredErrors is None:
+            self._sumSquaredErrors = float(np.dot(self.errors, self.errors))
+        return self._sumSquaredErrors
+
+    @property
+    def trueDeviations(self) -> np.ndarray:
+        """The deviations of the true values from their mean"""
+        if self._trueDeviations is None:
+            self._trueDeviations = self.y_true - np.mean(self.y_true)
+        return self._trueDeviations
+
+    @property
+    def sumSquaredTrueDeviations(self) -> float:
+        if self._sumSquaredTrueDeviations is None:
+            self._sumSquaredTrueDeviations = float(np.dot(self.trueDeviations, self.trueDeviations))
+        return self._sumSquaredTrueDeviations
+
+
 class RegressionMetric(Metric["RegressionEvalStats"], ABC):
     def computeValueForEvalStats(self, evalStats: "RegressionEvalStats"):
-        return self.computeValue(np.array(evalStats.y_true), np.array(evalStats.y_predicted))
+        return self.computeValueForErrorStatistics(evalStats.getErrorStatistics())
+
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        """
+        Computes the metric value based on the given error statistics, whose precomputed quantities are shared among metrics.
+        Subclasses should override this method if they can make use of these quantities; the default implementation
+        applies computeValue.
+
+        :param errorStatistics: the error statistics
+        :return: the metric value
+        """
+        return self.computeValue(errorStatistics.y_true, errorStatistics.y_predicted)
 
     @classmethod
     @abstractmethod
@@ -36,6 +100,9 @@ class RegressionMetricMAE(RegressionMetric):
     def computeValue(cls, y_true: np.ndarray, y_predicted: np.ndarray):
         return np.mean(cls.computeAbsErrors(y_true, y_predicted))
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return np.mean(errorStatistics.absErrors)
+
 
 class RegressionMetricMSE(RegressionMetric):
     name = "MSE"
@@ -45,6 +112,9 @@ class RegressionMetricMSE(RegressionMetric):
         residuals = y_predicted - y_true
         return np.sum(residuals * residuals) / len(residuals)
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return errorStatistics.sumSquaredErrors / len(errorStatistics)
+
 
 class RegressionMetricRMSE(RegressionMetric):
     name = "RMSE"
@@ -54,6 +124,9 @@ class RegressionMetricRMSE(RegressionMetric):
         errors = cls.computeErrors(y_true, y_predicted)
         return np.sqrt(np.mean(errors * errors))
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return np.sqrt(errorStatistics.sumSquaredErrors / len(errorStatistics))
+
 
 class RegressionMetricRRSE(RegressionMetric):
     name = "RRSE"
@@ -65,6 +138,9 @@ class RegressionMetricRRSE(RegressionMetric):
         mean_deviation = y_true - mean_y
         return np.sqrt(np.sum(residuals * residuals) / np.sum(mean_deviation * mean_deviation))
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return np.sqrt(errorStatistics.sumSquaredErrors / errorStatistics.sumSquaredTrueDeviations)
+
 
 class RegressionMetricR2(RegressionMetric):
     name = "R2"
@@ -73,6 +149,9 @@ class RegressionMetricR2(RegressionMetric):
         rrse = RegressionMetricRRSE.computeValue(y_true, y_predicted)
         return 1.0 - rrse*rrse
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return 1.0 - errorStatistics.sumSquaredErrors / errorStatistics.sumSquaredTrueDeviations
+
 
 class RegressionMetricPCC(RegressionMetric):
     name = "PCC"
@@ -81,6 +160,12 @@ class RegressionMetricPCC(RegressionMetric):
         cov = np.cov([y_true, y_predicted])
         return cov[0][1] / np.sqrt(cov[0][0] * cov[1][1])
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        predictedDeviations = errorStatistics.y_predicted - np.mean(errorStatistics.y_predicted)
+        trueDeviations = errorStatistics.trueDeviations
+        return np.dot(trueDeviations, predictedDeviations) / \
+            np.sqrt(errorStatistics.sumSquaredTrueDeviations * np.dot(predictedDeviations, predictedDeviations))
+
 
 class RegressionMetricStdDevAE(RegressionMetric):
     name = "StdDevAE"
@@ -89,6 +174,9 @@ class RegressionMetricStdDevAE(RegressionMetric):
     def computeValue(cls, y_true: np.ndarray, y_predicted: np.ndarray):
         return np.std(cls.computeAbsErrors(y_true, y_predicted))
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return np.std(errorStatistics.absErrors)
+
 
 class RegressionMetricMedianAE(RegressionMetric):
     name = "MedianAE"
@@ -97,6 +185,9 @@ class RegressionMetricMedianAE(RegressionMetric):
     def computeValue(cls, y_true: np.ndarray, y_predicted: np.ndarray):
         return np.median(cls.computeAbsErrors(y_true, y_predicted))
 
+    def computeValueForErrorStatistics(self, errorStatistics: RegressionErrorStatistics):
+        return np.median(errorStatistics.absErrors)
+
 
 class RegressionEvalStats(PredictionEvalStats["RegressionMetric"]):
     """
@@ -119,6 +210,17 @@ class RegressionEvalStats(PredictionEvalStats["RegressionMetric"]):
 
         super().__init__(y_predicted, y_true, metrics, additionalMetrics=additionalMetrics)
 
+    def getErrorStatistics(self) -> RegressionErrorStatistics:
+        """
+        :return: the error statistics on which metrics are based (which are cached until further data is added)
+        """
+        intermediates = self._getCachedIntermediates()
+        errorStatistics = intermediates.get("errorStatistics")
+        if errorStatistics is None:
+            errorStatistics = RegressionErrorStatistics(self.y_true, self.y_predicted)
+            intermediates["errorStatistics"] = errorStatistics
+        return errorStatistics
+
     def getMSE(self):
         return self.computeMetricValue(RegressionMetricMSE())
 
@@ -168,7 +270,7 @@ class RegressionEvalStats(PredictionEvalStats["RegressionMetric"]):
 
         :return: the resulting figure object or None
         """
-        errors = np.array(self.y_predicted) - np.array(self.y_true)
+        errors = self.getErrorStatistics().errors
         fig = None
         title = "Prediction Error Distribution"
         if titleAdd is not None:
@@ -194,7 +296,7 @@ class RegressionEvalStats(PredictionEvalStats["RegressionMetric"]):
             title += "\n" + titleAdd
         if figure:
             fig = plt.figure(title.replace("\n", " "))
-        y_range = [min(self.y_true), max(self.y_true)]
+        y_range = [np.min(self.y_true), np.max(self.y_true)]
         plt.scatter(self.y_true, self.y_predicted, **kwargs)
         plt.plot(y_range, y_range, 'k-', lw=2, label="_not in legend", color="r")
         plt.xlabel("ground truth")
@@ -218,7 +320,7 @@ class RegressionEvalStats(PredictionEvalStats["RegressionMetric"]):
             title += "\n" + titleAdd
         if figure:
             fig = plt.figure(title.replace("\n", " "))
-        y_range = [min(min(self.y_true), min(self.y_predicted)), max(max(self.y_true), max(self.y_predicted))]
+        y_range = [min(np.min(self.y_true), np.min(self.y_predicted)), max(np.max(self.y_true), np.max(self.y_predicted))]
         plt.plot(y_range, y_range, 'k-', lw=0.75, label="_not in legend", color="green", zorder=2)
         heatmap, _, _ = np.histogram2d(self.y_true, self.y_predicted, range=[y_range, y_range], bins=bins)
         extent = [y_range[0], y_range[1], y_range[0], y_range[1]]
@@ -246,3 +348,164 @@ class RegressionEvalStatsCollection(EvalStatsCollection):
             y_predicted = np.concatenate([evalStats.y_predicted for evalStats in self.statsList])
             self.globalStats = RegressionEvalStats(y_predicted, y_true)
         return self.globalStats
+
+
+class StreamingRegressionMetric(Metric["StreamingRegressionEvalStats"], ABC):
+    pass
+
+
+class StreamingRegressionMetricMAE(StreamingRegressionMetric):
+    name = RegressionMetricMAE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return evalStats.meanAbsError
+
+
+class StreamingRegressionMetricMSE(StreamingRegressionMetric):
+    name = RegressionMetricMSE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return evalStats.sumSquaredErrors / evalStats.getNumDataPoints()
+
+
+class StreamingRegressionMetricRMSE(StreamingRegressionMetric):
+    name = RegressionMetricRMSE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return np.sqrt(evalStats.sumSquaredErrors / evalStats.getNumDataPoints())
+
+
+class StreamingRegressionMetricRRSE(StreamingRegressionMetric):
+    name = RegressionMetricRRSE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return np.sqrt(evalStats.sumSquaredErrors / evalStats.m2True)
+
+
+class StreamingRegressionMetricR2(StreamingRegressionMetric):
+    name = RegressionMetricR2.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return 1.0 - evalStats.sumSquaredErrors / evalStats.m2True
+
+
+class StreamingRegressionMetricPCC(StreamingRegressionMetric):
+    name = RegressionMetricPCC.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return evalStats.coMoment / np.sqrt(evalStats.m2True * evalStats.m2Predicted)
+
+
+class StreamingRegressionMetricStdDevAE(StreamingRegressionMetric):
+    name = RegressionMetricStdDevAE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return np.sqrt(evalStats.m2AbsError / evalStats.getNumDataPoints())
+
+
+class StreamingRegressionMetricMedianAE(StreamingRegressionMetric):
+    """
+    Approximates the median absolute error (with the relative accuracy of the eval stats' quantile sketch)
+    """
+    name = RegressionMetricMedianAE.name
+
+    def computeValueForEvalStats(self, evalStats: "StreamingRegressionEvalStats"):
+        return evalStats.absErrorSketch.quantile(0.5)
+
+
+class StreamingRegressionEvalStats(StreamingEvalStats[StreamingRegressionMetric]):
+    """
+    Evaluation statistics for regression which maintain mergeable accumulators (moments, co-moments, sums of errors and a
+    quantile sketch of absolute errors) instead of storing the predictions.
+    The metrics have the same names as the ones computed by RegressionEvalStats.
+    """
+    def __init__(self, y_predicted: PredictionArray = None, y_true: PredictionArray = None,
+            metrics: Sequence[StreamingRegressionMetric] = None, additionalMetrics: Sequence[StreamingRegressionMetric] = None,
+            sketchRelativeAccuracy=0.005):
+        """
+        :param y_predicted: an initial batch of predicted values (optional)
+        :param y_true: the true values corresponding to y_predicted
+        :param metrics: the metrics to compute for evaluation; if None, use default metrics
+        :param additionalMetrics: the metrics to additionally compute
+        :param sketchRelativeAccuracy: the relative accuracy of the quantile sketch for absolute errors (used for the median)
+        """
+        if metrics is None:
+            metrics = [StreamingRegressionMetricRRSE(), StreamingRegressionMetricR2(), StreamingRegressionMetricPCC(),
+                       StreamingRegressionMetricMAE(), StreamingRegressionMetricMSE(), StreamingRegressionMetricRMSE(),
+                       StreamingRegressionMetricStdDevAE()]
+        self.numDataPoints = 0
+        self.meanTrue = 0.0
+        self.meanPredicted = 0.0
+        self.m2True = 0.0  # sum of squared deviations of true values from their mean
+        self.m2Predicted = 0.0  # sum of squared deviations of predicted values from their mean
+        self.coMoment = 0.0  # sum of products of deviations of true and predicted values from their means
+        self.meanAbsError = 0.0
+        self.m2AbsError = 0.0
+        self.sumSquaredErrors = 0.0
+        self.absErrorSketch = QuantileSketch(relativeAccuracy=sketchRelativeAccuracy)
+        super().__init__(list(metrics), additionalMetrics=additionalMetrics)
+        if y_predicted is not None:
+            self.update(y_predicted, y_true)
+
+    def getNumDataPoints(self) -> int:
+        return self.numDataPoints
+
+    def _combine(self, n, meanTrue, meanPredicted, m2True, m2Predicted, coMoment, meanAbsError, m2AbsError, sumSquaredErrors):
+        """
+        Combines the accumulated moments with the moments of another set of data points (pairwise update as in Chan et al.)
+        """
+        if n == 0:
+            return
+        n0 = self.numDataPoints
+        total = n0 + n
+        deltaTrue = meanTrue - self.meanTrue
+        deltaPredicted = meanPredicted - self.meanPredicted
+        deltaAbsError = meanAbsError - self.meanAbsError
+        weight = n0 * n / total
+        self.m2True += m2True + deltaTrue * deltaTrue * weight
+        self.m2Predicted += m2Predicted + deltaPredicted * deltaPredicted * weight
+        self.coMoment += coMoment + deltaTrue * deltaPredicted * weight
+        self.m2AbsError += m2AbsError + deltaAbsError * deltaAbsError * weight
+        self.meanTrue += deltaTrue * n / total
+        self.meanPredicted += deltaPredicted * n / total
+        self.meanAbsError += deltaAbsError * n / total
+        self.sumSquaredErrors += sumSquaredErrors
+        self.numDataPoints = total
+
+    def update(self, y_predicted: PredictionArray, y_true: PredictionArray):
+        y_predicted = self._toFlatArray(y_predicted).astype(np.float64)
+        y_true = self._toFlatArray(y_true).astype(np.float64)
+        if len(y_predicted) != len(y_true):
+            raise Exception(f"Lengths differ (predicted {len(y_predicted)}, truth {len(y_true)})")
+        if len(y_true) == 0:
+            return
+        meanTrue = np.mean(y_true)
+        meanPredicted = np.mean(y_predicted)
+        trueDeviations = y_true - meanTrue
+        predictedDeviations = y_predicted - meanPredicted
+        errors = y_predicted - y_true
+        absErrors = np.abs(errors)
+        meanAbsError = np.mean(absErrors)
+        absErrorDeviations = absErrors - meanAbsError
+        self._combine(len(y_true), meanTrue, meanPredicted, np.dot(trueDeviations, trueDeviations),
+            np.dot(predictedDeviations, predictedDeviations), np.dot(trueDeviations, predictedDeviations), meanAbsError,
+            np.dot(absErrorDeviations, absErrorDeviations), np.dot(errors, errors))
+        self.absErrorSketch.update(absErrors)
+
+    def merge(self, other: "StreamingRegressionEvalStats") -> "StreamingRegressionEvalStats":
+        self._combine(other.numDataPoints, other.meanTrue, other.meanPredicted, other.m2True, other.m2Predicted, other.coMoment,
+            other.meanAbsError, other.m2AbsError, other.sumSquaredErrors)
+        self.absErrorSketch.merge(other.absErrorSketch)
+        return self
+
+    def getMAE(self):
+        """Gets the mean absolute error"""
+        return self.computeMetricValue(StreamingRegressionMetricMAE())
+
+    def getMedianAE(self):
+        """Gets the (approximate) median absolute error"""
+        return self.computeMetricValue(StreamingRegressionMetricMedianAE())
+
+
+class StreamingRegressionEvalStatsCollection(StreamingEvalStatsCollection[StreamingRegressionEvalStats]):
+    pass
@@ -1,7 +1,8 @@
 import logging
 import time
 from abc import ABC, abstractmethod
-from typing import Tuple, Dict, Any, Generator, Generic, TypeVar, Sequence, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Dict, Any, Generator, Generic, TypeVar, Sequence, Optional, List, Callable
 
 import pandas as pd
 
@@ -34,17 +35,78 @@ class MetricsDictProvider(TrackingMixin, ABC):
         return valuesDict
 
 
+class PredictionTimings:
+    """
+    Holds the prediction latencies that were measured for the chunks of data to which a model was applied
+    """
+    def __init__(self):
+        self.chunkSizes: List[int] = []
+        self.chunkDurations: List[float] = []
+        self.totalDuration: Optional[float] = None
+
+    def addChunk(self, numRows: int, durationSecs: float):
+        self.chunkSizes.append(numRows)
+        self.chunkDurations.append(durationSecs)
+
+    def setTotalDuration(self, durationSecs: float):
+        """
+        :param durationSecs: the wall-clock time that was required to obtain the predictions for all chunks (which, if chunks are
+            processed in parallel, is lower than the sum of the chunk durations)
+        """
+        self.totalDuration = durationSecs
+
+    def getNumRows(self) -> int:
+        return sum(self.chunkSizes)
+
+    def getThroughput(self) -> float:
+        """
+        :return: the number of rows for which predictions were computed per second (wall-clock time)
+        """
+        if self.totalDuration == 0:
+            return float("inf")
+        return self.getNumRows() / self.totalDuration
+
+    def getDataFrame(self) -> pd.DataFrame:
+        """
+        :return: a data frame with one row per chunk, containing the chunk size, the prediction latency and the throughput
+        """
+        df = pd.DataFrame({"numRows": self.chunkSizes, "durationSecs": self.chunkDurations})
+        df["rowsPerSec"] = df["numRows"] / df["durationSecs"]
+        return df
+
+    def __str__(self):
+        return f"{self.__class__.__name__}[numChunks={len(self.chunkSizes)}, numRows={self.getNumRows()}, " \
+               f"totalDuration={self.totalDuration:.3f}s, throughput={self.getThroughput():.1f} rows/s]"
+
+
+_workerModel = None
+
+
+def _initPredictionWorker(model: PredictorModel):
+    global _workerModel
+    _workerModel = model
+
+
+def _applyWorkerModel(methodName: str, inputs: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    startTime = time.time()
+    result = getattr(_workerModel, methodName)(inputs)
+    return result, time.time() - startTime
+
+
 class PredictorModelEvaluationData(ABC, Generic[TEvalStats]):
-    def __init__(self, statsDict: Dict[str, TEvalStats], inputData: pd.DataFrame, model: PredictorModel):
+    def __init__(self, statsDict: Dict[str, TEvalStats], inputData: pd.DataFrame, model: PredictorModel,
+            predictionTimings: Optional[PredictionTimings] = None):
         """
         :param statsDict: a dictionary mapping from output variable name to the evaluation statistics object
         :param inputData: the input data that was used to produce the results
         :param model: the model that was used to produce predictions
+        :param predictionTimings: the timings that were measured when applying the model to the input data
         """
         self.inputData = inputData
         self.evalStatsByVarName = statsDict
         self.predictedVarNames = list(self.evalStatsByVarName.keys())
         self.modelName = model.getName()
+        self.predictionTimings = predictionTimings
 
     def getEvalStats(self, predictedVarName=None) -> TEvalStats:
         if predictedVarName is None:
@@ -88,7 +150,8 @@ TEvalData = TypeVar("TEvalData", bound=PredictorModelEvaluationData)
 
 class PredictorModelEvaluator(MetricsDictProvider, Generic[TEvalData], ABC):
     def __init__(self, data: InputOutputData, testData: InputOutputData = None, dataSplitter: DataSplitter = None,
-            testFraction: float = None, randomSeed=42, shuffle=True):
+            testFraction: float = None, randomSeed=42, shuffle=True, predictionChunkSize: Optional[int] = None,
+            numPredictionProcesses=1):
         """
         Constructs an evaluator with test and training data.
         Exactly one of the parameters {testData, dataSplitter, testFraction} must be given
@@ -101,6 +164,11 @@ class PredictorModelEvaluator(MetricsDictProvider, Generic[TEvalData], ABC):
         :param randomSeed: [if data is None, dataSplitter is None] the random seed to use for the fractional split of the data
         :param shuffle: [if data is None, dataSplitter is None] whether to randomly (based on randomSeed) shuffle the dataset before
             splitting it
+        :param predictionChunkSize: the number of rows of the evaluation data to which the model is applied at once;
+            if None, apply the model to all rows at once
+        :param numPredictionProcesses: the number of worker processes in which to apply the model to chunks of the evaluation data
+            concurrently (the model is transferred to each worker once); use 1 to apply the model in the current process.
+            Has an effect only if predictionChunkSize is specified
         """
         if (testData, dataSplitter, testFraction).count(None) != 2:
             raise ValueError("Exactly one of {testData, dataSplitter, testFraction} must be given")
@@ -114,6 +182,44 @@ class PredictorModelEvaluator(MetricsDictProvider, Generic[TEvalData], ABC):
         else:
             self.trainingData = data
             self.testData = testData
+        self.predictionChunkSize = predictionChunkSize
+        self.numPredictionProcesses = numPredictionProcesses
+
+    def _iterChunkOutputs(self, model: PredictorModel, methodName: Optional[str], inputs: pd.DataFrame, timings: PredictionTimings,
+            chunkFn: Optional[Callable[[slice], Any]] = None) -> Generator[Tuple[slice, Any], None, None]:
+        """
+        Applies a method of the model to the given inputs in chunks (as configured), yielding the results in order
+
+        :param model: the model to apply
+        :param methodName: the name of the model method to apply to each chunk of inputs (e.g. "predict")
+        :param inputs: the input data frame
+        :param timings: the object in which to record the latency of each chunk
+        :param chunkFn: a function which computes the result for the chunk given by a slice of the rows, which is to be used instead of
+            the model method; if provided, all chunks are processed in the current process
+        :return: a generator of pairs (slice of the chunk's rows, result of the method)
+        """
+        startTime = time.time()
+        numRows = len(inputs)
+        chunkSize = self.predictionChunkSize if self.predictionChunkSize is not None else max(numRows, 1)
+        chunkSlices = [slice(i, min(i + chunkSize, numRows)) for i in range(0, numRows, chunkSize)] or [slice(0, 0)]
+        if self.numPredictionProcesses == 1 or len(chunkSlices) <= 1 or chunkFn is not None:
+            if chunkFn is None:
+                chunkFn = lambda chunkSlice: getattr(model, methodName)(inputs.iloc[chunkSlice])
+            for chunkSlice in chunkSlices:
+                chunkStartTime = time.time()
+                result = chunkFn(chunkSlice)
+                timings.addChunk(chunkSlice.stop - chunkSlice.start, time.time() - chunkStartTime)
+                yield chunkSlice, result
+        else:
+            numProcesses = min(self.numPredictionProcesses, len(chunkSlices))
+            with ProcessPoolExecutor(max_workers=numProcesses, initializer=_initPredictionWorker, initargs=(model,)) as executor:
+                futures = [executor.submit(_applyWorkerModel, methodName, inputs.iloc[chunkSlice]) for chunkSlice in chunkSlices]
+                for chunkSlice, future in zip(chunkSlices, futures):
+                    result, duration = future.result()
+                    timings.addChunk(chunkSlice.stop - chunkSlice.start, duration)
+                    yield chunkSlice, result
+        timings.setTotalDuration(time.time() - startTime)
+        log.info(f"Applied {model.__class__.__name__} to {numRows} rows: {timings}")
 
     def evalModel(self, model: PredictorModel, onTrainingData=False) -> TEvalData:
         """
@@ -145,20 +251,22 @@ class PredictorModelEvaluator(MetricsDictProvider, Generic[TEvalData], ABC):
 
 class VectorRegressionModelEvaluator(PredictorModelEvaluator[RegressionModelEvaluationData]):
     def __init__(self, data: InputOutputData, testData: InputOutputData = None, dataSplitter=None, testFraction=None, randomSeed=42, shuffle=True,
-            additionalMetrics: Sequence[RegressionMetric] = None):
-        super().__init__(data=data, dataSplitter=dataSplitter, testFraction=testFraction, testData=testData, randomSeed=randomSeed, shuffle=shuffle)
+            additionalMetrics: Sequence[RegressionMetric] = None, predictionChunkSize: Optional[int] = None, numPredictionProcesses=1):
+        super().__init__(data=data, dataSplitter=dataSplitter, testFraction=testFraction, testData=testData, randomSeed=randomSeed, shuffle=shuffle,
+            predictionChunkSize=predictionChunkSize, numPredictionProcesses=numPredictionProcesses)
         self.additionalMetrics = additionalMetrics
 
     def _evalModel(self, model: PredictorModel, data: InputOutputData) -> RegressionModelEvaluationData:
         if not model.isRegressionModel():
             raise ValueError(f"Expected a regression model, got {model}")
-        evalStatsByVarName = {}
-        predictions, groundTruth = self._computeOutputs(model, data)
-        for predictedVarName in model.getPredictedVariableNames():
-            evalStats = RegressionEvalStats(y_predicted=predictions[predictedVarName], y_true=groundTruth[predictedVarName],
-                additionalMetrics=self.additionalMetrics)
-            evalStatsByVarName[predictedVarName] = evalStats
-        return RegressionModelEvaluationData(evalStatsByVarName, data.inputs, model)
+        evalStatsByVarName = {predictedVarName: RegressionEvalStats(y_predicted=None, y_true=None, additionalMetrics=self.additionalMetrics)
+            for predictedVarName in model.getPredictedVariableNames()}
+        timings = PredictionTimings()
+        # the predictions for each chunk are fed to the eval stats directly
+        for predictions, groundTruth in self._iterComputeOutputs(model, data, timings):
+            for predictedVarName, evalStats in evalStatsByVarName.items():
+                evalStats.addAll(predictions[predictedVarName], groundTruth[predictedVarName])
+        return RegressionModelEvaluationData(evalStatsByVarName, data.inputs, model, predictionTimings=timings)
 
     def computeTestDataOutputs(self, model: PredictorModel) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -167,11 +275,35 @@ class VectorRegressionModelEvaluator(PredictorModelEvaluator[RegressionModelEval
         :param model: the model to apply
         :return: a pair (predictions, groundTruth)
         """
-        return self._computeOutputs(model, self.testData)
+        chunkOutputs = list(self._iterComputeOutputs(model, self.testData, PredictionTimings()))
+        return pd.concat([predictions for predictions, _ in chunkOutputs]), pd.concat([groundTruth for _, groundTruth in chunkOutputs])
 
-    def _computeOutputs(self, model: PredictorModel, inputOutputData: InputOutputData):
+    def _iterComputeOutputs(self, model: PredictorModel, inputOutputData: InputOutputData, timings: PredictionTimings) \
+            -> Generator[Tuple[pd.DataFrame, pd.DataFrame], None, None]:
         """
-        Applies the given model to the given data
+        Applies the given model to the given data in chunks (as configured), using _computeOutputs for each chunk
+
+        :param model: the model to apply
+        :param inputOutputData: the data set
+        :param timings: the object in which to record the latency of each chunk
+        :return: a generator of pairs (predictions, groundTruth) for the chunks
+        """
+        if type(self)._computeOutputs is VectorRegressionModelEvaluator._computeOutputs:
+            # the model can be applied directly (potentially in worker processes)
+            for chunkSlice, predictions in self._iterChunkOutputs(model, "predict", inputOutputData.inputs, timings):
+                yield predictions, inputOutputData.outputs.iloc[chunkSlice]
+        else:
+            # _computeOutputs is overridden and must thus be applied to each chunk in this process
+            if self.numPredictionProcesses > 1:
+                log.warning(f"{self.__class__.__name__} overrides _computeOutputs; applying the model in the current process only")
+            for _, outputs in self._iterChunkOutputs(model, None, inputOutputData.inputs, timings,
+                    chunkFn=lambda chunkSlice: self._computeOutputs(model, inputOutputData.filterIndices(chunkSlice))):
+                yield outputs
+
+    def _computeOutputs(self, model: PredictorModel, inputOutputData: InputOutputData) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Applies the given model to the given data (which, if chunking is configured, is a single chunk of the evaluation data).
+        Subclasses may override this method in order to customise the computation of outputs.
 
         :param model: the model to apply
         :param inputOutputData: the data set
@@ -188,19 +320,27 @@ class ClassificationModelEvaluationData(PredictorModelEvaluationData[Classificat
 
 class VectorClassificationModelEvaluator(PredictorModelEvaluator[ClassificationModelEvaluationData]):
     def __init__(self, data: InputOutputData, testData: InputOutputData = None, dataSplitter=None, testFraction=None,
-            randomSeed=42, computeProbabilities=False, shuffle=True, additionalMetrics: Sequence[ClassificationMetric] = None):
-        super().__init__(data=data, testData=testData, dataSplitter=dataSplitter, testFraction=testFraction, randomSeed=randomSeed, shuffle=shuffle)
+            randomSeed=42, computeProbabilities=False, shuffle=True, additionalMetrics: Sequence[ClassificationMetric] = None,
+            predictionChunkSize: Optional[int] = None, numPredictionProcesses=1):
+        super().__init__(data=data, testData=testData, dataSplitter=dataSplitter, testFraction=testFraction, randomSeed=randomSeed, shuffle=shuffle,
+            predictionChunkSize=predictionChunkSize, numPredictionProcesses=numPredictionProcesses)
         self.computeProbabilities = computeProbabilities
         self.additionalMetrics = additionalMetrics
 
     def _evalModel(self, model: VectorClassificationModel, data: InputOutputData) -> ClassificationModelEvaluationData:
         if model.isRegressionModel():
             raise ValueError(f"Expected a classification model, got {model}")
-        predictions, predictions_proba, groundTruth = self._computeOutputs(model, data)
-        evalStats = ClassificationEvalStats(y_predictedClassProbabilities=predictions_proba, y_predicted=predictions, y_true=groundTruth,
-            labels=model.getClassLabels(), additionalMetrics=self.additionalMetrics)
+        timings = PredictionTimings()
+        # the predictions for each chunk are fed to the eval stats directly
+        evalStats = None
+        for predictions, predictions_proba, groundTruth in self._iterComputeOutputs(model, data, timings):
+            if evalStats is None:
+                evalStats = ClassificationEvalStats(y_predictedClassProbabilities=predictions_proba, y_predicted=predictions,
+                    y_true=groundTruth, labels=model.getClassLabels(), additionalMetrics=self.additionalMetrics)
+            else:
+                evalStats.addAll(predictions, groundTruth, y_predictedClassProbabilities=predictions_proba)
         predictedVarName = model.getPredictedVariableNames()[0]
-        return ClassificationModelEvaluationData({predictedVarName: evalStats}, data.inputs, model)
+        return ClassificationModelEvaluationData({predictedVarName: evalStats}, data.inputs, model, predictionTimings=timings)
 
     def computeTestDataOutputs(self, model) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
@@ -209,24 +349,58 @@ class VectorClassificationModelEvaluator(PredictorModelEvaluator[ClassificationM
         :param model: the model to apply
         :return: a triple (predictions, predicted class probability vectors, groundTruth) of DataFrames
         """
-        return self._computeOutputs(model, self.testData)
+        chunkOutputs = list(self._iterComputeOutputs(model, self.testData, PredictionTimings()))
+        predictions = pd.concat([predictions for predictions, _, _ in chunkOutputs])
+        classProbabilities = pd.concat([probabilities for _, probabilities, _ in chunkOutputs]) if self.computeProbabilities else None
+        groundTruth = pd.concat([groundTruth for _, _, groundTruth in chunkOutputs])
+        return predictions, classProbabilities, groundTruth
 
-    def _computeOutputs(self, model, inputOutputData: InputOutputData) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    def _iterComputeOutputs(self, model, inputOutputData: InputOutputData, timings: PredictionTimings) \
+            -> Generator[Tuple[pd.DataFrame, Optional[pd.DataFrame], pd.DataFrame], None, None]:
         """
-        Applies the given model to the given data
+        Applies the given model to the given data in chunks (as configured), using _computeOutputs for each chunk
 
         :param model: the model to apply
         :param inputOutputData: the data set
-        :return: a triple (predictions, predicted class probability vectors, groundTruth) of DataFrames
+        :param timings: the object in which to record the latency of each chunk
+        :return: a generator of triples (predictions, predicted class probability vectors, groundTruth) for the chunks
+        """
+        if type(self)._computeOutputs is VectorClassificationModelEvaluator._computeOutputs:
+            # the model can be applied directly (potentially in worker processes)
+            methodName = "predictClassProbabilities" if self.computeProbabilities else "predict"
+            for chunkSlice, outputs in self._iterChunkOutputs(model, methodName, inputOutputData.inputs, timings):
+                yield self._outputsToPredictions(model, outputs) + (inputOutputData.outputs.iloc[chunkSlice],)
+        else:
+            # _computeOutputs is overridden and must thus be applied to each chunk in this process
+            if self.numPredictionProcesses > 1:
+                log.warning(f"{self.__class__.__name__} overrides _computeOutputs; applying the model in the current process only")
+            for _, outputs in self._iterChunkOutputs(model, None, inputOutputData.inputs, timings,
+                    chunkFn=lambda chunkSlice: self._computeOutputs(model, inputOutputData.filterIndices(chunkSlice))):
+                yield outputs
+
+    def _outputsToPredictions(self, model, outputs: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """
+        :param model: the model which produced the outputs
+        :param outputs: the outputs of the model's predictClassProbabilities method (if computeProbabilities is enabled) or
+            predict method
+        :return: a pair (predictions, predicted class probability vectors)
         """
         if self.computeProbabilities:
-            classProbabilities = model.predictClassProbabilities(inputOutputData.inputs)
-            predictions = model.convertClassProbabilitiesToPredictions(classProbabilities)
+            return model.convertClassProbabilitiesToPredictions(outputs), outputs
         else:
-            classProbabilities = None
-            predictions = model.predict(inputOutputData.inputs)
-        groundTruth = inputOutputData.outputs
-        return predictions, classProbabilities, groundTruth
+            return outputs, None
+
+    def _computeOutputs(self, model, inputOutputData: InputOutputData) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Applies the given model to the given data (which, if chunking is configured, is a single chunk of the evaluation data).
+        Subclasses may override this method in order to customise the computation of outputs.
+
+        :param model: the model to apply
+        :param inputOutputData: the data set
+        :return: a triple (predictions, predicted class probability vectors, groundTruth) of DataFrames
+        """
+        outputs = model.predictClassProbabilities(inputOutputData.inputs) if self.computeProbabilities else model.predict(inputOutputData.inputs)
+        return self._outputsToPredictions(model, outputs) + (inputOutputData.outputs,)
 
 
 class RuleBasedClassificationModelEvaluator(VectorClassificationModelEvaluator):
@@ -1,4 +1,4 @@
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 import logging
 import os
@@ -8,10 +8,13 @@ from abc import abstractmethod
 from random import Random
 from typing import Dict, Sequence, Any, Callable, Generator, Union, Tuple, List, Optional, Hashable
 
+from .evaluation.crossval import CrossValidationPruner, VectorModelCrossValidator
 from .evaluation.evaluator import MetricsDictProvider
 from .local_search import SACostValue, SACostValueNumeric, SAOperator, SAState, SimulatedAnnealing, \
     SAProbabilitySchedule, SAProbabilityFunctionLinear
 from .tracking.tracking_base import TrackingMixin
+from .util.cache import SqlitePersistentKeyValueCache
+from .util.hash import pickleHash
 from .vector_model import VectorModel
 
 log = logging.getLogger(__name__)
@@ -108,13 +111,104 @@ class ParameterCombinationEquivalenceClassValueCache(ABC):
         return self._cache.get(self._equivalenceClass(params))
 
 
+class EvaluationResultStore(ABC):
+    """
+    Represents a persistent store of evaluation results (i.e. the dictionaries of metrics and parameters that are computed
+    for a parameter combination), which enables hyper-parameter searches to skip parameter combinations that have
+    already been evaluated, even across runs and processes
+    """
+    @abstractmethod
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves the evaluation result that was previously stored for the given parameter combination
+
+        :param params: the parameter combination
+        :return: the dictionary of stored values or None if no result was stored for the combination
+        """
+        pass
+
+    @abstractmethod
+    def add(self, params: Dict[str, Any], values: Dict[str, Any]):
+        """
+        Stores the evaluation result for the given parameter combination
+
+        :param params: the parameter combination
+        :param values: the dictionary of values (metrics and parameters) to store
+        """
+        pass
+
+
+class SqliteEvaluationResultStore(EvaluationResultStore):
+    """
+    An evaluation result store which is backed by an SQLite database.
+    Results are keyed by the identity of the model factory, a fingerprint of the evaluator/validator (and thus the data
+    it holds) and the parameter combination, such that a single database can safely be shared by different searches.
+    Adding a result requires a single insert (regardless of the number of results already stored), which is committed
+    immediately such that the result becomes visible to other processes.
+    """
+    def __init__(self, path: str, modelFactory: Callable[..., VectorModel], metricsEvaluator: MetricsDictProvider,
+            tableName="evaluation_results", modelFactoryName: Optional[str] = None, evaluatorFingerprint: Optional[str] = None):
+        """
+        :param path: the path of the SQLite database file
+        :param modelFactory: the model factory with which the models are created
+        :param metricsEvaluator: the evaluator/validator with which the models are evaluated
+        :param tableName: the name of the database table in which to store results
+        :param modelFactoryName: the name with which to identify the model factory; if None, use the factory's qualified name.
+            A name should be specified explicitly if the factory is a lambda or a locally defined function, as such
+            factories cannot be distinguished by their names
+        :param evaluatorFingerprint: a string identifying the evaluator and its data; if None, compute a hash of the pickled
+            evaluator (which includes its data). Note that this requires the evaluator, including all of its data, to be pickled
+            whenever a store is created, which can be costly for large datasets; in such cases, consider computing the fingerprint
+            once (see computeEvaluatorFingerprint) or specifying an identifier for the data explicitly
+        """
+        if modelFactoryName is None:
+            modelFactoryName = f"{getattr(modelFactory, '__module__', None)}.{getattr(modelFactory, '__qualname__', modelFactory.__class__.__qualname__)}"
+        if evaluatorFingerprint is None:
+            evaluatorFingerprint = self.computeEvaluatorFingerprint(metricsEvaluator)
+        self.path = path
+        self.modelFactoryName = modelFactoryName
+        self.evaluatorFingerprint = evaluatorFingerprint
+        self._cache = SqlitePersistentKeyValueCache(path, tableName=tableName)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}[path={self.path}, modelFactoryName={self.modelFactoryName}]"
+
+    @staticmethod
+    def computeEvaluatorFingerprint(metricsEvaluator: MetricsDictProvider) -> str:
+        """
+        Computes the fingerprint of an evaluator/validator (which is used as part of the key of stored results if no fingerprint
+        is specified explicitly) by hashing the pickled evaluator, including its data.
+        Since this is costly for large datasets, the result may be computed once and passed to several stores.
+
+        :param metricsEvaluator: the evaluator/validator
+        :return: the fingerprint
+        """
+        trackedExperiment = metricsEvaluator.trackedExperiment
+        metricsEvaluator.unsetTrackedExperiment()
+        try:
+            return pickleHash(metricsEvaluator, withClassName=True)
+        finally:
+            metricsEvaluator.setTrackedExperiment(trackedExperiment)
+
+    def _key(self, params: Dict[str, Any]) -> str:
+        return pickleHash((self.modelFactoryName, self.evaluatorFingerprint, tuple(sorted(params.items()))))
+
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._cache.get(self._key(params))
+
+    def add(self, params: Dict[str, Any], values: Dict[str, Any]):
+        self._cache.set(self._key(params), values)
+        self._cache.commit()
+
+
 class ParametersMetricsCollection:
     """
     Utility class for holding and persisting evaluation results
     """
     def __init__(self, csvPath=None, sortColumnName=None, ascending=True):
         """
-        :param csvPath: path to save the data frame to upon every update
+        :param csvPath: path to save the data frame to upon every update. If no sorting is applied, new rows are
+            appended to the file; otherwise the (sorted) data frame is rewritten in full
         :param sortColumnName: the column name by which to sort the data frame that is collected; if None, do not sort
         :param ascending: whether to sort in ascending order; has an effect only if sortColumnName is not None
         """
@@ -124,6 +218,7 @@ class ParametersMetricsCollection:
         self.df = None
         self.cols = None
         self._currentRow = 0
+        self._isSorted = False
 
     def addValues(self, values: Dict[str, Any]):
         """
@@ -145,13 +240,15 @@ class ParametersMetricsCollection:
                     self.cols.insert(0, self.sortColumnName)
 
             self.df = pd.DataFrame(columns=self.cols)
+            self._isSorted = self.sortColumnName is not None and self.sortColumnName in self.cols
 
         # append data to data frame
-        self.df.loc[self._currentRow] = [values[c] for c in self.cols]
+        # values may lack some of the columns (e.g. the "pruned" column for results that were computed without a pruner)
+        self.df.loc[self._currentRow] = [values.get(c) for c in self.cols]
         self._currentRow += 1
 
         # sort where applicable
-        if self.sortColumnName is not None and self.sortColumnName in self.df.columns:
+        if self._isSorted:
             self.df.sort_values(self.sortColumnName, axis=0, inplace=True, ascending=self.ascending)
             self.df.reset_index(drop=True, inplace=True)
 
@@ -162,12 +259,26 @@ class ParametersMetricsCollection:
             dirname = os.path.dirname(self.csvPath)
             if dirname != "":
                 os.makedirs(dirname, exist_ok=True)
-            self.df.to_csv(self.csvPath, index=False)
+            if self._isSorted:
+                self.df.to_csv(self.csvPath, index=False)
+            else:
+                # the row order is stable, so we only need to append the new row (creating the file for the first row)
+                isFirstRow = self._currentRow == 1
+                self.df.iloc[[-1]].to_csv(self.csvPath, index=False, mode="w" if isFirstRow else "a", header=isFirstRow)
 
     def getDataFrame(self) -> pd.DataFrame:
         return self.df
 
 
+def _checkPrunerSupport(metricsEvaluator: MetricsDictProvider, pruner: Optional[CrossValidationPruner]):
+    """
+    Raises an exception if a pruner is given but the evaluator does not support pruning (which requires a cross-validator)
+    """
+    if pruner is not None and not isinstance(metricsEvaluator, VectorModelCrossValidator):
+        raise ValueError(f"Pruning requires the models to be evaluated with a cross-validator "
+            f"({VectorModelCrossValidator.__name__}), got {metricsEvaluator.__class__.__name__}")
+
+
 class GridSearch(TrackingMixin):
     """
     Instances of this class can be used for evaluating models with different user-provided parametrizations
@@ -176,7 +287,8 @@ class GridSearch(TrackingMixin):
     log = log.getChild(__qualname__)
 
     def __init__(self, modelFactory: Callable[..., VectorModel], parameterOptions: Union[Dict[str, Sequence[Any]], List[Dict[str, Sequence[Any]]]],
-            numProcesses=1, csvResultsPath: str = None, parameterCombinationSkipDecider: ParameterCombinationSkipDecider = None):
+            numProcesses=1, csvResultsPath: str = None, parameterCombinationSkipDecider: ParameterCombinationSkipDecider = None,
+            evaluationResultStore: Optional[EvaluationResultStore] = None, pruner: Optional[CrossValidationPruner] = None):
         """
         :param modelFactory: the function to call with keyword arguments reflecting the parameters to try in order to obtain a model instance
         :param parameterOptions: a dictionary which maps from parameter names to lists of possible values - or a list of such dictionaries,
@@ -185,6 +297,12 @@ class GridSearch(TrackingMixin):
         :param csvResultsPath: the path of a CSV file to which the results shall be written
         :param parameterCombinationSkipDecider: an instance to which parameters combinations can be passed in order to decide whether the
             combination shall be skipped (e.g. because it is redundant/equivalent to another combination or inadmissible)
+        :param evaluationResultStore: a persistent store from which to retrieve the results of parameter combinations that were
+            already evaluated (e.g. in previous runs) and to which newly computed results are added
+        :param pruner: a pruner with which to abort the evaluation of hopeless parameter combinations after some of the folds
+            (requires the search to be run with a cross-validator). The results of pruned combinations are marked via the "pruned" column.
+            When using multiple processes, the pruner can only take into account the results that were available at the time a
+            combination was submitted for evaluation
         """
         self.modelFactory = modelFactory
         if type(parameterOptions) == list:
@@ -198,6 +316,8 @@ class GridSearch(TrackingMixin):
         self.numProcesses = numProcesses
         self.csvResultsPath = csvResultsPath
         self.parameterCombinationSkipDecider = parameterCombinationSkipDecider
+        self.evaluationResultStore = evaluationResultStore
+        self.pruner = pruner
 
         self.numCombinations = 0
         for parameterOptions in self.parameterOptionsList:
@@ -210,7 +330,8 @@ class GridSearch(TrackingMixin):
         self._executor = None
 
     @classmethod
-    def _evalParams(cls, modelFactory, metricsEvaluator: MetricsDictProvider, skipDecider: ParameterCombinationSkipDecider, **params) -> Optional[Dict[str, Any]]:
+    def _evalParams(cls, modelFactory, metricsEvaluator: MetricsDictProvider, skipDecider: ParameterCombinationSkipDecider,
+            pruner: Optional[CrossValidationPruner] = None, **params) -> Optional[Dict[str, Any]]:
         if skipDecider is not None:
             if skipDecider.isSkipped(params):
                 cls.log.info(f"Parameter combination is skipped according to {skipDecider}: {params}")
@@ -218,7 +339,10 @@ class GridSearch(TrackingMixin):
         cls.log.info(f"Evaluating {params}")
         model = modelFactory(**params)
         # TODO or not TODO: for some evaluators additional kwargs can be passed, e.g. onTrainingData
-        values = metricsEvaluator.computeMetrics(model)
+        if pruner is not None:
+            values = metricsEvaluator.computeMetrics(model, pruner=pruner)
+        else:
+            values = metricsEvaluator.computeMetrics(model)
         values["str(model)"] = str(model)
         values.update(**params)
         if skipDecider is not None:
@@ -236,6 +360,7 @@ class GridSearch(TrackingMixin):
         :param ascending: whether to sort in ascending order; has an effect only if sortColumnName is not None
         :return: the data frame with all evaluation results
         """
+        _checkPrunerSupport(metricsEvaluator, self.pruner)
         if self.trackedExperiment is not None:
             loggingCallback = self.trackedExperiment.trackValues
         elif metricsEvaluator.trackedExperiment is not None:
@@ -245,27 +370,74 @@ class GridSearch(TrackingMixin):
         paramsMetricsCollection = ParametersMetricsCollection(csvPath=self.csvResultsPath,
                                                   sortColumnName=sortColumnName, ascending=ascending)
 
-        def collectResult(values):
+        def collectResult(params, values, isStored=False):
             if values is None:
                 return
-            if loggingCallback is not None:
-                loggingCallback(values)
+            if self.pruner is not None:
+                self.pruner.tellMetrics(values)
+            if isStored:
+                if self.parameterCombinationSkipDecider is not None:
+                    self.parameterCombinationSkipDecider.tell(params, values)
+            else:
+                if loggingCallback is not None:
+                    loggingCallback(values)
+                # pruned results are incomplete (and depend on the pruner) and are therefore not stored
+                if self.evaluationResultStore is not None and not values.get("pruned", False):
+                    self.evaluationResultStore.add(params, values)
             paramsMetricsCollection.addValues(values)
             log.info(f"Updated grid search result:\n{paramsMetricsCollection.getDataFrame().to_string()}")
 
+        def getStoredResult(params):
+            if self.evaluationResultStore is None:
+                return None
+            # stored results are subject to the same skip decisions as newly evaluated ones (the decider is informed about
+            # stored results in collectResult), such that a warm run behaves like a cold run
+            if self.parameterCombinationSkipDecider is not None and self.parameterCombinationSkipDecider.isSkipped(params):
+                self.log.info(f"Parameter combination is skipped according to {self.parameterCombinationSkipDecider}: {params}")
+                return None
+            values = self.evaluationResultStore.get(params)
+            if values is not None:
+                self.log.info(f"Result for parameter combination {params} was retrieved from {self.evaluationResultStore}")
+            return values
+
         if self.numProcesses == 1:
             for parameterOptions in self.parameterOptionsList:
                 for paramsDict in iterParamCombinations(parameterOptions):
-                    collectResult(self._evalParams(self.modelFactory, metricsEvaluator, self.parameterCombinationSkipDecider, **paramsDict))
+                    storedValues = getStoredResult(paramsDict)
+                    if storedValues is not None:
+                        collectResult(paramsDict, storedValues, isStored=True)
+                    else:
+                        collectResult(paramsDict, self._evalParams(self.modelFactory, metricsEvaluator, self.parameterCombinationSkipDecider,
+                            self.pruner, **paramsDict))
         else:
             executor = ProcessPoolExecutor(max_workers=self.numProcesses)
-            futures = []
+            pendingParams = {}
+
+            def collectCompletedResults(waitAll=False):
+                if waitAll:
+                    futures = list(pendingParams.keys())
+                else:
+                    done, _ = wait(pendingParams.keys(), return_when=FIRST_COMPLETED)
+                    futures = [f for f in pendingParams if f in done]
+                for future in futures:
+                    collectResult(pendingParams.pop(future), future.result())
+
+            # if a pruner is used, limit the number of pending evaluations, such that the pruner that is passed to the
+            # worker processes can take into account as many results as possible
+            maxPending = self.numProcesses if self.pruner is not None else None
             for parameterOptions in self.parameterOptionsList:
                 for paramsDict in iterParamCombinations(parameterOptions):
-                    futures.append(executor.submit(self._evalParams, self.modelFactory, metricsEvaluator, self.parameterCombinationSkipDecider,
-                                                   **paramsDict))
-            for future in futures:
-                collectResult(future.result())
+                    storedValues = getStoredResult(paramsDict)
+                    if storedValues is not None:
+                        collectResult(paramsDict, storedValues, isStored=True)
+                    else:
+                        if maxPending is not None and len(pendingParams) >= maxPending:
+                            collectCompletedResults()
+                        future = executor.submit(self._evalParams, self.modelFactory, metricsEvaluator, self.parameterCombinationSkipDecider,
+                            self.pruner, **paramsDict)
+                        pendingParams[future] = paramsDict
+            if len(pendingParams) > 0:
+                collectCompletedResults(waitAll=True)
 
         return paramsMetricsCollection.getDataFrame()
 
@@ -290,6 +462,9 @@ class SAHyperOpt(TrackingMixin):
             self.results.update(representation)
 
     class ParameterChangeOperator(SAOperator[State]):
+        # cost delta computations require models to be trained and evaluated, so they should never be repeated for the same state
+        memoiseCostDeltas = True
+
         def __init__(self, state: 'SAHyperOpt.State'):
             super().__init__(state)
 
@@ -317,7 +492,8 @@ class SAHyperOpt(TrackingMixin):
                  metricToOptimise, minimiseMetric=False,
                  collectDataFrame=True, csvResultsPath: Optional[str] = None,
                  parameterCombinationEquivalenceClassValueCache: ParameterCombinationEquivalenceClassValueCache = None,
-                 p0=0.5, p1=0.0):
+                 p0=0.5, p1=0.0, evaluationResultStore: Optional[EvaluationResultStore] = None,
+                 pruner: Optional[CrossValidationPruner] = None):
         """
         :param modelFactory: a factory for the generation of models which is called with the current parameter combination
             (all keyword arguments), initially initialParameters
@@ -336,7 +512,13 @@ class SAHyperOpt(TrackingMixin):
             to the current state's (for the mean observed evaluation delta)
         :param p1: the final probability (at the end of the optimisation) of accepting a state with an inferior evaluation
             to the current state's (for the mean observed evaluation delta)
+        :param evaluationResultStore: a persistent store from which to retrieve the results of parameter combinations that were
+            already evaluated (e.g. in previous runs) and to which newly computed results are added
+        :param pruner: a pruner with which to abort the evaluation of hopeless parameter combinations after some of the folds
+            (requires metricsEvaluator to be a cross-validator). For pruned combinations, the metrics are computed from the evaluated
+            folds only and are marked via the "pruned" entry
         """
+        _checkPrunerSupport(metricsEvaluator, pruner)
         self.minimiseMetric = minimiseMetric
         self.evaluatorOrValidator = metricsEvaluator
         self.metricToOptimise = metricToOptimise
@@ -350,11 +532,14 @@ class SAHyperOpt(TrackingMixin):
         self.parameterCombinationEquivalenceClassValueCache = parameterCombinationEquivalenceClassValueCache
         self.p0 = p0
         self.p1 = p1
+        self.evaluationResultStore = evaluationResultStore
+        self.pruner = pruner
         self._sa = None
 
     @classmethod
     def _evalParams(cls, modelFactory, metricsEvaluator: MetricsDictProvider, parametersMetricsCollection: Optional[ParametersMetricsCollection],
-                    parameterCombinationEquivalenceClassValueCache, trackedExperiment, **params):
+                    parameterCombinationEquivalenceClassValueCache, trackedExperiment, evaluationResultStore: Optional[EvaluationResultStore] = None,
+                    pruner: Optional[CrossValidationPruner] = None, **params):
         if trackedExperiment is not None and metricsEvaluator.trackedExperiment is not None:
             log.warning(f"Tracked experiment already set in evaluator, results will be tracked twice and"
                         f"might get overwritten!")
@@ -364,10 +549,26 @@ class SAHyperOpt(TrackingMixin):
             metrics = parameterCombinationEquivalenceClassValueCache.get(params)
         if metrics is not None:
             cls.log.info(f"Result for parameter combination {params} could be retrieved from cache, not adding new result")
+            return metrics
+
+        storedValues = evaluationResultStore.get(params) if evaluationResultStore is not None else None
+        if storedValues is not None:
+            cls.log.info(f"Result for parameter combination {params} was retrieved from {evaluationResultStore}")
+            metrics = storedValues
+            if pruner is not None:
+                pruner.tellMetrics(storedValues)
+            if parametersMetricsCollection is not None:
+                parametersMetricsCollection.addValues(storedValues)
+            if parameterCombinationEquivalenceClassValueCache is not None:
+                parameterCombinationEquivalenceClassValueCache.set(params, metrics)
         else:
             cls.log.info(f"Evaluating parameter combination {params}")
             model = modelFactory(**params)
-            metrics = metricsEvaluator.computeMetrics(model)
+            if pruner is not None:
+                metrics = metricsEvaluator.computeMetrics(model, pruner=pruner)
+                pruner.tellMetrics(metrics)
+            else:
+                metrics = metricsEvaluator.computeMetrics(model)
             cls.log.info(f"Got metrics {metrics} for {params}")
 
             values = dict(metrics)
@@ -378,13 +579,17 @@ class SAHyperOpt(TrackingMixin):
             if parametersMetricsCollection is not None:
                 parametersMetricsCollection.addValues(values)
                 cls.log.info(f"Data frame with all results:\n\n{parametersMetricsCollection.getDataFrame().to_string()}\n")
+            # pruned results are incomplete (and depend on the pruner) and are therefore not stored
+            if evaluationResultStore is not None and not values.get("pruned", False):
+                evaluationResultStore.add(params, values)
             if parameterCombinationEquivalenceClassValueCache is not None:
                 parameterCombinationEquivalenceClassValueCache.set(params, metrics)
         return metrics
 
     def _computeMetric(self, params):
         metrics = self._evalParams(self.modelFactory, self.evaluatorOrValidator, self.parametersMetricsCollection,
-                                   self.parameterCombinationEquivalenceClassValueCache, self.trackedExperiment, **params)
+                                   self.parameterCombinationEquivalenceClassValueCache, self.trackedExperiment,
+                                   evaluationResultStore=self.evaluationResultStore, pruner=self.pruner, **params)
         metricValue = metrics[self.metricToOptimise]
         if not self.minimiseMetric:
             return -metricValue
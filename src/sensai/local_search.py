@@ -1,15 +1,19 @@
 import collections
 import logging
 import math
+import multiprocessing
 import random
 import time
+import traceback
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple, Callable, Type, Sequence, TypeVar, Generic
+from typing import Optional, Tuple, Callable, Type, Sequence, TypeVar, Generic, Dict, Any, List
 
 import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 
+from .util.hash import pickleHash
+
 log = logging.getLogger(__name__)
 
 
@@ -294,6 +298,8 @@ class SAState(ABC):
     def __init__(self, r: random.Random):
         self.r = r
         self.cost = self.computeCostValue()
+        self.version = 0
+        """the version of the state, which is incremented whenever the state is changed (by an operator or a restoration)"""
 
     @abstractmethod
     def computeCostValue(self) -> SACostValue:
@@ -320,21 +326,63 @@ class SAState(ABC):
         """
         pass
 
+    def restoreStateRepresentation(self, representation):
+        """
+        Changes this state to the state described by the given representation (with the costs being subsequently recomputed),
+        which allows the search to be continued from a previously archived state.
+        Implementing this method is optional; it is required only by search algorithms that restart from archived states.
+
+        :param representation: a representation as returned by getStateRepresentation, which may be shared with other states and
+            therefore must not be modified
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support the restoration of states")
+
 
 TSAState = TypeVar("TSAState", bound=SAState)
 
 
+def _hashableKey(obj):
+    """
+    :param obj: an object
+    :return: a hashable key which represents the given object, converting (nested) dictionaries, lists and sets if necessary
+    :raises TypeError: if the object cannot be represented by a hashable key
+    """
+    try:
+        hash(obj)
+        return obj
+    except TypeError:
+        if isinstance(obj, dict):
+            return tuple(sorted((k, _hashableKey(v)) for k, v in obj.items()))
+        elif isinstance(obj, (list, tuple)):
+            return tuple(_hashableKey(x) for x in obj)
+        elif isinstance(obj, set):
+            return frozenset(_hashableKey(x) for x in obj)
+        raise
+
+
 class SAOperator(Generic[TSAState]):
     """
     An operator which, when applied with appropriately chosen parameters, can transform a state into another
-    state during simulated annealing
+    state during simulated annealing.
+
+    Cost deltas can optionally be memoised (see memoiseCostDeltas), such that, for a given version of the state, the cost delta
+    for a set of parameters is computed at most once. This is useful for operators with expensive cost delta computations,
+    where the same moves are likely to be considered repeatedly (e.g. after having been rejected).
     """
 
+    memoiseCostDeltas = False
+    """whether to memoise the cost deltas computed via getCostDelta (may be overridden by subclasses or instances)"""
+    costDeltaMemoSize = 10000
+    """the maximum number of memoised cost deltas; if it is exceeded, the memo is cleared"""
+
     def __init__(self, state: TSAState):
         """
         :param state: the state to which the operator is applied
         """
         self.state = state
+        self.costDeltaMemoHits = 0
+        self._costDeltaMemo = {}
+        self._costDeltaMemoStateVersion = None
 
     def applyCostChange(self, costDelta: SACostValue):
         """
@@ -365,6 +413,7 @@ class SAOperator(Generic[TSAState]):
         """
         self.applyCostChange(costDelta)
         self.applyStateChange(*params)
+        self.state.version += 1
 
     @abstractmethod
     def costDelta(self, *params) -> SACostValue:
@@ -376,6 +425,31 @@ class SAOperator(Generic[TSAState]):
         """
         pass
 
+    def getCostDelta(self, *params) -> SACostValue:
+        """
+        Gets the cost change that would apply when applying this operator with the given parameters, computing it via costDelta
+        unless it is memoised (see memoiseCostDeltas)
+
+        :param params: the parameters
+        :return: the cost change
+        """
+        if not self.memoiseCostDeltas:
+            return self.costDelta(*params)
+        try:
+            key = _hashableKey(params)
+        except TypeError:
+            return self.costDelta(*params)
+        if self._costDeltaMemoStateVersion != self.state.version or len(self._costDeltaMemo) >= self.costDeltaMemoSize:
+            self._costDeltaMemo = {}
+            self._costDeltaMemoStateVersion = self.state.version
+        costDelta = self._costDeltaMemo.get(key)
+        if costDelta is None:
+            costDelta = self.costDelta(*params)
+            self._costDeltaMemo[key] = costDelta
+        else:
+            self.costDeltaMemoHits += 1
+        return costDelta
+
     @abstractmethod
     def chooseParams(self) -> Optional[Tuple[Tuple, Optional[SACostValue]]]:
         """
@@ -404,17 +478,92 @@ class RelativeFrequencyCounter:
         return f"RelativeFrequencyCounter[{info}]"
 
 
+class _RingBuffer:
+    """A preallocated buffer of float values, which retains the most recently added values (up to its capacity)"""
+    def __init__(self, capacity: int):
+        self._values = np.empty(capacity)
+        self._numAdded = 0
+
+    def append(self, value: float):
+        self._values[self._numAdded % len(self._values)] = value
+        self._numAdded += 1
+
+    def __len__(self):
+        return min(self._numAdded, len(self._values))
+
+    def toArray(self) -> np.ndarray:
+        """
+        :return: the retained values in the order in which they were added
+        """
+        capacity = len(self._values)
+        if self._numAdded <= capacity:
+            return self._values[:self._numAdded].copy()
+        i = self._numAdded % capacity
+        return np.concatenate((self._values[i:], self._values[:i]))
+
+
+class _BudgetTimer:
+    """
+    Provides the time elapsed since construction for a loop of steps, reading the clock only every few steps, where the number of
+    steps between clock readings is adapted such that the clock is read roughly every checkIntervalSecs seconds.
+    Starting with a single step, the number of steps between clock readings is at most doubled with each reading, such that the
+    budget is not exceeded significantly if steps are slow.
+    """
+    def __init__(self, checkIntervalSecs=0.01, maxStepsBetweenChecks=1000):
+        self.checkIntervalSecs = checkIntervalSecs
+        self.maxStepsBetweenChecks = maxStepsBetweenChecks
+        self.startTime = time.time()
+        self._elapsedSecs = 0.0
+        self._stepsBetweenChecks = 1
+        self._stepsUntilCheck = 0
+
+    def elapsed(self) -> float:
+        """
+        Must be called once per step
+
+        :return: the elapsed time (in seconds) as of the most recent clock reading
+        """
+        if self._stepsUntilCheck == 0:
+            elapsedSecs = time.time() - self.startTime
+            secsSinceLastCheck = elapsedSecs - self._elapsedSecs
+            maxStepsBetweenChecks = min(self.maxStepsBetweenChecks, 2 * self._stepsBetweenChecks)
+            if secsSinceLastCheck > 0:
+                self._stepsBetweenChecks = int(self._stepsBetweenChecks * self.checkIntervalSecs / secsSinceLastCheck)
+            else:
+                self._stepsBetweenChecks = maxStepsBetweenChecks
+            self._stepsBetweenChecks = max(1, min(maxStepsBetweenChecks, self._stepsBetweenChecks))
+            self._stepsUntilCheck = self._stepsBetweenChecks
+            self._elapsedSecs = elapsedSecs
+        self._stepsUntilCheck -= 1
+        return self._elapsedSecs
+
+
 class SAChain:
     """Manages the progression of one state during simulated annealing"""
 
     log = log.getChild(__qualname__)
 
+    SERIES_NAMES = ("temperatures", "probabilities", "costDeltas", "bestCostValues", "costValues")
+
     def __init__(self, stateFactory: Callable[[random.Random], SAState], schedule: SATemperatureSchedule,
-            opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]], randomSeed, collectStats=False):
+            opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]], randomSeed, collectStats=False,
+            statsSamplingInterval=1, statsBufferSize=100000, opChoiceBlockSize=1024):
+        """
+        :param stateFactory: the factory with which to create the (initial) state
+        :param schedule: the temperature schedule
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param randomSeed: the random seed to use for all random choices
+        :param collectStats: flag indicating whether to collect additional statistics (series of values, see getSeries)
+        :param statsSamplingInterval: the interval (number of steps) at which to record the values of the series (if collectStats is True)
+        :param statsBufferSize: the maximum number of values to retain for each series (if collectStats is True); only the most recently
+            recorded values are retained
+        :param opChoiceBlockSize: the number of operator choices to make at once (in advance)
+        """
         self.schedule = schedule
         self.r = random.Random(randomSeed)
         self.state = stateFactory(self.r)
         self.collectStats = collectStats
+        self.statsSamplingInterval = statsSamplingInterval
         operators, weights = zip(*opsAndWeights)
         cumWeights, s = [], 0
         for weight in weights:
@@ -422,12 +571,17 @@ class SAChain:
             cumWeights.append(s)
         self.ops = [cons(self.state) for cons in operators]
         self.opCumWeights = cumWeights
+        self.opChoiceBlockSize = opChoiceBlockSize
+        self._opChoices = []
+        self._opChoicesIndex = 0
         self.stepsTaken = 0
         self.countNoneParams = 0
         self.countBestUpdates = -1
+        self.stepsTakenAtLastBestUpdate = 0
         self.bestCost = None
         self.bestStateRepr = None
-        self.loggedSeries = collections.defaultdict(lambda: [])
+        self.loggedSeries = {name: _RingBuffer(statsBufferSize) for name in self.SERIES_NAMES} if collectStats else {}
+        self._isDebugLogEnabled = self.log.isEnabledFor(logging.DEBUG)
         self._updateBestState()
 
         if self.collectStats:
@@ -441,42 +595,68 @@ class SAChain:
             self.bestCost = cost
             self.bestStateRepr = self.state.getStateRepresentation()
             self.countBestUpdates += 1
+            self.stepsTakenAtLastBestUpdate = self.stepsTaken
+
+    def restart(self, representation):
+        """
+        Continues the chain from the state described by the given representation (see SAState.restoreStateRepresentation)
+
+        :param representation: the state representation
+        """
+        self.state.restoreStateRepresentation(representation)
+        self.state.cost = self.state.computeCostValue()
+        self.state.version += 1
+        self._updateBestState()
+
+    def _chooseOperator(self) -> SAOperator:
+        if len(self.ops) == 1:
+            return self.ops[0]
+        # operators are chosen in blocks, because a single call of choices is much faster than many calls with k=1
+        if self._opChoicesIndex == len(self._opChoices):
+            self._opChoices = self.r.choices(self.ops, cum_weights=self.opCumWeights, k=self.opChoiceBlockSize)
+            self._opChoicesIndex = 0
+        op = self._opChoices[self._opChoicesIndex]
+        self._opChoicesIndex += 1
+        return op
 
     def step(self, degreeOfCompletion):
         r = self.r
+        recordStats = self.collectStats and self.stepsTaken % self.statsSamplingInterval == 0
 
         # make move
-        op = r.choices(self.ops, cum_weights=self.opCumWeights, k=1)[0]
+        op = self._chooseOperator()
         paramChoice = op.chooseParams()
         if paramChoice is None:
             self.countNoneParams += 1
         else:
             params, costChange = paramChoice
             if costChange is None:
-                costChange = op.costDelta(*params)
-            if costChange.value() < 0:
+                costChange = op.getCostDelta(*params)
+            costChangeValue = costChange.value()
+            if costChangeValue < 0:
                 makeMove = True
             else:
-                costChangeValue = costChange.value()
                 p, T = self.schedule.probability(degreeOfCompletion, costChangeValue)
                 makeMove = r.random() <= p
-                self.log.debug(f'p: {p}, T: {T}, costDelta: {costChangeValue}, move: {makeMove}')
-                if self.collectStats:
+                if self._isDebugLogEnabled:
+                    self.log.debug(f'p: {p}, T: {T}, costDelta: {costChangeValue}, move: {makeMove}')
+                if recordStats:
                     self.loggedSeries["temperatures"].append(T)
                     self.loggedSeries["probabilities"].append(p)
             if makeMove:
                 op.apply(params, costChange)
                 self._updateBestState()
-            if self.collectStats:
-                self.loggedSeries["costDeltas"].append(costChange.value())
-        if self.collectStats:
+            if recordStats:
+                self.loggedSeries["costDeltas"].append(costChangeValue)
+        if recordStats:
             self.loggedSeries["bestCostValues"].append(self.bestCost.value())
             self.loggedSeries["costValues"].append(self.state.cost.value())
+        if self.collectStats:
             self.operatorInapplicabilityCounters[op].count(paramChoice is None)
 
         self.stepsTaken += 1
 
-        if self.log.isEnabledFor(logging.DEBUG):
+        if self._isDebugLogEnabled:
             self.log.debug(f"Step {self.stepsTaken}: cost={self.state.cost}; best cost={self.bestCost}")
 
     def logStats(self):
@@ -484,13 +664,15 @@ class SAChain:
         if self.collectStats:
             for op, counter in self.operatorInapplicabilityCounters.items():
                 stats[f"useless moves of {op}"] = str(counter)
-            loggedCostDeltas = self.loggedSeries["costDeltas"]
-            if loggedCostDeltas:
+                if op.memoiseCostDeltas:
+                    stats[f"memoised cost deltas used by {op}"] = str(op.costDeltaMemoHits)
+            loggedCostDeltas = self.loggedSeries["costDeltas"].toArray()
+            if len(loggedCostDeltas) > 0:
                 stats["mean cost delta"] = f"{np.mean(loggedCostDeltas):.3f} +- { np.std(loggedCostDeltas):.3f}"
                 absCostDeltas = np.abs(loggedCostDeltas)
                 stats["mean absolute cost delta"] = f"{np.mean(absCostDeltas):.3f} +- {np.std(absCostDeltas):.3f}"
-                positiveCostDeltas = [cd for cd in loggedCostDeltas if cd > 0]
-                if positiveCostDeltas:
+                positiveCostDeltas = loggedCostDeltas[loggedCostDeltas > 0]
+                if len(positiveCostDeltas) > 0:
                     stats["positive cost delta"] = f"mean={np.mean(positiveCostDeltas):.3f} +- {np.std(positiveCostDeltas):.3f}," \
                                                    f" max={np.max(positiveCostDeltas):.3f}"
         statsJoin = "\n    " if self.collectStats else "; "
@@ -513,7 +695,8 @@ class SAChain:
 
     def getSeries(self, seriesName):
         """
-        Gets one of the logged series (for collectStats==True)
+        Gets one of the logged series (for collectStats==True), which contains the values recorded at the sampling interval
+        (up to the buffer size, see constructor)
 
         :param seriesName: name of the series: one of "temperatures", "probabilities", "costDeltas", "bestCostValues", "costValues
         """
@@ -521,24 +704,359 @@ class SAChain:
             raise Exception("No stats were collected")
         if seriesName not in self.loggedSeries:
             raise Exception("Unknown series")
-        return pd.Series(self.loggedSeries[seriesName])
+        return pd.Series(self.loggedSeries[seriesName].toArray())
+
+
+def _stateHash(representation) -> Any:
+    """
+    :param representation: a state representation (as returned by SAState.getStateRepresentation)
+    :return: a hash code for the representation
+    """
+    try:
+        return hash(_hashableKey(representation))
+    except TypeError:
+        return pickleHash(representation)
+
+
+class TabuSearchChain(SAChain):
+    """Manages the progression of one state during tabu search (see TabuSearch)"""
+    log = log.getChild(__qualname__)
+
+    def __init__(self, stateFactory: Callable[[random.Random], SAState], opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]],
+            randomSeed, neighbourhoodSize=20, tabuMemorySize=1000, collectStats=False, statsSamplingInterval=1, statsBufferSize=100000):
+        """
+        :param stateFactory: the factory with which to create the (initial) state
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param randomSeed: the random seed to use for all random choices
+        :param neighbourhoodSize: the number of candidate moves to sample in each step
+        :param tabuMemorySize: the number of recently visited states which are tabu
+        :param collectStats: flag indicating whether to collect additional statistics (series of values, see getSeries)
+        :param statsSamplingInterval: the interval (number of steps) at which to record the values of the series (if collectStats is True)
+        :param statsBufferSize: the maximum number of values to retain for each series (if collectStats is True)
+        """
+        super().__init__(stateFactory, None, opsAndWeights, randomSeed, collectStats=collectStats, statsSamplingInterval=statsSamplingInterval,
+            statsBufferSize=statsBufferSize)
+        self.neighbourhoodSize = neighbourhoodSize
+        self.tabuMemorySize = tabuMemorySize
+        self.countTabuMoves = 0
+        self.countBlockedSteps = 0
+        self._currentStateRepr = self.state.getStateRepresentation()
+        self._tabuStateHashes = collections.OrderedDict()
+        self._addTabuState(_stateHash(self._currentStateRepr))
+
+    def _addTabuState(self, stateHash):
+        self._tabuStateHashes[stateHash] = None
+        self._tabuStateHashes.move_to_end(stateHash)
+        if len(self._tabuStateHashes) > self.tabuMemorySize:
+            self._tabuStateHashes.popitem(last=False)
+
+    def step(self, degreeOfCompletion):
+        recordStats = self.collectStats and self.stepsTaken % self.statsSamplingInterval == 0
+
+        # sample the neighbourhood
+        candidates = []
+        for _ in range(self.neighbourhoodSize):
+            op = self._chooseOperator()
+            paramChoice = op.chooseParams()
+            if self.collectStats:
+                self.operatorInapplicabilityCounters[op].count(paramChoice is None)
+            if paramChoice is None:
+                self.countNoneParams += 1
+                continue
+            params, costChange = paramChoice
+            if costChange is None:
+                costChange = op.getCostDelta(*params)
+            candidates.append((costChange.value(), len(candidates), op, params, costChange))
+        candidates.sort(key=lambda c: c[:2])
+
+        # make the best move which does not lead to a tabu state
+        previousCost = self.state.cost
+        madeMove = False
+        for costChangeValue, _, op, params, costChange in candidates:
+            op.apply(params, costChange)
+            stateRepr = self.state.getStateRepresentation()
+            stateHash = _stateHash(stateRepr)
+            if stateHash in self._tabuStateHashes and not self.state.cost.value() < self.bestCost.value():
+                # revert the move
+                self.countTabuMoves += 1
+                self.state.restoreStateRepresentation(self._currentStateRepr)
+                self.state.cost = previousCost
+                self.state.version += 1
+                continue
+            self._addTabuState(stateHash)
+            self._currentStateRepr = stateRepr
+            self._updateBestState()
+            madeMove = True
+            if recordStats:
+                self.loggedSeries["costDeltas"].append(costChangeValue)
+            break
+        if not madeMove:
+            self.countBlockedSteps += 1
+
+        if recordStats:
+            self.loggedSeries["bestCostValues"].append(self.bestCost.value())
+            self.loggedSeries["costValues"].append(self.state.cost.value())
+        self.stepsTaken += 1
+
+        if self._isDebugLogEnabled:
+            self.log.debug(f"Step {self.stepsTaken}: cost={self.state.cost}; best cost={self.bestCost}")
+
+    def logStats(self):
+        self.log.info(f"Tabu moves: {self.countTabuMoves}; steps without a move: {self.countBlockedSteps}/{self.stepsTaken}")
+        super().logStats()
 
 
-class SimulatedAnnealing:
+class LateAcceptanceChain(SAChain):
+    """Manages the progression of one state during late acceptance hill climbing (see LateAcceptanceHillClimbing)"""
     log = log.getChild(__qualname__)
 
+    def __init__(self, stateFactory: Callable[[random.Random], SAState], opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]],
+            randomSeed, historyLength=100, collectStats=False, statsSamplingInterval=1, statsBufferSize=100000):
+        """
+        :param stateFactory: the factory with which to create the (initial) state
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param randomSeed: the random seed to use for all random choices
+        :param historyLength: the number of steps after which costs are considered for acceptance
+        :param collectStats: flag indicating whether to collect additional statistics (series of values, see getSeries)
+        :param statsSamplingInterval: the interval (number of steps) at which to record the values of the series (if collectStats is True)
+        :param statsBufferSize: the maximum number of values to retain for each series (if collectStats is True)
+        """
+        super().__init__(stateFactory, None, opsAndWeights, randomSeed, collectStats=collectStats, statsSamplingInterval=statsSamplingInterval,
+            statsBufferSize=statsBufferSize)
+        self.costHistory = [self.state.cost.value()] * historyLength
+
+    def step(self, degreeOfCompletion):
+        recordStats = self.collectStats and self.stepsTaken % self.statsSamplingInterval == 0
+        historyIndex = self.stepsTaken % len(self.costHistory)
+
+        op = self._chooseOperator()
+        paramChoice = op.chooseParams()
+        if paramChoice is None:
+            self.countNoneParams += 1
+        else:
+            params, costChange = paramChoice
+            if costChange is None:
+                costChange = op.getCostDelta(*params)
+            costChangeValue = costChange.value()
+            newCostValue = self.state.cost.value() + costChangeValue
+            if costChangeValue <= 0 or newCostValue <= self.costHistory[historyIndex]:
+                op.apply(params, costChange)
+                self._updateBestState()
+            if recordStats:
+                self.loggedSeries["costDeltas"].append(costChangeValue)
+        costValue = self.state.cost.value()
+        if costValue < self.costHistory[historyIndex]:
+            self.costHistory[historyIndex] = costValue
+        if recordStats:
+            self.loggedSeries["bestCostValues"].append(self.bestCost.value())
+            self.loggedSeries["costValues"].append(self.state.cost.value())
+        if self.collectStats:
+            self.operatorInapplicabilityCounters[op].count(paramChoice is None)
+        self.stepsTaken += 1
+
+        if self._isDebugLogEnabled:
+            self.log.debug(f"Step {self.stepsTaken}: cost={self.state.cost}; best cost={self.bestCost}")
+
+
+class _SAChainReport:
+    """The report on a chain's progress which is returned by _SAChainGroup.run"""
+    def __init__(self, chain: SAChain, newBestStateRepr):
+        self.cost = chain.state.cost.value()
+        self.schedule = chain.schedule
+        self.bestCost = chain.bestCost.value()
+        self.newBestStateRepr = newBestStateRepr
+        self.numStepsWithoutImprovement = chain.stepsTaken - chain.stepsTakenAtLastBestUpdate
+
+
+def _blockDegreesOfCompletion(step: int, numSteps: int, timeElapsed: float, maxSteps: Optional[int], duration: Optional[float]) \
+        -> Tuple[float, float]:
     """
-    The simulated annealing algorithm for discrete optimisation (cost minimisation)
+    Determines the degrees of completion for a block of steps
+
+    :param step: the number of steps taken before the block
+    :param numSteps: the number of steps in the block
+    :param timeElapsed: the time elapsed before the block (in seconds)
+    :param maxSteps: the maximum number of steps (if the budget is given in steps)
+    :param duration: the duration (in seconds, if the budget is given as a duration)
+    :return: a pair (start, end) with the degree of completion at the first step of the block and after its last step, where the
+        latter is estimated based on the time taken per step so far if the budget is given as a duration
     """
-    def __init__(self, scheduleFactory: Callable[[], SATemperatureSchedule], opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]],
-            maxSteps: int = None, duration: float = None, randomSeed=42, collectStats=False):
+    if maxSteps is not None:
+        return step / maxSteps, (step + numSteps) / maxSteps
+    start = timeElapsed / duration
+    if step == 0:
+        return start, start
+    return start, min(1.0, (timeElapsed + numSteps * timeElapsed / step) / duration)
+
+
+class _SAChainGroup:
+    """A group of chains which are advanced together in blocks of steps (in the process in which the group is created)"""
+    def __init__(self, stateFactory: Callable[[random.Random], SAState], opsAndWeights, seeds: Sequence[int],
+            schedules: Sequence[SATemperatureSchedule]):
+        self.chains = [SAChain(stateFactory, schedule, opsAndWeights=opsAndWeights, randomSeed=seed) for schedule, seed in zip(schedules, seeds)]
+        self._reportedBestCosts = [None] * len(self.chains)
+
+    def run(self, startDegreeOfCompletion: float, endDegreeOfCompletion: float, numSteps: int,
+            schedules: Optional[Sequence[SATemperatureSchedule]] = None,
+            restartRepresentations: Optional[Dict[int, Any]] = None) -> List[_SAChainReport]:
+        """
+        :param startDegreeOfCompletion: the degree of completion at the first step
+        :param endDegreeOfCompletion: the degree of completion after the last step; the degree of completion of each step is linearly
+            interpolated between the start and end degrees
+        :param numSteps: the number of steps to take in each chain
+        :param schedules: if not None, the schedules to use for the chains (which are changed accordingly)
+        :param restartRepresentations: if not None, a mapping from chain indices to the state representations with which to restart the
+            respective chains prior to taking steps
+        :return: the reports on the chains' progress; the representation of a chain's best state is contained only if it improved since
+            the last report
+        """
+        if schedules is not None:
+            for chain, schedule in zip(self.chains, schedules):
+                chain.schedule = schedule
+        if restartRepresentations is not None:
+            for i, representation in restartRepresentations.items():
+                self.chains[i].restart(representation)
+        reports = []
+        for i, chain in enumerate(self.chains):
+            for k in range(numSteps):
+                chain.step(startDegreeOfCompletion + (endDegreeOfCompletion - startDegreeOfCompletion) * k / numSteps)
+            isImproved = self._reportedBestCosts[i] is None or chain.bestCost.value() < self._reportedBestCosts[i]
+            self._reportedBestCosts[i] = chain.bestCost.value()
+            reports.append(_SAChainReport(chain, chain.bestStateRepr if isImproved else None))
+        return reports
+
+    def finish(self) -> Tuple[float, Any, List[Dict[str, Any]]]:
+        """
+        :return: a triple (bestCost, bestStateRepr, chainStats) with the best cost value and state representation of all chains
+            and a list of dictionaries with summary statistics for each chain
+        """
+        bestChain = min(self.chains, key=lambda c: c.bestCost.value())
+        chainStats = [dict(stepsTaken=chain.stepsTaken, countNoneParams=chain.countNoneParams, countBestUpdates=chain.countBestUpdates,
+            bestCost=chain.bestCost.value()) for chain in self.chains]
+        return bestChain.bestCost.value(), bestChain.bestStateRepr, chainStats
+
+
+class _SAChainGroupWorkerError:
+    def __init__(self, traceback: str):
+        self.traceback = traceback
+
+
+def _runSAChainGroupWorker(conn, *groupArgs):
+    """
+    Manages a _SAChainGroup in a worker process: Upon receiving a tuple of arguments, the group's run method is called with them and the
+    result is sent back; upon receiving None, the result of the group's finish method is sent back and the worker terminates.
+    """
+    try:
+        group = _SAChainGroup(*groupArgs)
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            conn.send(group.run(*message))
+        conn.send(group.finish())
+    except:
+        conn.send(_SAChainGroupWorkerError(traceback.format_exc()))
+
+
+class _SAChainGroups:
+    """
+    Manages a set of chains, which are distributed among groups that are advanced either in the current process (for a single group)
+    or in worker processes (one per group), which run concurrently.
+    Must be used as a context manager (in order for worker processes to be terminated).
+    """
+    def __init__(self, numGroups: int, stateFactory: Callable[[random.Random], SAState], opsAndWeights, seeds: Sequence[int],
+            schedules: Sequence[SATemperatureSchedule]):
+        self.numChains = len(seeds)
+        self._chainIndicesPerGroup = [list(range(i, self.numChains, numGroups)) for i in range(numGroups)]
+        self._localGroup = None
+        self._workers = []
+        if numGroups == 1:
+            self._localGroup = _SAChainGroup(stateFactory, opsAndWeights, seeds, schedules)
+        else:
+            for chainIndices in self._chainIndicesPerGroup:
+                conn, workerConn = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_runSAChainGroupWorker, daemon=True,
+                    args=(workerConn, stateFactory, opsAndWeights, [seeds[i] for i in chainIndices], [schedules[i] for i in chainIndices]))
+                process.start()
+                self._workers.append((process, conn))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for process, conn in self._workers:
+            conn.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+
+    @staticmethod
+    def _receive(conn):
+        result = conn.recv()
+        if isinstance(result, _SAChainGroupWorkerError):
+            raise Exception(f"Worker process failed:\n{result.traceback}")
+        return result
+
+    def _call(self, messages: List[Optional[tuple]]) -> list:
+        if self._localGroup is not None:
+            message = messages[0]
+            return [self._localGroup.run(*message) if message is not None else self._localGroup.finish()]
+        for (_, conn), message in zip(self._workers, messages):
+            conn.send(message)
+        return [self._receive(conn) for _, conn in self._workers]
+
+    def run(self, startDegreeOfCompletion: float, endDegreeOfCompletion: float, numSteps: int,
+            schedules: Optional[Sequence[SATemperatureSchedule]] = None,
+            restartRepresentations: Optional[Dict[int, Any]] = None) -> List[_SAChainReport]:
+        """
+        Advances all chains (see _SAChainGroup.run, where chain indices refer to the full set of chains)
+
+        :return: the reports for all chains
+        """
+        messages = []
+        for chainIndices in self._chainIndicesPerGroup:
+            groupSchedules = [schedules[i] for i in chainIndices] if schedules is not None else None
+            groupRestarts = None
+            if restartRepresentations:
+                groupRestarts = {j: restartRepresentations[i] for j, i in enumerate(chainIndices) if i in restartRepresentations}
+            messages.append((startDegreeOfCompletion, endDegreeOfCompletion, numSteps, groupSchedules, groupRestarts))
+        reports = [None] * self.numChains
+        for chainIndices, groupReports in zip(self._chainIndicesPerGroup, self._call(messages)):
+            for i, report in zip(chainIndices, groupReports):
+                reports[i] = report
+        return reports
+
+    def finish(self) -> Tuple[float, Any, List[Dict[str, Any]]]:
+        """
+        :return: a triple (bestCost, bestStateRepr, chainStats) as in _SAChainGroup.finish, but for all chains
+        """
+        bestCost, bestStateRepr = None, None
+        chainStats = [None] * self.numChains
+        for chainIndices, (cost, stateRepr, groupChainStats) in zip(self._chainIndicesPerGroup, self._call([None] * len(self._chainIndicesPerGroup))):
+            if bestCost is None or cost < bestCost:
+                bestCost, bestStateRepr = cost, stateRepr
+            for i, stats in zip(chainIndices, groupChainStats):
+                chainStats[i] = stats
+        return bestCost, bestStateRepr, chainStats
+
+
+class LocalSearch(ABC):
+    """
+    Base class for local search algorithms for discrete optimisation (cost minimisation), which progress a single chain
+    (see SAChain) for a given number of steps or a given duration
+    """
+    log = log.getChild(__qualname__)
+
+    def __init__(self, opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]], maxSteps: int = None, duration: float = None,
+            randomSeed=42, collectStats=False, statsSamplingInterval=1):
         """
-        :param scheduleFactory: a factory for the creation of the temperature schedule for the annealing process
         :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
         :param maxSteps: the number of steps for which to run the optimisation; may be None (if not given, duration must be provided)
         :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
         :param randomSeed: the random seed to use for all random choices
         :param collectStats: flag indicating whether to collect additional statics which will be logged
+        :param statsSamplingInterval: the interval (number of steps) at which to record the series of values (if collectStats is True)
         """
         if maxSteps is not None and maxSteps <= 0:
             raise ValueError("The number of iterations should be greater than 0.")
@@ -546,35 +1064,41 @@ class SimulatedAnnealing:
             raise ValueError("Exactly one of {maxSteps, duration} must be specified.")
         if duration is not None and duration <= 0:
             raise ValueError("Duration must be greater than 0 if provided")
-        self.scheduleFactory = scheduleFactory
         self.maxSteps = maxSteps
         self.duration = duration
         self.randomSeed = randomSeed
         self.opsAndWeights = opsAndWeights
         self.collectStats = collectStats
+        self.statsSamplingInterval = statsSamplingInterval
         self._chain = None
 
+    @abstractmethod
+    def _createChain(self, stateFactory: Callable[[random.Random], SAState]) -> "SAChain":
+        pass
+
     def optimise(self, stateFactory: Callable[[random.Random], SAState]):
         """
-        Applies the annealing process starting with a state created via the given factory.
+        Applies the search process starting with a state created via the given factory.
         The result of the optimisation (i.e. the final best state representation) is written via the state's
         applyStateRepresentation method, which should write to an object the state receives at construction.
 
         :param stateFactory: the factory with which to create the (initial) state
         """
-        chain = SAChain(stateFactory, self.scheduleFactory(), opsAndWeights=self.opsAndWeights, randomSeed=self.randomSeed, collectStats=self.collectStats)
-        self.log.info(f"Running simulated annealing with {len(self.opsAndWeights)} operators for {'%d steps' % self.maxSteps if self.maxSteps is not None else '%d seconds' % self.duration} ...")
+        chain = self._createChain(stateFactory)
+        self.log.info(f"Running {self.__class__.__name__} with {len(self.opsAndWeights)} operators for {'%d steps' % self.maxSteps if self.maxSteps is not None else '%d seconds' % self.duration} ...")
         startTime = time.time()
-        while True:
-            timeElapsed = time.time() - startTime
-            if (self.maxSteps is not None and chain.stepsTaken >= self.maxSteps) or (self.duration is not None and timeElapsed >= self.duration):
-                break
-            if self.maxSteps is not None:
-                degreeOfCompletion = chain.stepsTaken / self.maxSteps
-            else:
-                degreeOfCompletion = timeElapsed / self.duration
-            chain.step(degreeOfCompletion)
-        self.log.info(f"Simulated annealing completed after {time.time() - startTime:.1f} seconds, {chain.stepsTaken} steps")
+        if self.maxSteps is not None:
+            for stepIndex in range(self.maxSteps):
+                chain.step(stepIndex / self.maxSteps)
+        else:
+            timer = _BudgetTimer()
+            while True:
+                timeElapsed = timer.elapsed()
+                if timeElapsed >= self.duration:
+                    break
+                chain.step(timeElapsed / self.duration)
+        timeElapsed = time.time() - startTime
+        self.log.info(f"{self.__class__.__name__} completed after {timeElapsed:.1f} seconds, {chain.stepsTaken} steps ({chain.stepsTaken / timeElapsed:.0f} steps/s)")
         chain.logStats()
         chain.applyBestState()
         if self.collectStats:
@@ -589,6 +1113,198 @@ class SimulatedAnnealing:
         return self._chain
 
 
+class SimulatedAnnealing(LocalSearch):
+    """
+    The simulated annealing algorithm for discrete optimisation (cost minimisation)
+    """
+    log = log.getChild(__qualname__)
+
+    def __init__(self, scheduleFactory: Callable[[], SATemperatureSchedule], opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]],
+            maxSteps: int = None, duration: float = None, randomSeed=42, collectStats=False, statsSamplingInterval=1):
+        """
+        :param scheduleFactory: a factory for the creation of the temperature schedule for the annealing process
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param maxSteps: the number of steps for which to run the optimisation; may be None (if not given, duration must be provided)
+        :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
+        :param randomSeed: the random seed to use for all random choices
+        :param collectStats: flag indicating whether to collect additional statics which will be logged
+        :param statsSamplingInterval: the interval (number of steps) at which to record the series of values (if collectStats is True)
+        """
+        super().__init__(opsAndWeights, maxSteps=maxSteps, duration=duration, randomSeed=randomSeed, collectStats=collectStats,
+            statsSamplingInterval=statsSamplingInterval)
+        self.scheduleFactory = scheduleFactory
+
+    def _createChain(self, stateFactory: Callable[[random.Random], SAState]) -> SAChain:
+        return SAChain(stateFactory, self.scheduleFactory(), opsAndWeights=self.opsAndWeights, randomSeed=self.randomSeed, collectStats=self.collectStats,
+            statsSamplingInterval=self.statsSamplingInterval)
+
+
+class TabuSearch(LocalSearch):
+    """
+    Tabu search for discrete optimisation (cost minimisation): In each step, a neighbourhood of candidate moves is sampled (using the operators'
+    parameter choices) and the best move which does not lead to a tabu state is made, even if it does not improve the costs (best-improvement
+    strategy). Recently visited states are tabu, unless they improve upon the best state found so far (aspiration criterion).
+    Requires the states to support SAState.restoreStateRepresentation (in order to revert moves that lead to tabu states).
+    """
+    log = log.getChild(__qualname__)
+
+    def __init__(self, opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]], neighbourhoodSize=20, tabuMemorySize=1000,
+            maxSteps: int = None, duration: float = None, randomSeed=42, collectStats=False, statsSamplingInterval=1):
+        """
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param neighbourhoodSize: the number of candidate moves to sample in each step
+        :param tabuMemorySize: the number of recently visited states which are tabu
+        :param maxSteps: the number of steps for which to run the optimisation; may be None (if not given, duration must be provided)
+        :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
+        :param randomSeed: the random seed to use for all random choices
+        :param collectStats: flag indicating whether to collect additional statics which will be logged
+        :param statsSamplingInterval: the interval (number of steps) at which to record the series of values (if collectStats is True)
+        """
+        super().__init__(opsAndWeights, maxSteps=maxSteps, duration=duration, randomSeed=randomSeed, collectStats=collectStats,
+            statsSamplingInterval=statsSamplingInterval)
+        self.neighbourhoodSize = neighbourhoodSize
+        self.tabuMemorySize = tabuMemorySize
+
+    def _createChain(self, stateFactory: Callable[[random.Random], SAState]) -> "TabuSearchChain":
+        chain = TabuSearchChain(stateFactory, opsAndWeights=self.opsAndWeights, randomSeed=self.randomSeed, neighbourhoodSize=self.neighbourhoodSize,
+            tabuMemorySize=self.tabuMemorySize, collectStats=self.collectStats, statsSamplingInterval=self.statsSamplingInterval)
+        if type(chain.state).restoreStateRepresentation is SAState.restoreStateRepresentation:
+            raise ValueError(f"{self.__class__.__name__} requires the states to support restoreStateRepresentation, which "
+                f"{chain.state.__class__.__name__} does not implement")
+        return chain
+
+
+class LateAcceptanceHillClimbing(LocalSearch):
+    """
+    Late acceptance hill climbing for discrete optimisation (cost minimisation) as proposed by E. Burke and Y. Bykov:
+    A move is accepted if the resulting costs are not worse than the current costs or the costs recorded in a history a given number of steps
+    earlier (where a history entry is only replaced if the current costs are lower).
+    """
+    log = log.getChild(__qualname__)
+
+    def __init__(self, opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]], historyLength=100,
+            maxSteps: int = None, duration: float = None, randomSeed=42, collectStats=False, statsSamplingInterval=1):
+        """
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param historyLength: the number of steps after which costs are considered for acceptance; the larger the value, the more
+            deteriorations are accepted
+        :param maxSteps: the number of steps for which to run the optimisation; may be None (if not given, duration must be provided)
+        :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
+        :param randomSeed: the random seed to use for all random choices
+        :param collectStats: flag indicating whether to collect additional statics which will be logged
+        :param statsSamplingInterval: the interval (number of steps) at which to record the series of values (if collectStats is True)
+        """
+        super().__init__(opsAndWeights, maxSteps=maxSteps, duration=duration, randomSeed=randomSeed, collectStats=collectStats,
+            statsSamplingInterval=statsSamplingInterval)
+        self.historyLength = historyLength
+
+    def _createChain(self, stateFactory: Callable[[random.Random], SAState]) -> "LateAcceptanceChain":
+        return LateAcceptanceChain(stateFactory, opsAndWeights=self.opsAndWeights, randomSeed=self.randomSeed, historyLength=self.historyLength,
+            collectStats=self.collectStats, statsSamplingInterval=self.statsSamplingInterval)
+
+
+class MultiStartSimulatedAnnealing:
+    log = log.getChild(__qualname__)
+
+    """
+    Simulated annealing with multiple independent chains (each starting from a differently seeded initial state), which can be run
+    in parallel processes, where the overall result is the best state found by any of the chains.
+    Optionally, chains that stagnate (i.e. that did not improve their best state for a given number of steps) are restarted from the
+    globally best state, which requires the states to support SAState.restoreStateRepresentation.
+    """
+    def __init__(self, scheduleFactory: Callable[[], SATemperatureSchedule], opsAndWeights: Sequence[Tuple[Callable[[SAState], SAOperator], float]],
+            numStarts: int, maxSteps: int = None, duration: float = None, randomSeed=42, numProcesses=1, stepsPerSync=1000,
+            restartAfterStagnantSteps: Optional[int] = None):
+        """
+        :param scheduleFactory: a factory for the creation of the temperature schedule for the annealing process (one per chain)
+        :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
+        :param numStarts: the number of independent chains
+        :param maxSteps: the number of steps for which to run each chain; may be None (if not given, duration must be provided)
+        :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
+        :param randomSeed: the random seed from which the seeds of the chains are derived
+        :param numProcesses: the number of processes among which to distribute the chains; if 1, run all chains in the current process.
+            If multiple processes are used, the state factory, the operators and the state representations must be picklable.
+        :param stepsPerSync: the number of steps each chain takes between synchronisation points, at which the time budget is checked,
+            the globally best state is determined and stagnating chains are restarted
+        :param restartAfterStagnantSteps: if not None, the number of steps without an improvement of a chain's best state after which the chain
+            is restarted from the globally best state (at the next synchronisation point)
+        """
+        if maxSteps is not None and maxSteps <= 0:
+            raise ValueError("The number of iterations should be greater than 0.")
+        if maxSteps is None and duration is None or (maxSteps is not None and duration is not None):
+            raise ValueError("Exactly one of {maxSteps, duration} must be specified.")
+        if duration is not None and duration <= 0:
+            raise ValueError("Duration must be greater than 0 if provided")
+        if numStarts < 1 or numProcesses < 1 or stepsPerSync < 1:
+            raise ValueError("The number of starts, the number of processes and the number of steps per synchronisation must be at least 1")
+        self.scheduleFactory = scheduleFactory
+        self.opsAndWeights = opsAndWeights
+        self.numStarts = numStarts
+        self.maxSteps = maxSteps
+        self.duration = duration
+        self.randomSeed = randomSeed
+        self.numProcesses = min(numProcesses, numStarts)
+        self.stepsPerSync = stepsPerSync
+        self.restartAfterStagnantSteps = restartAfterStagnantSteps
+
+    def optimise(self, stateFactory: Callable[[random.Random], SAState]):
+        """
+        Applies the annealing processes, creating the initial state of each chain via the given factory.
+        The result of the optimisation (i.e. the best state representation found by any chain) is written via the
+        applyStateRepresentation method of a state created via the given factory.
+
+        :param stateFactory: the factory with which to create the (initial) states
+        """
+        self.log.info(f"Running simulated annealing with {self.numStarts} starts in {self.numProcesses} processes, {len(self.opsAndWeights)} operators "
+            f"for {'%d steps' % self.maxSteps if self.maxSteps is not None else '%d seconds' % self.duration} ...")
+        r = random.Random(self.randomSeed)
+        seeds = [r.randint(0, 1000) for _ in range(self.numStarts)]
+        schedules = [self.scheduleFactory() for _ in range(self.numStarts)]
+        numRestarts = 0
+        with _SAChainGroups(self.numProcesses, stateFactory, self.opsAndWeights, seeds, schedules) as groups:
+            startTime = time.time()
+            step = 0
+            bestCost, bestStateRepr = None, None
+            restartRepresentations = None
+            while True:
+                timeElapsed = time.time() - startTime
+                if (self.maxSteps is not None and step >= self.maxSteps) or (self.duration is not None and timeElapsed >= self.duration):
+                    break
+                numSteps = self.stepsPerSync if self.maxSteps is None else min(self.stepsPerSync, self.maxSteps - step)
+                startDegree, endDegree = _blockDegreesOfCompletion(step, numSteps, timeElapsed, self.maxSteps, self.duration)
+                reports = groups.run(startDegree, endDegree, numSteps, restartRepresentations=restartRepresentations)
+                step += numSteps
+
+                # update the globally best state
+                for report in reports:
+                    if report.newBestStateRepr is not None and (bestCost is None or report.bestCost < bestCost):
+                        bestCost, bestStateRepr = report.bestCost, report.newBestStateRepr
+
+                # determine the chains to restart from the globally best state
+                restartRepresentations = None
+                if self.restartAfterStagnantSteps is not None:
+                    restartRepresentations = {i: bestStateRepr for i, report in enumerate(reports)
+                        if report.numStepsWithoutImprovement >= self.restartAfterStagnantSteps and report.bestCost > bestCost}
+                    numRestarts += len(restartRepresentations)
+
+            _, _, chainStats = groups.finish()
+
+        timeElapsed = time.time() - startTime
+        totalSteps = sum(stats["stepsTaken"] for stats in chainStats)
+        self.log.info(f"Simulated annealing completed after {timeElapsed:.1f} seconds, {totalSteps} steps in total ({totalSteps / timeElapsed:.0f} steps/s)")
+        self.logStats(chainStats, numRestarts)
+        stateFactory(r).applyStateRepresentation(bestStateRepr)
+
+    def logStats(self, chainStats: List[Dict[str, Any]], numRestarts: int):
+        bestCosts = [stats["bestCost"] for stats in chainStats]
+        stats = {
+            "useless moves total (None params)": f"{sum(s['countNoneParams'] for s in chainStats)}/{sum(s['stepsTaken'] for s in chainStats)}",
+            "best cost of chains": f"min={np.min(bestCosts)}, mean={np.mean(bestCosts):.3f} +- {np.std(bestCosts):.3f}, max={np.max(bestCosts)}",
+            "updates of best state per chain": f"{np.mean([s['countBestUpdates'] for s in chainStats]):.1f}",
+            "restarts": str(numRestarts)}
+        self.log.info(f"Stats: {'; '.join([key + ': ' + value for (key, value) in stats.items()])}")
+
+
 class ParallelTempering:
     log = log.getChild(__qualname__)
 
@@ -597,12 +1313,19 @@ class ParallelTempering:
     """
     def __init__(self, numChains, opsAndWeights: Sequence[Tuple[Type[SAOperator], float]],
                  schedule: SATemperatureSchedule = None, probabilityFunction: SAProbabilityFunction = None,
-                 maxSteps: int = None, duration: float = None, randomSeed=42, logCostProgression=False):
+                 maxSteps: int = None, duration: float = None, randomSeed=42, logCostProgression=False, numProcesses=1,
+                 stepsPerSync=100):
         """
         Creates a parallel tempering optimiser with the given number of chains and operators for each chain.
         To determine the schedule to use for each chain, either schedule or probabilityFunction must be provided.
         It is usually more robust to use adaptive schedules and therefore to provide probabilityFunction.
 
+        If more than one process is used, the chains are distributed among worker processes (ideally one chain per process),
+        which advance their chains independently for stepsPerSync steps between synchronisation points.
+        At each synchronisation point, the workers report the chains' current costs (and schedules), and chains are swapped by
+        exchanging their schedules (the states remain in the workers). The best state representation is transferred
+        only at the end. In this mode, the state factory, the operators and the state representations must be picklable.
+
         :param numChains: the number of parallel chains
         :param opsAndWeights: a list of operators with associated weights (which are to indicate the non-normalised probability of chosing the associated operator)
         :param schedule: the temperature schedule from which numChains temperatures of chains are drawn (using equidistant degrees of completion); if None, must provide probabilityFunction
@@ -610,7 +1333,11 @@ class ParallelTempering:
         :param maxSteps: the number of steps for which to run the optimisation; may be None (if not given, duration must be provided)
         :param duration: the duration, in seconds, for which to run the optimisation; may be None (if not given, maxSteps must be provided)
         :param randomSeed: the random seed to use for all random choices
-        :param logCostProgression: whether to log cost progression of all chains (such that it can be plotted after the fact via plotCostProgression)
+        :param logCostProgression: whether to log cost progression of all chains (such that it can be plotted after the fact via plotCostProgression);
+            if multiple processes are used, costs are logged only at synchronisation points
+        :param numProcesses: the number of worker processes among which to distribute the chains; if 1, all chains are stepped
+            (round-robin) in the current process and swaps are considered after every step
+        :param stepsPerSync: the number of steps each chain takes between synchronisation points (only relevant if numProcesses > 1)
         """
         if maxSteps is not None and maxSteps <= 0:
             raise ValueError("The number of iterations should be greater than 0.")
@@ -622,6 +1349,8 @@ class ParallelTempering:
             raise ValueError("Number of chains must be at least 2.")
         if (schedule is None and probabilityFunction is None) or (schedule is not None and probabilityFunction is not None):
             raise ValueError("Exactly one of {schedule, probabilityFunction} must be given")
+        if numProcesses < 1 or stepsPerSync < 1:
+            raise ValueError("The number of processes and the number of steps per synchronisation must be at least 1")
         self.maxSteps = maxSteps
         self.duration = duration
         self.randomSeed = randomSeed
@@ -630,6 +1359,8 @@ class ParallelTempering:
         self.baseProbabilityFunction = probabilityFunction
         self.opsAndWeights = opsAndWeights
         self.logCostProgression = logCostProgression
+        self.numProcesses = min(numProcesses, numChains)
+        self.stepsPerSync = stepsPerSync
 
         # transient members
         self._costProgressions = None
@@ -659,6 +1390,9 @@ class ParallelTempering:
         :param stateFactory: the factory with which to create the states for all chains
         """
         self.log.info(f"Running parallel tempering with {self.numChains} chains, {len(self.opsAndWeights)} operators for {'%d steps' % self.maxSteps if self.maxSteps is not None else '%d seconds' % self.duration} ...")
+        if self.numProcesses > 1:
+            self._optimiseMultiProcess(stateFactory)
+            return
 
         r = random.Random(self.randomSeed)
         chains = []
@@ -668,11 +1402,11 @@ class ParallelTempering:
             chains.append(SAChain(stateFactory, schedule, opsAndWeights=self.opsAndWeights, randomSeed=r.randint(0, 1000)))
             costProgressions.append([])
 
-        startTime = time.time()
+        timer = _BudgetTimer()
         step = 0
         numChainSwaps = 0
         while True:
-            timeElapsed = time.time() - startTime
+            timeElapsed = timer.elapsed()
             if (self.maxSteps is not None and step > self.maxSteps) or (self.duration is not None and timeElapsed > self.duration):
                 break
 
@@ -707,6 +1441,55 @@ class ParallelTempering:
         bestChainIdx = int(np.argmin([chain.bestCost.value() for chain in chains]))
         chains[bestChainIdx].applyBestState()
 
+    def _optimiseMultiProcess(self, stateFactory: Callable[[random.Random], SAState]):
+        r = random.Random(self.randomSeed)
+        schedules = self._createSchedules()
+        seeds = [r.randint(0, 1000) for _ in schedules]
+        for i, schedule in enumerate(schedules, start=1):
+            self.log.info(f"Chain {i} uses {schedule}")
+
+        # chainOrder[i] is the index of the chain which currently uses the i-th schedule (in descending order of temperature)
+        chainOrder = list(range(self.numChains))
+        costProgressions = [[] for _ in range(self.numChains)]
+        costs = [None] * self.numChains
+        with _SAChainGroups(self.numProcesses, stateFactory, self.opsAndWeights, seeds, schedules) as groups:
+            startTime = time.time()
+            step = 0
+            numChainSwaps = 0
+            while True:
+                timeElapsed = time.time() - startTime
+                if (self.maxSteps is not None and step > self.maxSteps) or (self.duration is not None and timeElapsed > self.duration):
+                    break
+
+                # let all chains take a block of steps
+                numSteps = self.stepsPerSync if self.maxSteps is None else min(self.stepsPerSync, self.maxSteps + 1 - step)
+                startDegree, endDegree = _blockDegreesOfCompletion(step, numSteps, timeElapsed, self.maxSteps, self.duration)
+                for i, report in enumerate(groups.run(startDegree, endDegree, numSteps, schedules=schedules)):
+                    costs[i] = report.cost
+                    schedules[i] = report.schedule
+                step += numSteps
+
+                # swap neighbouring chains (by exchanging their schedules) if the high-temperature chain has a better state
+                for slotHighTemp in range(0, self.numChains-1):
+                    slotLowTemp = slotHighTemp + 1
+                    highTempChain, lowTempChain = chainOrder[slotHighTemp], chainOrder[slotLowTemp]
+                    if costs[highTempChain] < costs[lowTempChain]:
+                        schedules[highTempChain], schedules[lowTempChain] = schedules[lowTempChain], schedules[highTempChain]
+                        chainOrder[slotHighTemp], chainOrder[slotLowTemp] = lowTempChain, highTempChain
+                        numChainSwaps += 1
+
+                if self.logCostProgression:
+                    for slot, chainIdx in enumerate(chainOrder):
+                        costProgressions[slot].append(costs[chainIdx])
+
+            bestCost, bestStateRepr, _ = groups.finish()
+
+        self.log.info(f"Parallel tempering completed after {time.time() - startTime:.1f} seconds, {step} steps per chain")
+        self.log.info(f"Number of chain swaps: {numChainSwaps}; best solution has cost {bestCost}")
+        if self.logCostProgression:
+            self._costProgressions = costProgressions
+        stateFactory(r).applyStateRepresentation(bestStateRepr)
+
     def plotCostProgression(self):
         if not self.logCostProgression or self._costProgressions is None:
             raise Exception("No cost progression was logged")
@@ -715,3 +1498,4 @@ class ParallelTempering:
             series[scheduleParamStr] = costProgression
         plt.figure()
         pd.DataFrame(series).plot()
+
@@ -7,6 +7,7 @@ import pandas as pd
 import tensorflow as tf
 
 from .. import normalisation
+from ..util.batching import BatchSizePolicy, BatchSizePolicyAdaptive, applyBatched
 from ..vector_model import VectorRegressionModel
 
 _log = logging.getLogger(__name__)
@@ -71,6 +72,19 @@ class KerasVectorRegressionModel(VectorRegressionModel, ABC):
         self.inputScaler = None
         self.outputScaler = None
         self.trainingHistory = None
+        self.inferenceBatchSizePolicy: BatchSizePolicy = BatchSizePolicyAdaptive()
+
+    def __setstate__(self, state):
+        state.setdefault("inferenceBatchSizePolicy", BatchSizePolicyAdaptive())
+        self.__dict__ = state
+
+    def withInferenceBatchSizePolicy(self, policy: BatchSizePolicy) -> __qualname__:
+        """
+        :param policy: the policy which determines the sizes of the batches in which the keras model is applied during inference
+        :return: self
+        """
+        self.inferenceBatchSizePolicy = policy
+        return self
 
     def __str__(self):
         params = dict(normalisationMode=self.normalisationMode, optimiser=self.optimiser, loss=self.loss, metrics=self.metrics,
@@ -119,6 +133,6 @@ class KerasVectorRegressionModel(VectorRegressionModel, ABC):
 
     def _predict(self, inputs: pd.DataFrame) -> pd.DataFrame:
         X = self.inputScaler.getNormalisedArray(inputs)
-        Y = self.model.predict(X)
+        Y = applyBatched(lambda x: self.model.predict_on_batch(x), X, self.inferenceBatchSizePolicy)
         Y = self.outputScaler.getDenormalisedArray(Y)
         return pd.DataFrame(Y, columns=self.outputScaler.dimensionNames)
@@ -1,5 +1,9 @@
+import inspect
 import io
+import itertools
 import logging
+import os
+import threading
 from abc import ABC, abstractmethod
 from typing import Union, Tuple, Callable, Optional
 
@@ -11,6 +15,7 @@ from .torch_data import TensorScaler, VectorDataUtil, ClassificationVectorDataUt
     TorchDataSetProviderFromDataUtil, TorchDataSetProvider
 from .torch_opt import NNOptimiser, NNLossEvaluatorRegression, NNLossEvaluatorClassification
 from ..normalisation import NormalisationMode
+from ..util.batching import BatchSizePolicy, BatchSizePolicyAdaptive, applyBatched
 from ..util.dtype import toFloatArray
 from ..util.string import objectRepr
 from ..vector_model import VectorRegressionModel, VectorClassificationModel
@@ -18,6 +23,97 @@ from ..vector_model import VectorRegressionModel, VectorClassificationModel
 log = logging.getLogger(__name__)
 
 
+def _torchLoad(f, **kwargs):
+    """
+    Loads a (pickled) torch object via torch.load, allowing arbitrary objects to be loaded in torch versions which
+    restrict loading to weights by default
+    """
+    if "weights_only" in inspect.signature(torch.load).parameters:
+        kwargs["weights_only"] = False
+    return torch.load(f, **kwargs)
+
+
+class TorchModelWeightsFile:
+    """
+    Context within which the weights of the TorchModels that are pickled are not serialised as part of the pickle but are instead
+    written to a separate binary file (as raw arrays) and, conversely, within which the weights of the TorchModels that are unpickled
+    are read from such a file via memory-mapping.
+    Upon loading, the modules are recreated via TorchModel.createTorchModule, i.e. the file stores only the modules' state dicts.
+    """
+    _activeContext = threading.local()
+    _alignment = 64
+
+    def __init__(self, path: str, write: bool):
+        """
+        :param path: the path of the weights file
+        :param write: whether the file is to be written (for pickling); if False, it is read (for unpickling)
+        """
+        self.path = path
+        self.write = write
+        self._file = None
+        self._tempPath = None
+        self._memMap = None
+
+    @staticmethod
+    def pathForPicklePath(picklePath: str) -> str:
+        return picklePath + ".weights"
+
+    @classmethod
+    def getActive(cls) -> Optional["TorchModelWeightsFile"]:
+        return getattr(cls._activeContext, "instance", None)
+
+    def __enter__(self):
+        if self.getActive() is not None:
+            raise Exception("Nested weights files are not supported")
+        if self.write:
+            # write to a temporary file which replaces the target file upon completion, because the target file may be memory-mapped
+            # (e.g. if a model that was loaded from the file is saved to the same path), such that it must not be truncated
+            self._tempPath = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            self._file = open(self._tempPath, "wb")
+        else:
+            self._memMap = np.memmap(self.path, dtype=np.uint8, mode="c")
+        self._activeContext.instance = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._activeContext.instance = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if exc_type is None:
+                os.replace(self._tempPath, self.path)
+            else:
+                os.remove(self._tempPath)
+            self._tempPath = None
+        self._memMap = None
+
+    def writeStateDict(self, stateDict: dict) -> list:
+        """
+        :param stateDict: the state dict to write
+        :return: a list of tuples (name, dtype, shape, offset) which describes the written state, i.e. the information required
+            to read it via readStateDict
+        """
+        entries = []
+        for name, tensor in stateDict.items():
+            array = np.ascontiguousarray(tensor.detach().cpu().numpy())
+            offset = self._file.tell()
+            padding = -offset % self._alignment
+            self._file.write(b"\0" * padding)
+            offset += padding
+            self._file.write(array.tobytes())
+            entries.append((name, array.dtype.str, array.shape, offset))
+        return entries
+
+    def readStateDict(self, entries: list) -> dict:
+        stateDict = {}
+        for name, dtype, shape, offset in entries:
+            dtype = np.dtype(dtype)
+            numBytes = int(np.prod(shape)) * dtype.itemsize
+            array = self._memMap[offset:offset+numBytes].view(dtype).reshape(shape)
+            stateDict[name] = torch.from_numpy(array)
+        return stateDict
+
+
 class TorchModel(ABC):
     """
     sensAI abstraction for torch models, which supports one-line training, allows for convenient model application,
@@ -34,9 +130,72 @@ class TorchModel(ABC):
         self.inputScaler: Optional[TensorScaler] = None
         self.bestEpoch = None
         self._gpu = None
+        self._inferenceModule: Optional[torch.jit.ScriptModule] = None
+        self._inputRangeCheckMaxValue: Optional[float] = 2.0
+        self._inputRangeCheckSampleSize: Optional[int] = 1000
 
     def setTorchModule(self, module: torch.nn.Module):
         self.module = module
+        self._inferenceModule = None
+
+    def setInputRangeCheck(self, maxValue: Optional[float] = 2.0, sampleSize: Optional[int] = 1000):
+        """
+        Configures the check of model inputs (in apply) which warns about inputs that are likely to not be correctly normalised
+
+        :param maxValue: the maximum input value above which to issue a warning; if None, disable the check
+        :param sampleSize: the (approximate) number of data points of each input to check; if None, check all data points
+        """
+        self._inputRangeCheckMaxValue = maxValue
+        self._inputRangeCheckSampleSize = sampleSize
+
+    def _checkInputRange(self, X: torch.Tensor):
+        if self._inputRangeCheckMaxValue is None:
+            return
+        if self._inputRangeCheckSampleSize is not None and X.shape[0] > self._inputRangeCheckSampleSize:
+            X = X[::X.shape[0] // self._inputRangeCheckSampleSize]
+        maxValue = X.max().item()
+        if maxValue > self._inputRangeCheckMaxValue:
+            log.warning("Received input which is likely to not be correctly normalised: maximum value in input tensor is %f" % maxValue)
+
+    def optimiseForInference(self, exampleInput: Optional[torch.Tensor] = None, script=False, quantise=False):
+        """
+        Creates a compiled (TorchScript) version of the underlying module, which is subsequently used for inference in apply
+        (except for MC-Dropout-based inference, which uses the original module) and which is retained when pickling this model.
+        Fitting the model discards the compiled module.
+
+        :param exampleInput: an example input (batch) with which to trace the module; may be omitted if the model can create an
+            example input itself (see _createExampleInput) or if script is True
+        :param script: whether to compile the module via scripting (torch.jit.script) rather than tracing (torch.jit.trace);
+            scripting retains data-dependent control flow but supports only a subset of Python
+        :param quantise: whether to apply dynamic int8 quantisation to the module's linear layers (CPU only), which reduces
+            latency and memory requirements at the cost of a (typically small) loss of precision
+        """
+        if self.module is None:
+            raise Exception("The model has not been trained")
+        if quantise and self._isCudaEnabled():
+            raise ValueError("Quantised inference is only supported on the CPU")
+        module = self.module
+        module.eval()
+        if quantise:
+            module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+        with torch.no_grad():
+            if script:
+                inferenceModule = torch.jit.script(module)
+            else:
+                if exampleInput is None:
+                    exampleInput = self._createExampleInput()
+                    if exampleInput is None:
+                        raise ValueError("An example input is required for tracing")
+                if self._isCudaEnabled():
+                    exampleInput = exampleInput.cuda()
+                inferenceModule = torch.jit.trace(module, exampleInput)
+            self._inferenceModule = torch.jit.freeze(inferenceModule)
+
+    def _createExampleInput(self) -> Optional[torch.Tensor]:
+        """
+        :return: an example input batch for the underlying module (for tracing) or None if it cannot be created
+        """
+        return None
 
     def getModuleBytes(self):
         bytesIO = io.BytesIO()
@@ -58,7 +217,7 @@ class TorchModel(ABC):
 
     def _loadModel(self, modelFile):
         try:
-            self.module = torch.load(modelFile)
+            self.module = _torchLoad(modelFile)
             self._gpu = self._getGPUFromModelParameterDevice()
         except:
             if self._isCudaEnabled():
@@ -70,12 +229,12 @@ class TorchModel(ABC):
                 if type(modelFile) != str:
                     modelFile.seek(0)
                 try:
-                    self.module = torch.load(modelFile, map_location=newDevice)
+                    self.module = _torchLoad(modelFile, map_location=newDevice)
                 except:
                     self.log.warning(f"Failure to map model to device {newDevice}, trying CPU...")
                     if newDevice != "cpu":
                         newDevice = "cpu"
-                        self.module = torch.load(modelFile, map_location=newDevice)
+                        self.module = _torchLoad(modelFile, map_location=newDevice)
                 if newDevice == "cpu":
                     self._setCudaEnabled(False)
                     self._gpu = None
@@ -89,20 +248,66 @@ class TorchModel(ABC):
     def createTorchModule(self) -> torch.nn.Module:
         pass
 
+    def _createTorchModuleWithState(self, stateDict: dict) -> torch.nn.Module:
+        """
+        Creates the module via createTorchModule and sets its state, using the given tensors directly (i.e. without copying them)
+        if supported by the torch version and if the state dict covers all of the module's tensors
+        """
+        if "assign" in inspect.signature(torch.nn.Module.load_state_dict).parameters:
+            # create the module without allocating (and initialising) its tensors
+            try:
+                with torch.device("meta"):
+                    module = self.createTorchModule()
+                module.load_state_dict(stateDict, assign=True)
+            except Exception as e:
+                # the module's construction may depend on tensor data (which meta tensors do not have)
+                self.log.debug(f"Creating the module on the meta device failed, falling back to regular creation: {e}")
+            else:
+                if not any(t.is_meta for t in itertools.chain(module.parameters(), module.buffers())):
+                    return module
+        module = self.createTorchModule()
+        module.load_state_dict(stateDict)
+        return module
+
     def __getstate__(self):
         state = dict(self.__dict__)
         del state["module"]
-        state["modelBytes"] = self.getModuleBytes()
+        weightsFile = TorchModelWeightsFile.getActive()
+        if weightsFile is not None and self.module is not None:
+            state["moduleWeights"] = weightsFile.writeStateDict(self.module.state_dict())
+        else:
+            state["modelBytes"] = self.getModuleBytes()
+        if state.get("_inferenceModule") is not None:
+            bytesIO = io.BytesIO()
+            torch.jit.save(state["_inferenceModule"], bytesIO)
+            state["inferenceModuleBytes"] = bytesIO.getvalue()
+        state["_inferenceModule"] = None
         return state
 
     def __setstate__(self, d):
-        modelBytes = None
-        if "modelBytes" in d:
-            modelBytes = d["modelBytes"]
-            del d["modelBytes"]
+        modelBytes = d.pop("modelBytes", None)
+        moduleWeights = d.pop("moduleWeights", None)
+        inferenceModuleBytes = d.pop("inferenceModuleBytes", None)
+        d.setdefault("_inferenceModule", None)
+        d.setdefault("_inputRangeCheckMaxValue", 2.0)
+        d.setdefault("_inputRangeCheckSampleSize", 1000)
         self.__dict__ = d
         if modelBytes is not None:
             self.setModuleBytes(modelBytes)
+        if moduleWeights is not None:
+            weightsFile = TorchModelWeightsFile.getActive()
+            if weightsFile is None or weightsFile.write:
+                raise Exception("The model's weights were saved to a separate file and must be loaded within a TorchModelWeightsFile context")
+            self.module = self._createTorchModuleWithState(weightsFile.readStateDict(moduleWeights))
+            if self._isCudaEnabled():
+                if torch.cuda.is_available():
+                    self.module.cuda()
+                    self._gpu = 0
+                else:
+                    self.log.warning("CUDA is not available; loading model to CPU")
+                    self._setCudaEnabled(False)
+        if inferenceModuleBytes is not None:
+            self._inferenceModule = torch.jit.load(io.BytesIO(inferenceModuleBytes), map_location="cuda" if self._isCudaEnabled() else "cpu")
 
     def apply(self, X: Union[torch.Tensor, np.ndarray, TorchDataSet], asNumpy=True, createBatch=False, mcDropoutSamples=None, mcDropoutProbability=None, scaleOutput=False,
             scaleInput=False) -> Union[torch.Tensor, np.ndarray, Tuple]:
@@ -121,9 +326,9 @@ class TorchModel(ABC):
         :return: an output tensor or, if MC-Dropout is applied, a pair (y, sd) where y the mean output tensor and sd is a tensor of the same dimension
             containing standard deviations
         """
-        def extract(z):
+        def extract(z, isStdDev=False):
             if scaleOutput:
-                z = self.scaledOutput(z)
+                z = self.scaledOutputStdDev(z) if isStdDev else self.scaledOutput(z)
             if self._isCudaEnabled():
                 z = z.cpu()
             z = z.detach()
@@ -148,16 +353,17 @@ class TorchModel(ABC):
         if createBatch:
             X = X.view(1, *X.size())
 
-        maxValue = X.max().item()
-        if maxValue > 2:
-            log.warning("Received input which is likely to not be correctly normalised: maximum value in input tensor is %f" % maxValue)
+        self._checkInputRange(X)
 
         if mcDropoutSamples is None:
-            y = model(X)
+            inferenceModule = self._inferenceModule if self._inferenceModule is not None else model
+            with torch.no_grad():
+                y = inferenceModule(X)
             return extract(y)
         else:
-            y, stddev = model.inferMCDropout(X, mcDropoutSamples, p=mcDropoutProbability)
-            return extract(y), extract(stddev)
+            with torch.no_grad():
+                y, stddev = model.inferMCDropout(X, mcDropoutSamples, p=mcDropoutProbability)
+            return extract(y), extract(stddev, isStdDev=True)
 
     def applyScaled(self, X: Union[torch.Tensor, np.ndarray, TorchDataSet], **kwargs) -> Union[torch.Tensor, np.ndarray]:
         """
@@ -174,6 +380,15 @@ class TorchModel(ABC):
     def scaledOutput(self, output):
         return self.outputScaler.denormalise(output)
 
+    def scaledOutputStdDev(self, stddev):
+        """
+        Scales standard deviations of (normalised) outputs, applying only the scaling (not the translation) of the output scaler
+
+        :param stddev: the tensor of standard deviations
+        :return: the scaled tensor
+        """
+        return self.outputScaler.denormalise(stddev.clone()) - self.outputScaler.denormalise(torch.zeros_like(stddev))
+
     def _extractParamsFromData(self, data: TorchDataSetProvider):
         self.outputScaler = data.getOutputTensorScaler()
         self.inputScaler = data.getInputTensorScaler()
@@ -221,24 +436,70 @@ class VectorTorchModel(TorchModel, ABC):
     def createTorchModule(self):
         return self.createTorchModuleForDims(self.inputDim, self.outputDim)
 
+    def _createExampleInput(self) -> Optional[torch.Tensor]:
+        if self.inputDim is None:
+            return None
+        return torch.zeros((1, self.inputDim))
+
     @abstractmethod
     def createTorchModuleForDims(self, inputDim, outputDim) -> torch.nn.Module:
         pass
 
 
+def _saveTorchVectorModel(model, path: str, backend: str, separateWeights: bool, save: Callable[[str, str], None]):
+    weightsPath = TorchModelWeightsFile.pathForPicklePath(path)
+    if separateWeights:
+        with TorchModelWeightsFile(weightsPath, write=True):
+            save(path, backend)
+    else:
+        save(path, backend)
+        # remove a weights file that may remain from saving a model to the same path previously
+        if os.path.exists(weightsPath):
+            os.unlink(weightsPath)
+
+
+def _loadTorchVectorModel(path: str, backend: str, load: Callable):
+    weightsPath = TorchModelWeightsFile.pathForPicklePath(path)
+    if os.path.exists(weightsPath):
+        with TorchModelWeightsFile(weightsPath, write=False):
+            return load(path, backend)
+    else:
+        return load(path, backend)
+
+
+def _applyMCDropout(model: TorchModel, inputs: pd.DataFrame, numSamples: int, p: Optional[float], policy: BatchSizePolicy) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Applies MC-Dropout-based inference to the given inputs in batches
+
+    :return: a pair of arrays (y, sd) containing means and standard deviations
+    """
+    def apply(x):
+        # the results for means and standard deviations are stacked in order to obtain a single output array
+        y, sd = model.applyScaled(x, asNumpy=True, mcDropoutSamples=numSamples, mcDropoutProbability=p)
+        return np.stack((y, sd), axis=1)
+
+    result = applyBatched(apply, inputs.values, policy)
+    return result[:, 0], result[:, 1]
+
+
 class TorchVectorRegressionModel(VectorRegressionModel):
     """
     Base class for the implementation of VectorRegressionModels based on TorchModels.
     An instance of this class will have an instance of TorchModel as the underlying model.
     """
     def __init__(self, modelClass: Callable[..., TorchModel], modelArgs=(), modelKwArgs=None,
-            normalisationMode=NormalisationMode.NONE, nnOptimiserParams=None):
+            normalisationMode=NormalisationMode.NONE, nnOptimiserParams=None, shuffle=False, randomSeed=42, storageDtype=np.float32):
         """
         :param modelClass: the constructor with which to create the wrapped torch vector model
         :param modelArgs: the constructor argument list to pass to modelClass
         :param modelKwArgs: the dictionary of constructor keyword arguments to pass to modelClass
         :param normalisationMode: the normalisation mode to apply to input data frames
         :param nnOptimiserParams: the parameters to apply in NNOptimiser during training
+        :param shuffle: whether to randomly assign data points to the training and validation sets during training (see VectorDataUtil);
+            if False, the validation set contains the last data points
+        :param randomSeed: the random seed to use for shuffling (if shuffle is True)
+        :param storageDtype: the numpy floating point type with which to store the (normalised) training data, e.g. np.float32 or
+            np.float16 (see VectorDataUtil)
         """
         super().__init__()
         if modelKwArgs is None:
@@ -249,16 +510,52 @@ class TorchVectorRegressionModel(VectorRegressionModel):
             nnOptimiserParams["lossEvaluator"] = NNLossEvaluatorRegression(NNLossEvaluatorRegression.LossFunction.MSELOSS)
         self.normalisationMode = normalisationMode
         self.nnOptimiserParams = nnOptimiserParams
+        self.shuffle = shuffle
+        self.randomSeed = randomSeed
+        self.storageDtype = storageDtype
         self.modelClass = modelClass
         self.modelArgs = modelArgs
         self.modelKwArgs = modelKwArgs
         self.model: Optional[TorchModel] = None
+        self.inferenceBatchSizePolicy: BatchSizePolicy = BatchSizePolicyAdaptive()
+
+    def __setstate__(self, state):
+        state.setdefault("inferenceBatchSizePolicy", BatchSizePolicyAdaptive())
+        state.setdefault("shuffle", False)
+        state.setdefault("randomSeed", 42)
+        state.setdefault("storageDtype", np.float32)
+        self.__dict__ = state
+
+    def withInferenceBatchSizePolicy(self, policy: BatchSizePolicy) -> __qualname__:
+        """
+        :param policy: the policy which determines the sizes of the batches in which the underlying model is applied during inference
+        :return: self
+        """
+        self.inferenceBatchSizePolicy = policy
+        return self
+
+    def save(self, path: str, backend="pickle", separateWeights=False):
+        """
+        Saves the instance as pickle
+
+        :param path: the path of the pickle file
+        :param backend: pickle or joblib
+        :param separateWeights: whether to write the weights of the underlying torch module to a separate file (the pickle path with
+            suffix ".weights") rather than to the pickle, which avoids the serialisation of the weights within the pickle and allows the
+            weights to be memory-mapped when loading
+        """
+        _saveTorchVectorModel(self, path, backend, separateWeights, super().save)
+
+    @classmethod
+    def load(cls, path, backend="pickle"):
+        return _loadTorchVectorModel(path, backend, super().load)
 
     def _createTorchModel(self) -> TorchModel:
         return self.modelClass(*self.modelArgs, **self.modelKwArgs)
 
     def _createDataSetProvider(self, inputs: pd.DataFrame, outputs: pd.DataFrame) -> TorchDataSetProvider:
-        dataUtil = VectorDataUtil(inputs, outputs, self.model.cuda, normalisationMode=self.normalisationMode)
+        dataUtil = VectorDataUtil(inputs, outputs, self.model.cuda, normalisationMode=self.normalisationMode, shuffle=self.shuffle,
+            randomSeed=self.randomSeed, storageDtype=self.storageDtype)
         return TorchDataSetProviderFromDataUtil(dataUtil, self.model.cuda)
 
     def _fit(self, inputs: pd.DataFrame, outputs: pd.DataFrame):
@@ -267,19 +564,30 @@ class TorchVectorRegressionModel(VectorRegressionModel):
         self.model.fit(dataSetProvider, **self.nnOptimiserParams)
 
     def _predictOutputsForInputDataFrame(self, inputs: pd.DataFrame) -> np.ndarray:
-        results = []
-        i = 0
-        batchSize = 2**13
-        while i < len(inputs):
-            inputSlice = inputs.iloc[i:i+batchSize]
-            results.append(self.model.applyScaled(inputSlice.values, asNumpy=True))
-            i += batchSize
-        return np.concatenate(results)
+        return applyBatched(lambda x: self.model.applyScaled(x, asNumpy=True), inputs.values, self.inferenceBatchSizePolicy)
 
     def _predict(self, inputs: pd.DataFrame) -> pd.DataFrame:
         yArray = self._predictOutputsForInputDataFrame(inputs)
         return pd.DataFrame(yArray, columns=self.getModelOutputVariableNames())
 
+    def predictWithMCDropout(self, x: pd.DataFrame, numSamples: int, p: Optional[float] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Applies MC-Dropout-based inference, which requires that the underlying torch module support MC-Dropout
+        (see MCDropoutCapableNNModule)
+
+        :param x: the input data
+        :param numSamples: the number of samples to draw with MC-Dropout
+        :param p: the dropout probability to apply; if None, use the module's default
+        :return: a pair (y, sd) of data frames, where y contains the mean predictions and sd the corresponding standard deviations.
+            Post-processing (target and output transformers) is applied to y only, i.e. sd refers to the outputs of the underlying model.
+        """
+        inputs = self._computeModelInputs(x)
+        self._checkModelInputColumns(inputs)
+        y, sd = _applyMCDropout(self.model, inputs, numSamples, p, self.inferenceBatchSizePolicy)
+        columns = self.getModelOutputVariableNames()
+        yDf = self._applyPostProcessing(pd.DataFrame(y, columns=columns, index=inputs.index))
+        return yDf, pd.DataFrame(sd, columns=columns, index=inputs.index)
+
     def __str__(self):
         return objectRepr(self, ["model", "normalisationMode", "nnOptimiserParams"])
 
@@ -290,13 +598,18 @@ class TorchVectorClassificationModel(VectorClassificationModel):
     An instance of this class will have an instance of TorchModel as the underlying model.
     """
     def __init__(self, modelClass: Callable[..., VectorTorchModel], modelArgs=(), modelKwArgs=None,
-            normalisationMode=NormalisationMode.NONE, nnOptimiserParams=None):
+            normalisationMode=NormalisationMode.NONE, nnOptimiserParams=None, shuffle=False, randomSeed=42, storageDtype=np.float32):
         """
         :param modelClass: the constructor with which to create the wrapped torch vector model
         :param modelArgs: the constructor argument list to pass to modelClass
         :param modelKwArgs: the dictionary of constructor keyword arguments to pass to modelClass
         :param normalisationMode: the normalisation mode to apply to input data frames
         :param nnOptimiserParams: the parameters to apply in NNOptimiser during training
+        :param shuffle: whether to randomly assign data points to the training and validation sets during training (see VectorDataUtil);
+            if False, the validation set contains the last data points
+        :param randomSeed: the random seed to use for shuffling (if shuffle is True)
+        :param storageDtype: the numpy floating point type with which to store the (normalised) training data, e.g. np.float32 or
+            np.float16 (see VectorDataUtil)
         """
         super().__init__()
         if modelKwArgs is None:
@@ -307,17 +620,52 @@ class TorchVectorClassificationModel(VectorClassificationModel):
             nnOptimiserParams["lossEvaluator"] = NNLossEvaluatorClassification(NNLossEvaluatorClassification.LossFunction.CROSSENTROPY)
         self.normalisationMode = normalisationMode
         self.nnOptimiserParams = nnOptimiserParams
+        self.shuffle = shuffle
+        self.randomSeed = randomSeed
+        self.storageDtype = storageDtype
         self.modelClass = modelClass
         self.modelArgs = modelArgs
         self.modelKwArgs = modelKwArgs
         self.model: Optional[VectorTorchModel] = None
+        self.inferenceBatchSizePolicy: BatchSizePolicy = BatchSizePolicyAdaptive()
+
+    def __setstate__(self, state):
+        state.setdefault("inferenceBatchSizePolicy", BatchSizePolicyAdaptive())
+        state.setdefault("shuffle", False)
+        state.setdefault("randomSeed", 42)
+        state.setdefault("storageDtype", np.float32)
+        self.__dict__ = state
+
+    def withInferenceBatchSizePolicy(self, policy: BatchSizePolicy) -> __qualname__:
+        """
+        :param policy: the policy which determines the sizes of the batches in which the underlying model is applied during inference
+        :return: self
+        """
+        self.inferenceBatchSizePolicy = policy
+        return self
+
+    def save(self, path: str, backend="pickle", separateWeights=False):
+        """
+        Saves the instance as pickle
+
+        :param path: the path of the pickle file
+        :param backend: pickle or joblib
+        :param separateWeights: whether to write the weights of the underlying torch module to a separate file (the pickle path with
+            suffix ".weights") rather than to the pickle, which avoids the serialisation of the weights within the pickle and allows the
+            weights to be memory-mapped when loading
+        """
+        _saveTorchVectorModel(self, path, backend, separateWeights, super().save)
+
+    @classmethod
+    def load(cls, path, backend="pickle"):
+        return _loadTorchVectorModel(path, backend, super().load)
 
     def _createTorchModel(self) -> VectorTorchModel:
         return self.modelClass(*self.modelArgs, **self.modelKwArgs)
 
     def _createDataSetProvider(self, inputs: pd.DataFrame, outputs: pd.DataFrame) -> TorchDataSetProvider:
         dataUtil = ClassificationVectorDataUtil(inputs, outputs, self.model.cuda, len(self._labels),
-            normalisationMode=self.normalisationMode)
+            normalisationMode=self.normalisationMode, shuffle=self.shuffle, randomSeed=self.randomSeed, storageDtype=self.storageDtype)
         return TorchDataSetProviderFromDataUtil(dataUtil, self.model.cuda)
 
     def _fitClassifier(self, inputs: pd.DataFrame, outputs: pd.DataFrame):
@@ -334,14 +682,7 @@ class TorchVectorClassificationModel(VectorClassificationModel):
         self.model.fit(dataSetProvider, **self.nnOptimiserParams)
 
     def _predictOutputsForInputDataFrame(self, inputs: pd.DataFrame) -> np.ndarray:
-        results = []
-        i = 0
-        batchSize = 64
-        while i < len(inputs):
-            inputSlice = inputs.iloc[i:i+batchSize]
-            results.append(self.model.applyScaled(inputSlice.values, asNumpy=True))
-            i += batchSize
-        return np.concatenate(results)
+        return applyBatched(lambda x: self.model.applyScaled(x, asNumpy=True), inputs.values, self.inferenceBatchSizePolicy)
 
     def _predictClassProbabilities(self, inputs: pd.DataFrame):
         y = self._predictOutputsForInputDataFrame(inputs)
@@ -350,5 +691,23 @@ class TorchVectorClassificationModel(VectorClassificationModel):
             y[i,:] /= normalisationConstants[i]
         return pd.DataFrame(y, columns=self._labels)
 
+    def predictClassProbabilitiesWithMCDropout(self, x: pd.DataFrame, numSamples: int, p: Optional[float] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Applies MC-Dropout-based inference, which requires that the underlying torch module support MC-Dropout
+        (see MCDropoutCapableNNModule)
+
+        :param x: the input data
+        :param numSamples: the number of samples to draw with MC-Dropout
+        :param p: the dropout probability to apply; if None, use the module's default
+        :return: a pair (probs, sd) of data frames (with the class labels as columns), where probs contains the mean class probabilities
+            and sd the corresponding standard deviations
+        """
+        inputs = self._computeModelInputs(x)
+        self._checkModelInputColumns(inputs)
+        y, sd = _applyMCDropout(self.model, inputs, numSamples, p, self.inferenceBatchSizePolicy)
+        normalisationConstants = y.sum(axis=1, keepdims=True)
+        return pd.DataFrame(y / normalisationConstants, columns=self._labels, index=inputs.index), \
+            pd.DataFrame(sd / normalisationConstants, columns=self._labels, index=inputs.index)
+
     def __str__(self):
         return objectRepr(self, ["model", "normalisationMode", "nnOptimiserParams"])
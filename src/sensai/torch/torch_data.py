@@ -1,7 +1,13 @@
+import collections
+import functools
+import json
+import os
+import queue
+import threading
 from abc import ABC, abstractmethod
-from typing import Tuple, Sequence, Generator, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Sequence, Generator, Optional, Union, List, Callable
 
-from torch.autograd import Variable
 import pandas as pd
 import numpy as np
 import torch
@@ -140,28 +146,48 @@ class DataUtil(ABC):
 
 class VectorDataUtil(DataUtil):
     def __init__(self, inputs: pd.DataFrame, outputs: pd.DataFrame, cuda: bool, normalisationMode=normalisation.NormalisationMode.MAX_BY_COLUMN,
-            differingOutputNormalisationMode=None):
+            differingOutputNormalisationMode=None, shuffle=False, randomSeed=42, storageDtype=np.float32):
         """
         :param inputs: the inputs
         :param outputs: the outputs
         :param cuda: whether to apply CUDA
         :param normalisationMode: the normalisation mode to use for inputs and (unless differingOutputNormalisationMode is specified) outputs
         :param differingOutputNormalisationMode: the normalisation mode to apply to outputs
+        :param shuffle: whether to randomly assign data points to the two sets when splitting the data (see splitInputOutputPairs).
+            If False, the first set contains the first data points (in the original order), which allows the sets to be provided
+            without copying the data.
+        :param randomSeed: the random seed to use for shuffling (if shuffle is True)
+        :param storageDtype: the numpy floating point type with which to store the (normalised) data, e.g. np.float32 or np.float16.
+            Using np.float16 halves memory requirements; batches of half-precision data are converted to single precision when
+            they are provided to the model.
         """
         if inputs.shape[0] != outputs.shape[0]:
             raise ValueError("Output length must be equal to input length")
         self.inputs = inputs
         self.outputs = outputs
         self.normalisationMode = normalisationMode
-        self.inputValues = inputs.values
-        self.outputValues = outputs.values
+        self.shuffle = shuffle
+        self.randomSeed = randomSeed
+        self.storageDtype = np.dtype(storageDtype)
         inputScaler = normalisation.VectorDataScaler(self.inputs, self.normalisationMode)
-        self.inputValues = inputScaler.getNormalisedArray(self.inputs)
+        self.inputValues = self._storageArray(inputScaler.getNormalisedArray(self.inputs), self.storageDtype)
         self.inputTensorScaler = TensorScalerFromVectorDataScaler(inputScaler, cuda)
         outputScaler = normalisation.VectorDataScaler(self.outputs, self.normalisationMode if differingOutputNormalisationMode is None else differingOutputNormalisationMode)
-        self.outputValues = outputScaler.getNormalisedArray(self.outputs)
+        outputDtype = self._outputStorageDtype()
+        self.outputValues = self._storageArray(outputScaler.getNormalisedArray(self.outputs), self.storageDtype if outputDtype is None else outputDtype)
         self.outputTensorScaler = TensorScalerFromVectorDataScaler(outputScaler, cuda)
 
+    @staticmethod
+    def _storageArray(values: np.ndarray, dtype) -> np.ndarray:
+        """
+        Converts the given array to a C-contiguous, writeable array of the given type, such that row ranges can be
+        shared with tensors without copying
+        """
+        values = np.ascontiguousarray(values, dtype=dtype)
+        if not values.flags.writeable:
+            values = values.copy()
+        return values
+
     def getOutputTensorScaler(self):
         return self.outputTensorScaler
 
@@ -171,28 +197,30 @@ class VectorDataUtil(DataUtil):
     def splitInputOutputPairs(self, fractionalSizeOfFirstSet):
         n = self.inputs.shape[0]
         sizeA = int(n * fractionalSizeOfFirstSet)
-        indices = list(range(n))
-        indices_A = indices[:sizeA]
-        indices_B = indices[sizeA:]
+        if self.shuffle:
+            indices = np.random.RandomState(self.randomSeed).permutation(n)
+            indices_A = np.sort(indices[:sizeA])
+            indices_B = np.sort(indices[sizeA:])
+        else:
+            # use slices, such that the resulting tensors share memory with the underlying arrays
+            indices_A = slice(0, sizeA)
+            indices_B = slice(sizeA, n)
         A = self._inputOutputPairs(indices_A)
         B = self._inputOutputPairs(indices_B)
         return A, B
 
-    def _inputOutputPairs(self, indices):
-        n = len(indices)
-        X = torch.zeros((n, self.inputDim()))
-        Y = torch.zeros((n, self.outputDim()), dtype=self._torchOutputDtype())
-
-        for i, outputIdx in enumerate(indices):
-            inputData, outputData = self._inputOutputPair(outputIdx)
-            if i == 0:
-                if inputData.size() != X[i].size():
-                    raise Exception(f"Unexpected input size: expected {X[i].size()}, got {inputData.size()}")
-                if outputData.size() != Y[i].size():
-                    raise Exception(f"Unexpected output size: expected {Y[i].size()}, got {outputData.size()}")
-            X[i] = inputData
-            Y[i] = outputData
-
+    def _inputOutputPairs(self, indices: Union[slice, np.ndarray]):
+        """
+        :param indices: the indices of the data points to include; if it is a slice, the resulting tensors will share memory
+            with the underlying arrays (no copy)
+        :return: a pair (X, Y) of tensors with inputs and outputs
+        """
+        X = torch.from_numpy(self.inputValues[indices])
+        Y = torch.from_numpy(self.outputValues[indices])
+        if X.shape[1:] != (self.inputDim(),):
+            raise Exception(f"Unexpected input size: expected {self.inputDim()}, got {tuple(X.shape[1:])}")
+        if Y.shape[1:] != (self.outputDim(),):
+            raise Exception(f"Unexpected output size: expected {self.outputDim()}, got {tuple(Y.shape[1:])}")
         return X, Y
 
     def _inputOutputPair(self, idx):
@@ -212,22 +240,27 @@ class VectorDataUtil(DataUtil):
     def modelOutputDim(self):
         return self.outputDim()
 
-    def _torchOutputDtype(self):
-        return None  # use default (some float)
+    def _outputStorageDtype(self):
+        """
+        :return: the numpy type with which to store outputs or None to use the storage type that is used for inputs
+        """
+        return None
 
 
 class ClassificationVectorDataUtil(VectorDataUtil):
-    def __init__(self, inputs: pd.DataFrame, outputs: pd.DataFrame, cuda, numClasses, normalisationMode=normalisation.NormalisationMode.MAX_BY_COLUMN):
+    def __init__(self, inputs: pd.DataFrame, outputs: pd.DataFrame, cuda, numClasses, normalisationMode=normalisation.NormalisationMode.MAX_BY_COLUMN,
+            shuffle=False, randomSeed=42, storageDtype=np.float32):
         if len(outputs.columns) != 1:
             raise Exception(f"Exactly one output dimension (the class index) is required, got {len(outputs.columns)}")
-        super().__init__(inputs, outputs, cuda, normalisationMode=normalisationMode, differingOutputNormalisationMode=normalisation.NormalisationMode.NONE)
+        super().__init__(inputs, outputs, cuda, normalisationMode=normalisationMode, differingOutputNormalisationMode=normalisation.NormalisationMode.NONE,
+            shuffle=shuffle, randomSeed=randomSeed, storageDtype=storageDtype)
         self.numClasses = numClasses
 
     def modelOutputDim(self):
         return self.numClasses
 
-    def _torchOutputDtype(self):
-        return torch.long
+    def _outputStorageDtype(self):
+        return np.int64
 
     def _inputOutputPairs(self, indices):
         # classifications requires that the second (1-element) dimension be dropped
@@ -307,40 +340,76 @@ class TorchDataSetProvider:
 
 
 class TorchDataSetFromTensors(TorchDataSet):
-    def __init__(self, x: torch.Tensor, y: Optional[torch.Tensor], cuda: bool):
+    def __init__(self, x: torch.Tensor, y: Optional[torch.Tensor], cuda: bool, floatDtype: Optional[torch.dtype] = None):
+        """
+        :param x: the input tensor
+        :param y: the output tensor (or None if the data set shall provide only inputs)
+        :param cuda: whether to provide batches as CUDA tensors
+        :param floatDtype: if not None, floating point batches are converted to this type when they are provided, which
+            allows the data to be stored in a more compact type (e.g. torch.float16) than the one used for computations
+        """
         if y is not None and x.shape[0] != y.shape[0]:
             raise ValueError("Tensors are not of the same length")
         self.x = x
         self.y = y
         self.cuda = cuda
+        self.floatDtype = floatDtype
 
     def iterBatches(self, batchSize: int, shuffle: bool = False, inputOnly=False) -> Generator[Union[Tuple[torch.Tensor, torch.Tensor], torch.Tensor], None, None]:
         tensors = (self.x, self.y) if not inputOnly and self.y is not None else (self.x,)
         yield from self._get_batches(tensors, batchSize, shuffle)
 
-    def _get_batches(self, tensors: Sequence[torch.Tensor], batch_size, shuffle):
+    def iterBatchFactories(self, batchSize: int, shuffle: bool = False, inputOnly=False, cuda: Optional[bool] = None) \
+            -> Generator[Callable[[], Union[Tuple[torch.Tensor, torch.Tensor], torch.Tensor]], None, None]:
+        """
+        Provides an iterator over functions which create the batches that would be provided by iterBatches.
+        The (cheap) determination of the batch indices takes place when iterating; the (potentially expensive)
+        assembly of the batches happens when the functions are called, which can be done concurrently.
+
+        :param batchSize: the maximum size of each batch
+        :param shuffle: whether to shuffle the data set
+        :param inputOnly: whether to provide only inputs (see iterBatches)
+        :param cuda: whether batches shall be CUDA tensors; if None, use this data set's setting
+        """
+        tensors = (self.x, self.y) if not inputOnly and self.y is not None else (self.x,)
+        if cuda is None:
+            cuda = self.cuda
+        for excerpt in self._iterBatchIndices(tensors, batchSize, shuffle):
+            yield functools.partial(self._createBatch, tensors, excerpt, cuda)
+
+    @staticmethod
+    def _iterBatchIndices(tensors: Sequence[torch.Tensor], batchSize, shuffle) -> Generator[torch.Tensor, None, None]:
         length = len(tensors[0])
+        for tensor in tensors:
+            if len(tensor) != length:
+                raise Exception("Passed tensors of differing lengths")
         if shuffle:
             index = torch.randperm(length)
         else:
-            index = torch.LongTensor(range(length))
+            index = torch.arange(length)
         start_idx = 0
         while start_idx < length:
-            end_idx = min(length, start_idx + batch_size)
-            excerpt = index[start_idx:end_idx]
-            batch = []
-            for tensor in tensors:
-                if len(tensor) != length:
-                    raise Exception("Passed tensors of differing lengths")
-                t = tensor[excerpt]
-                if self.cuda:
-                    t = t.cuda()
-                batch.append(Variable(t))
-            if len(batch) == 1:
-                yield batch[0]
-            else:
-                yield tuple(batch)
-            start_idx += batch_size
+            end_idx = int(min(length, start_idx + batchSize))
+            yield index[start_idx:end_idx]
+            start_idx = end_idx
+
+    def _createBatch(self, tensors: Sequence[torch.Tensor], excerpt: torch.Tensor, cuda: bool):
+        batch = []
+        for tensor in tensors:
+            t = tensor[excerpt]
+            if self.floatDtype is not None and t.is_floating_point():
+                t = t.to(self.floatDtype)
+            if cuda:
+                t = t.cuda()
+            batch.append(t)
+        if len(batch) == 1:
+            return batch[0]
+        else:
+            return tuple(batch)
+
+    def _get_batches(self, tensors: Sequence[torch.Tensor], batch_size, shuffle):
+        for excerpt in self._iterBatchIndices(tensors, batch_size, shuffle):
+            yield self._createBatch(tensors, excerpt, self.cuda)
 
     def size(self):
         return self.y.shape[0]
@@ -355,4 +424,434 @@ class TorchDataSetProviderFromDataUtil(TorchDataSetProvider):
 
     def provideSplit(self, fractionalSizeOfFirstSet: float) -> Tuple[TorchDataSet, TorchDataSet]:
         (x1, y1), (x2, y2) = self.dataUtil.splitInputOutputPairs(fractionalSizeOfFirstSet)
-        return TorchDataSetFromTensors(x1, y1, self.cuda), TorchDataSetFromTensors(x2, y2, self.cuda)
+        # half-precision storage is not suitable for computations on the CPU, so convert to single precision on demand
+        floatDtype = torch.float32 if x1.dtype == torch.float16 else None
+        return TorchDataSetFromTensors(x1, y1, self.cuda, floatDtype=floatDtype), TorchDataSetFromTensors(x2, y2, self.cuda, floatDtype=floatDtype)
+
+
+class MemMapData:
+    """
+    Represents input/output data that is stored in binary files (as written by MemMapDataWriter) and which is accessed
+    via memory-mapping, such that only the parts of the data that are actually used need to be loaded into memory.
+    """
+    META_FILENAME = "meta.json"
+    INPUTS_FILENAME = "inputs.bin"
+    OUTPUTS_FILENAME = "outputs.bin"
+
+    def __init__(self, directory: str):
+        """
+        :param directory: the directory containing the data files
+        """
+        self.directory = directory
+        with open(os.path.join(directory, self.META_FILENAME), "r") as f:
+            meta = json.load(f)
+        self.numRows: int = meta["numRows"]
+        self.inputDim: int = meta["inputDim"]
+        self.outputDim: int = meta["outputDim"]
+        self.inputDtype = np.dtype(meta["inputDtype"])
+        self.outputDtype = np.dtype(meta["outputDtype"])
+        self.inputColumns: List[str] = meta["inputColumns"]
+        self.outputColumns: List[str] = meta["outputColumns"]
+        self._inputs = None
+        self._outputs = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_inputs"] = None
+        state["_outputs"] = None
+        return state
+
+    def __len__(self):
+        return self.numRows
+
+    def _memMap(self, filename, dtype, dim) -> np.ndarray:
+        if self.numRows == 0:
+            return np.zeros((0, dim), dtype=dtype)
+        return np.memmap(os.path.join(self.directory, filename), dtype=dtype, mode="r", shape=(self.numRows, dim))
+
+    def getInputs(self) -> np.ndarray:
+        """
+        :return: the (read-only, memory-mapped) array of inputs with shape (numRows, inputDim)
+        """
+        if self._inputs is None:
+            self._inputs = self._memMap(self.INPUTS_FILENAME, self.inputDtype, self.inputDim)
+        return self._inputs
+
+    def getOutputs(self) -> np.ndarray:
+        """
+        :return: the (read-only, memory-mapped) array of outputs with shape (numRows, outputDim)
+        """
+        if self._outputs is None:
+            self._outputs = self._memMap(self.OUTPUTS_FILENAME, self.outputDtype, self.outputDim)
+        return self._outputs
+
+
+class MemMapDataWriter:
+    """
+    Writes input/output data, which can be provided in chunks (i.e. the full data set need never be held in memory),
+    to binary files which can subsequently be accessed via MemMapData.
+    Use as a context manager or call close when all data has been added.
+    """
+    def __init__(self, directory: str, inputDtype=np.float32, outputDtype=np.float32,
+            inputScaler: Optional[normalisation.VectorDataScaler] = None, outputScaler: Optional[normalisation.VectorDataScaler] = None):
+        """
+        :param directory: the directory in which to store the data (will be created if it does not exist); existing data will be overwritten
+        :param inputDtype: the numpy type with which to store inputs
+        :param outputDtype: the numpy type with which to store outputs; use an integer type for class indices
+        :param inputScaler: a scaler with which to normalise inputs before storing them; if None, store inputs as given
+        :param outputScaler: a scaler with which to normalise outputs before storing them; if None, store outputs as given
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.inputDtype = np.dtype(inputDtype)
+        self.outputDtype = np.dtype(outputDtype)
+        self.inputScaler = inputScaler
+        self.outputScaler = outputScaler
+        self.numRows = 0
+        self.inputColumns = None
+        self.outputColumns = None
+        # invalidate any data set previously stored in the directory, as its data files are about to be overwritten
+        metaPath = os.path.join(directory, MemMapData.META_FILENAME)
+        if os.path.exists(metaPath):
+            os.remove(metaPath)
+        self._inputsFile = open(os.path.join(directory, MemMapData.INPUTS_FILENAME), "wb")
+        self._outputsFile = open(os.path.join(directory, MemMapData.OUTPUTS_FILENAME), "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            # writing failed: only release the files (the data is incomplete and is thus not finalised, i.e. the
+            # directory contains no meta data and cannot be loaded as MemMapData)
+            self._closeFiles()
+        else:
+            self.close()
+
+    def _closeFiles(self):
+        self._inputsFile.close()
+        self._outputsFile.close()
+
+    def add(self, inputs: pd.DataFrame, outputs: pd.DataFrame):
+        """
+        Appends a chunk of data
+
+        :param inputs: the inputs
+        :param outputs: the corresponding outputs
+        """
+        if inputs.shape[0] != outputs.shape[0]:
+            raise ValueError("Output length must be equal to input length")
+        if self.inputColumns is None:
+            self.inputColumns = list(inputs.columns)
+            self.outputColumns = list(outputs.columns)
+        elif list(inputs.columns) != self.inputColumns or list(outputs.columns) != self.outputColumns:
+            raise ValueError("Columns of the given chunk are inconsistent with the columns of previously added data")
+        inputValues = inputs.values if self.inputScaler is None else self.inputScaler.getNormalisedArray(inputs)
+        outputValues = outputs.values if self.outputScaler is None else self.outputScaler.getNormalisedArray(outputs)
+        np.ascontiguousarray(inputValues, dtype=self.inputDtype).tofile(self._inputsFile)
+        np.ascontiguousarray(outputValues, dtype=self.outputDtype).tofile(self._outputsFile)
+        self.numRows += inputs.shape[0]
+
+    def close(self) -> MemMapData:
+        """
+        Completes the writing process
+
+        :return: the data object with which to access the data that was written
+        """
+        if not self._inputsFile.closed:
+            self._closeFiles()
+            if self.inputColumns is None:
+                raise ValueError("No data was added")
+            meta = dict(numRows=self.numRows, inputDim=len(self.inputColumns), outputDim=len(self.outputColumns),
+                inputDtype=self.inputDtype.str, outputDtype=self.outputDtype.str,
+                inputColumns=[str(c) for c in self.inputColumns], outputColumns=[str(c) for c in self.outputColumns])
+            with open(os.path.join(self.directory, MemMapData.META_FILENAME), "w") as f:
+                json.dump(meta, f)
+        return MemMapData(self.directory)
+
+    @classmethod
+    def write(cls, directory: str, inputs: pd.DataFrame, outputs: pd.DataFrame, chunkSize=100000, **kwargs) -> MemMapData:
+        """
+        Writes the given data in chunks
+
+        :param directory: the directory in which to store the data
+        :param inputs: the inputs
+        :param outputs: the outputs
+        :param chunkSize: the number of rows to convert and write at once
+        :param kwargs: further parameters to pass on to the constructor
+        :return: the data object with which to access the data that was written
+        """
+        with cls(directory, **kwargs) as writer:
+            for start in range(0, len(inputs), chunkSize):
+                writer.add(inputs.iloc[start:start+chunkSize], outputs.iloc[start:start+chunkSize])
+        return writer.close()
+
+
+class TorchDataSetFromMemMap(TorchDataSet):
+    """
+    A data set which reads batches on demand from memory-mapped data, supporting data sets which are too large
+    to be held in memory.
+    When shuffling, the order of blocks (contiguous ranges of rows) is shuffled and the rows within groups of
+    blocks are shuffled, such that data is read in large contiguous chunks while still providing (approximately)
+    random batches.
+    """
+    def __init__(self, data: MemMapData, cuda: bool, startRow=0, endRow=None, blockSize=65536, numShuffledBlocks=4,
+            outputsAreClassIndices=False, floatDtype: Optional[torch.dtype] = torch.float32, randomSeed: Optional[int] = None):
+        """
+        :param data: the data
+        :param cuda: whether to provide batches as CUDA tensors
+        :param startRow: the first row of the data to include in this data set
+        :param endRow: the row at which to end the data set (exclusive); if None, use all rows up to the end of the data
+        :param blockSize: the number of (contiguous) rows to read at once
+        :param numShuffledBlocks: the number of (randomly selected) blocks whose rows are shuffled together when shuffling
+        :param outputsAreClassIndices: whether the data's (single) output column contains class indices, which shall be provided
+            as a one-dimensional tensor
+        :param floatDtype: if not None, floating point batches are converted to this type
+        :param randomSeed: the random seed to use for shuffling; if None, use torch's random number generator
+        """
+        if endRow is None:
+            endRow = len(data)
+        if not 0 <= startRow <= endRow <= len(data):
+            raise ValueError(f"Invalid row range [{startRow}, {endRow}) for data with {len(data)} rows")
+        if outputsAreClassIndices and data.outputDim != 1:
+            raise ValueError(f"Exactly one output column (the class index) is required, got {data.outputDim}")
+        self.data = data
+        self.cuda = cuda
+        self.startRow = startRow
+        self.endRow = endRow
+        self.blockSize = blockSize
+        self.numShuffledBlocks = numShuffledBlocks
+        self.outputsAreClassIndices = outputsAreClassIndices
+        self.floatDtype = floatDtype
+        self.randomSeed = randomSeed
+        self._randomState = None
+
+    def size(self) -> int:
+        return self.endRow - self.startRow
+
+    def _toTensor(self, a: np.ndarray) -> torch.Tensor:
+        t = torch.from_numpy(a)
+        if self.floatDtype is not None and t.is_floating_point():
+            t = t.to(self.floatDtype)
+        if self.cuda:
+            t = t.cuda()
+        return t
+
+    def _readRows(self, rowIndices: Union[slice, np.ndarray], inputOnly: bool):
+        """
+        :param rowIndices: a slice or an array of (absolute) row indices
+        :return: a pair of (in-memory) arrays (inputs, outputs), where outputs is None if inputOnly is True
+        """
+        x = np.array(self.data.getInputs()[rowIndices])
+        if inputOnly:
+            return x, None
+        y = np.array(self.data.getOutputs()[rowIndices])
+        if self.outputsAreClassIndices:
+            y = y.reshape(y.shape[0])
+        return x, y
+
+    def _iterBlocks(self, shuffle: bool, inputOnly: bool, shardIndex=0, numShards=1):
+        if not shuffle:
+            for i, start in enumerate(range(self.startRow, self.endRow, self.blockSize)):
+                if i % numShards == shardIndex:
+                    yield self._readRows(slice(start, min(start + self.blockSize, self.endRow)), inputOnly)
+        else:
+            if self._randomState is None:
+                seed = self.randomSeed if self.randomSeed is not None else torch.randint(0, 2**31 - 1, (1,)).item()
+                self._randomState = np.random.RandomState(seed)
+            blockStarts = self._randomState.permutation(np.arange(self.startRow, self.endRow, self.blockSize))
+            for groupIndex, i in enumerate(range(0, len(blockStarts), self.numShuffledBlocks)):
+                blockRanges = [(start, min(start + self.blockSize, self.endRow)) for start in blockStarts[i:i+self.numShuffledBlocks]]
+                # the permutation is drawn for every group (not only for the groups of the shard), such that the random
+                # states of all shards remain synchronised
+                permutation = self._randomState.permutation(sum(end - start for start, end in blockRanges))
+                if groupIndex % numShards != shardIndex:
+                    continue
+                blocks = [self._readRows(slice(start, end), inputOnly) for start, end in blockRanges]
+                x = np.concatenate([b[0] for b in blocks])
+                y = np.concatenate([b[1] for b in blocks]) if not inputOnly else None
+                yield x[permutation], y[permutation] if y is not None else None
+
+    def iterBatches(self, batchSize: int, shuffle: bool = False, inputOnly=False, shardIndex=0, numShards=1) \
+            -> Generator[Union[Tuple[torch.Tensor, torch.Tensor], torch.Tensor], None, None]:
+        """
+        :param batchSize: the maximum size of each batch
+        :param shuffle: whether to shuffle the data set
+        :param inputOnly: whether to provide only inputs
+        :param shardIndex: the index of the shard to provide (in case of distributed training)
+        :param numShards: the number of shards into which the data is partitioned (at the level of blocks or, when shuffling,
+            groups of blocks), where only the rows of the requested shard are read.
+            When shuffling, all shards must use data sets with the same random state.
+        """
+        batchSize = int(min(batchSize, max(self.size(), 1)))
+        remainderX, remainderY = None, None
+        for x, y in self._iterBlocks(shuffle, inputOnly, shardIndex=shardIndex, numShards=numShards):
+            if remainderX is not None:
+                x = np.concatenate((remainderX, x))
+                if not inputOnly:
+                    y = np.concatenate((remainderY, y))
+            numCompleteBatches = len(x) // batchSize
+            for i in range(numCompleteBatches):
+                batchSlice = slice(i * batchSize, (i + 1) * batchSize)
+                if inputOnly:
+                    yield self._toTensor(x[batchSlice])
+                else:
+                    yield self._toTensor(x[batchSlice]), self._toTensor(y[batchSlice])
+            end = numCompleteBatches * batchSize
+            remainderX = x[end:]
+            remainderY = y[end:] if not inputOnly else None
+        if remainderX is not None and len(remainderX) > 0:
+            if inputOnly:
+                yield self._toTensor(remainderX)
+            else:
+                yield self._toTensor(remainderX), self._toTensor(remainderY)
+
+
+class TorchDataSetProviderFromMemMap(TorchDataSetProvider):
+    """
+    Provides data sets from memory-mapped data (see MemMapDataWriter), splitting the data by row ranges without reading it.
+    This enables the training of models (e.g. via TorchModel.fit) on data sets which are too large to be held in memory.
+    Since the data is split by row ranges, it should be written in random order if a random split is desired.
+    """
+    def __init__(self, data: Union[MemMapData, str], cuda: bool, inputTensorScaler: Optional[TensorScaler] = None,
+            outputTensorScaler: Optional[TensorScaler] = None, modelOutputDim: Optional[int] = None, outputsAreClassIndices=False,
+            blockSize=65536, numShuffledBlocks=4, randomSeed: Optional[int] = None):
+        """
+        :param data: the data or the directory containing it
+        :param cuda: whether to provide batches as CUDA tensors
+        :param inputTensorScaler: the scaler which was used to normalise the stored inputs (if any)
+        :param outputTensorScaler: the scaler which was used to normalise the stored outputs (if any)
+        :param modelOutputDim: the number of outputs the model is to produce; if None, use the number of output columns of the data
+        :param outputsAreClassIndices: whether the data's (single) output column contains class indices; if True, modelOutputDim
+            (the number of classes) must be specified
+        :param blockSize: the number of (contiguous) rows to read at once
+        :param numShuffledBlocks: the number of (randomly selected) blocks whose rows are shuffled together when shuffling
+        :param randomSeed: the random seed to use for shuffling; if None, use torch's random number generator
+        """
+        if isinstance(data, str):
+            data = MemMapData(data)
+        if modelOutputDim is None:
+            if outputsAreClassIndices:
+                raise ValueError("The model output dimension (number of classes) must be provided for class index outputs")
+            modelOutputDim = data.outputDim
+        super().__init__(inputTensorScaler=inputTensorScaler, outputTensorScaler=outputTensorScaler, inputDim=data.inputDim,
+            modelOutputDim=modelOutputDim)
+        self.data = data
+        self.cuda = cuda
+        self.outputsAreClassIndices = outputsAreClassIndices
+        self.blockSize = blockSize
+        self.numShuffledBlocks = numShuffledBlocks
+        self.randomSeed = randomSeed
+
+    def _createDataSet(self, startRow, endRow) -> TorchDataSetFromMemMap:
+        return TorchDataSetFromMemMap(self.data, self.cuda, startRow=startRow, endRow=endRow, blockSize=self.blockSize,
+            numShuffledBlocks=self.numShuffledBlocks, outputsAreClassIndices=self.outputsAreClassIndices, randomSeed=self.randomSeed)
+
+    def provideSplit(self, fractionalSizeOfFirstSet: float) -> Tuple[TorchDataSet, TorchDataSet]:
+        splitRow = int(len(self.data) * fractionalSizeOfFirstSet)
+        return self._createDataSet(0, splitRow), self._createDataSet(splitRow, len(self.data))
+
+
+class BatchPrefetcher:
+    """
+    Provides the batches of a data set while assembling subsequent batches in the background (in separate threads),
+    such that batch assembly can overlap with computations that are applied to previously provided batches
+    (e.g. the forward/backward passes during training).
+
+    For TorchDataSetFromTensors instances, batches are assembled by a pool of worker threads (with the batch order being
+    preserved); for all other data sets, the data set's batch iterator is consumed by a single background thread.
+    """
+    def __init__(self, queueDepth=2, numWorkers=1, pinMemory=True):
+        """
+        :param queueDepth: the maximum number of batches to prepare in advance
+        :param numWorkers: the number of worker threads to use for the assembly of batches (for TorchDataSetFromTensors)
+        :param pinMemory: whether to use pinned (page-locked) memory for batches that are to be transferred to a CUDA device
+            (if CUDA is available), such that transfers can take place asynchronously
+        """
+        if queueDepth < 1:
+            raise ValueError(f"Queue depth must be positive, got {queueDepth}")
+        self.queueDepth = queueDepth
+        self.numWorkers = numWorkers
+        self.pinMemory = pinMemory
+
+    def iterBatches(self, dataSet: TorchDataSet, batchSize: int, shuffle: bool = False, inputOnly=False) \
+            -> Generator[Union[Tuple[torch.Tensor, torch.Tensor], torch.Tensor], None, None]:
+        """
+        Provides an iterator over the batches of the given data set (see TorchDataSet.iterBatches)
+        """
+        if isinstance(dataSet, TorchDataSetFromTensors):
+            yield from self._iterBatchesFromFactories(dataSet, batchSize, shuffle, inputOnly)
+        else:
+            yield from self._iterBatchesFromBackgroundThread(dataSet, batchSize, shuffle, inputOnly)
+
+    def _iterBatchesFromFactories(self, dataSet: TorchDataSetFromTensors, batchSize, shuffle, inputOnly):
+        # batches are assembled on the CPU (in pinned memory if applicable) and transferred to the device in this thread
+        usePinnedMemory = dataSet.cuda and self.pinMemory and torch.cuda.is_available()
+
+        def createBatch(batchFactory):
+            batch = batchFactory()
+            if usePinnedMemory:
+                batch = self._applyToTensors(batch, lambda t: t.pin_memory())
+            return batch
+
+        def finaliseBatch(batch):
+            if dataSet.cuda:
+                batch = self._applyToTensors(batch, lambda t: t.cuda(non_blocking=usePinnedMemory))
+            return batch
+
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=self.numWorkers) as pool:
+            try:
+                for batchFactory in dataSet.iterBatchFactories(batchSize, shuffle=shuffle, inputOnly=inputOnly, cuda=False):
+                    pending.append(pool.submit(createBatch, batchFactory))
+                    if len(pending) > self.queueDepth:
+                        yield finaliseBatch(pending.popleft().result())
+                while len(pending) > 0:
+                    yield finaliseBatch(pending.popleft().result())
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _iterBatchesFromBackgroundThread(self, dataSet: TorchDataSet, batchSize, shuffle, inputOnly):
+        batchQueue = queue.Queue(maxsize=self.queueDepth)
+        stopEvent = threading.Event()
+        endMarker = object()
+
+        def put(item):
+            while not stopEvent.is_set():
+                try:
+                    batchQueue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for batch in dataSet.iterBatches(batchSize, shuffle=shuffle, inputOnly=inputOnly):
+                    if not put((batch, None)):
+                        return
+                put((endMarker, None))
+            except BaseException as e:
+                put((None, e))
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch, exception = batchQueue.get()
+                if exception is not None:
+                    raise exception
+                if batch is endMarker:
+                    break
+                yield batch
+        finally:
+            stopEvent.set()
+            thread.join()
+
+    @staticmethod
+    def _applyToTensors(batch, fn: Callable[[torch.Tensor], torch.Tensor]):
+        if isinstance(batch, tuple):
+            return tuple(fn(t) for t in batch)
+        else:
+            return fn(batch)
@@ -1,7 +1,8 @@
 import collections
 import logging
 import re
-from typing import Optional
+import warnings
+from typing import Optional, Union
 
 import numpy as np
 import pandas as pd
@@ -11,6 +12,7 @@ from . import torch_modules
 from .torch_base import VectorTorchModel, TorchVectorRegressionModel, TorchVectorClassificationModel
 from .torch_data import TorchDataSetProviderFromDataUtil, DataUtil, TensorScaler, TensorScalerIdentity
 from ..normalisation import NormalisationMode
+from ..util.batching import applyBatched
 from ..util.string import objectRepr
 
 log = logging.getLogger(__name__)
@@ -140,13 +142,44 @@ class LSTNetworkVectorClassificationModel(TorchVectorClassificationModel):
             self.numClasses = len(self._labels)
         elif self.numClasses != len(self._labels):
             raise ValueError(f"Output dimension {self.numClasses} per time time slice was specified, while the training data contains {len(self._labels)} classes")
-        return TorchDataSetProviderFromDataUtil(self.DataUtil(inputs, outputs, self.numClasses), self.cuda)
+        return TorchDataSetProviderFromDataUtil(self.DataUtil(self._createInputArray(inputs), outputs, self.numClasses), self.cuda)
+
+    def _createInputArray(self, inputs: pd.DataFrame) -> np.ndarray:
+        """
+        :param inputs: the model inputs (as computed by _computeModelInputs)
+        :return: a contiguous float32 array of shape (len(inputs), numInputTimeSlices, inputDimPerTimeSlice)
+        """
+        # since the columns are sorted by time slice, the time slice reshaping does not require the data to be reordered
+        return np.ascontiguousarray(inputs.values, dtype=np.float32).reshape(len(inputs), self.modelKwArgs["numInputTimeSlices"],
+            self.modelKwArgs["inputDimPerTimeSlice"])
 
     def _predictOutputsForInputDataFrame(self, inputs: pd.DataFrame) -> np.ndarray:
         log.info(f"Predicting outputs for {len(inputs)} inputs")
-        result = super()._predictOutputsForInputDataFrame(inputs)
+        result = applyBatched(lambda x: self.model.applyScaled(x, asNumpy=True), self._createInputArray(inputs), self.inferenceBatchSizePolicy)
         return np.squeeze(result, 2)
 
+    @staticmethod
+    def createSlidingWindows(series: np.ndarray, numTimeSlices: int, step: int = 1) -> np.ndarray:
+        """
+        Creates the (overlapping) windows of a time series which can serve as inputs to the model (e.g. via DataUtil).
+        The windows are a strided view of the series, i.e. the data of overlapping windows is not duplicated in memory.
+
+        :param series: the time series as an array of shape (seriesLength, inputDimPerTimeSlice) or (seriesLength,) for a univariate series;
+            if it is not a contiguous float32 array, it is converted (copied) first
+        :param numTimeSlices: the number of time slices per window
+        :param step: the number of time slices by which successive windows are shifted
+        :return: a read-only array of shape (numWindows, numTimeSlices, inputDimPerTimeSlice)
+        """
+        series = np.ascontiguousarray(series, dtype=np.float32)
+        if series.ndim == 1:
+            series = series.reshape(-1, 1)
+        numWindows = (len(series) - numTimeSlices) // step + 1
+        if numWindows < 1:
+            raise ValueError(f"Series of length {len(series)} is too short for windows with {numTimeSlices} time slices")
+        rowStride, colStride = series.strides
+        return np.lib.stride_tricks.as_strided(series, shape=(numWindows, numTimeSlices, series.shape[1]),
+            strides=(step * rowStride, rowStride, colStride), writeable=False)
+
     def _computeModelInputs(self, x: pd.DataFrame, Y: pd.DataFrame = None, fit=False) -> pd.DataFrame:
         x = super()._computeModelInputs(x, Y=Y, fit=fit)
 
@@ -177,14 +210,23 @@ class LSTNetworkVectorClassificationModel(TorchVectorClassificationModel):
         return x
 
     class DataUtil(DataUtil):
-        def __init__(self, x_data: pd.DataFrame, y_data: pd.DataFrame, numClasses):
-            self.y_data = y_data
+        def __init__(self, x_data: Union[pd.DataFrame, np.ndarray], y_data: Union[pd.DataFrame, np.ndarray], numClasses):
+            """
+            :param x_data: the inputs, either as a data frame (with one column per time slice and feature) or as an array of shape
+                (n, numInputTimeSlices, inputDimPerTimeSlice), which may be a strided view (see createSlidingWindows)
+            :param y_data: the class indices (one per data point)
+            :param numClasses: the number of classes
+            """
+            # the data is converted only once, such that the splits are (zero-copy) views of the same data
+            if isinstance(x_data, pd.DataFrame):
+                x_data = np.ascontiguousarray(x_data.values, dtype=np.float32)
             self.x_data = x_data
+            self.y_data = np.asarray(y_data, dtype=np.int64).reshape(len(y_data), 1)
             self.numClasses = numClasses
             self.scaler = TensorScalerIdentity()
 
         def inputDim(self):
-            return len(self.x_data.columns)
+            return int(np.prod(self.x_data.shape[1:]))
 
         def modelOutputDim(self) -> int:
             return self.numClasses
@@ -195,10 +237,17 @@ class LSTNetworkVectorClassificationModel(TorchVectorClassificationModel):
             y2, x2 = self.getInputOutputPair(self.y_data[splitIndex:], self.x_data[splitIndex:])
             return (x1, y1), (x2, y2)
 
-        def getInputOutputPair(self, output, input):
-            y = torch.tensor(output.values).long()
-            x = torch.tensor(input.values).float()
-            return y, x
+        def getInputOutputPair(self, output: np.ndarray, input: np.ndarray):
+            return self._toTensor(output), self._toTensor(input)
+
+        @staticmethod
+        def _toTensor(a: np.ndarray) -> torch.Tensor:
+            if not a.flags.writeable:
+                # the tensor is never modified, so sharing the memory of a read-only array (e.g. sliding windows) is safe
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    return torch.from_numpy(a)
+            return torch.from_numpy(a)
 
         def getOutputTensorScaler(self) -> TensorScaler:
             return self.scaler
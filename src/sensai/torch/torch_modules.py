@@ -48,26 +48,47 @@ class MCDropoutCapableNNModule(nn.Module, ABC):
         self._applyMCDropout = enabled
         self._pMCDropoutOverride = pMCDropoutOverride
 
-    def inferMCDropout(self, x, numSamples, p=None):
+    def inferMCDropout(self, x, numSamples, p=None, vectorised=False, maxBatchSize=2**14):
         """
         Applies inference using MC-Dropout, drawing the given number of samples.
 
         :param x: the model input
         :param numSamples: the number of samples to draw with MC-Dropout
         :param p: the dropout probability to apply, overriding the probability specified by the model's forward method; if None, use model's default
+        :param vectorised: whether to compute several samples in a single forward pass by replicating the input batch (rather than
+            applying a separate forward pass per sample). This requires that the module process the data points in a batch independently.
+        :param maxBatchSize: the maximum number of rows (data points times samples) to process in a single forward pass if vectorised
+            is True, which bounds the memory that is required
         :return: a pair (y, sd) where y the mean output tensor and sd is a tensor of the same dimension containing standard deviations
         """
-        results = []
+        batchSize = x.shape[0]
+        samplesPerPass = max(1, min(numSamples, maxBatchSize // max(batchSize, 1))) if vectorised else 1
+        n = 0
+        mean = None
+        m2 = None  # sum of squared deviations from the mean
         self._enableMCDropout(True, pMCDropoutOverride=p)
         try:
-            for i in range(numSamples):
-                y = self(x)
-                results.append(y)
+            for i in range(0, numSamples, samplesPerPass):
+                k = min(samplesPerPass, numSamples - i)
+                if k > 1:
+                    y = self(x.repeat(k, *[1] * (x.dim() - 1)))
+                    y = y.view(k, batchSize, *y.shape[1:])
+                else:
+                    y = self(x).unsqueeze(0)
+                # combine the moments of the samples of this pass with the previous ones (Chan et al.)
+                passMean = torch.mean(y, 0)
+                passM2 = torch.sum((y - passMean) ** 2, 0)
+                if mean is None:
+                    mean, m2 = passMean, passM2
+                else:
+                    delta = passMean - mean
+                    total = n + k
+                    mean = mean + delta * (k / total)
+                    m2 = m2 + passM2 + delta ** 2 * (n * k / total)
+                n += k
         finally:
             self._enableMCDropout(False)
-        results = torch.stack(results)
-        mean = torch.mean(results, 0)
-        stddev = torch.std(results, 0, unbiased=False)
+        stddev = torch.sqrt(m2 / n)
         return mean, stddev
 
 
@@ -82,10 +103,6 @@ class MultiLayerPerceptron(MCDropoutCapableNNModule):
         self.outputActivationFn = outputActivationFn
         self.pDropout = pDropout
         self.layers = nn.ModuleList()
-        if pDropout is not None:
-            self.dropout = nn.Dropout(p=pDropout)
-        else:
-            self.dropout = None
         prevDim = inputDim
         for dim in [*hiddenDims, outputDim]:
             self.layers.append(nn.Linear(prevDim, dim))
@@ -100,8 +117,8 @@ class MultiLayerPerceptron(MCDropoutCapableNNModule):
         for i, layer in enumerate(self.layers):
             isLast = i+1 == len(self.layers)
             x = layer(x)
-            if not isLast and self.dropout is not None:
-                x = self.dropout(x)
+            if not isLast:
+                x = self._dropout(x, pTraining=self.pDropout, pInference=self.pDropout)
             activation = self.hidActivationFn if not isLast else self.outputActivationFn
             if activation is not None:
                 x = activation(x)
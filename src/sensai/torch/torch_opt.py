@@ -1,20 +1,25 @@
+import contextlib
 import functools
+import itertools
 import logging
 import math
+import socket
 import time
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from enum import Enum
-from typing import List, Union, Sequence, Callable, TYPE_CHECKING
+from typing import List, Union, Sequence, Callable, TYPE_CHECKING, Optional, Tuple
 
 import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.optim as optim
 from torch import cuda as torchcuda
+from torch.nn.parallel import DistributedDataParallel
 
 from .torch_data import TensorScaler, DataUtil, TorchDataSet, TorchDataSetProviderFromDataUtil, TorchDataSetProvider, \
-    TensorScalerIdentity
+    TensorScalerIdentity, BatchPrefetcher, TorchDataSetFromTensors, TorchDataSetFromMemMap
 
 if TYPE_CHECKING:
     from .torch_base import TorchModel
@@ -348,12 +353,55 @@ class NNLossEvaluatorClassification(NNLossEvaluator):
             raise AssertionError(f"No selection criterion defined for loss function {self.lossFn}")
 
 
+def _findFreePort() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _runDistributedTrainingWorker(rank: int, optimiser: "NNOptimiser", *args):
+    optimiser._runDistributedTrainingWorker(rank, *args)
+
+
+class TrainingEpochTimings:
+    """
+    Holds the durations of the phases of a training epoch.
+    Note that, when using CUDA, computations are asynchronous, such that the durations of the individual phases
+    are only indicative.
+    """
+    def __init__(self):
+        self.dataSecs = 0.0
+        self.forwardSecs = 0.0
+        self.backwardSecs = 0.0
+        self.stepSecs = 0.0
+        self.totalSecs = 0.0
+        self.numSamples = 0
+
+    def getThroughput(self) -> float:
+        """
+        :return: the number of data points that were processed per second of (wall-clock) training time
+        """
+        if self.totalSecs == 0:
+            return float("inf")
+        return self.numSamples / self.totalSecs
+
+    def toDict(self) -> dict:
+        return dict(dataSecs=self.dataSecs, forwardSecs=self.forwardSecs, backwardSecs=self.backwardSecs, stepSecs=self.stepSecs,
+            totalSecs=self.totalSecs, numSamples=self.numSamples, samplesPerSec=self.getThroughput())
+
+    def __str__(self):
+        return f"data {self.dataSecs:.2f}s, forward {self.forwardSecs:.2f}s, backward {self.backwardSecs:.2f}s, " \
+               f"step {self.stepSecs:.2f}s, {self.getThroughput():.0f} samples/s"
+
+
 class NNOptimiser:
     log = log.getChild(__qualname__)
 
     def __init__(self, lossEvaluator: NNLossEvaluator = None, cuda=True, gpu=None, optimiser="adam", optimiserClip=10., optimiserLR=0.001,
             batchSize=None, epochs=1000, trainFraction=0.75, scaledOutputs=False, optimiserLRDecay=1, startLRDecayAtEpoch=None,
-            useShrinkage=True, **optimiserArgs):
+            useShrinkage=True, prefetchQueueDepth=0, prefetchWorkers=1, prefetchPinMemory=True, numThreads: Optional[int] = None,
+            numInteropThreads: Optional[int] = None, deterministic=True, seed: Optional[int] = 42, numProcesses=1,
+            distributedPort: Optional[int] = None, **optimiserArgs):
         """
         :param cuda: whether to use CUDA
         :param lossEvaluator: the loss evaluator to use
@@ -366,6 +414,26 @@ class NNOptimiser:
         :param scaledOutputs: whether to scale all outputs, resulting in computations of the loss function based on scaled values rather than normalised values.
             Enabling scaling may not be appropriate in cases where there are multiple outputs on different scales/with completely different units.
         :param useShrinkage: whether to apply shrinkage to gradients whose norm exceeds optimiserClip
+        :param prefetchQueueDepth: the number of batches to prepare in advance in background threads (see BatchPrefetcher),
+            such that batch assembly overlaps with model computations; if 0, batches are prepared synchronously
+        :param prefetchWorkers: the number of threads with which to prepare batches (if prefetchQueueDepth > 0)
+        :param prefetchPinMemory: whether to use pinned memory for prefetched batches if CUDA is used
+        :param numThreads: the number of threads to use for intra-op parallelism on the CPU (see torch.set_num_threads) during
+            training; if None, use torch's current setting
+        :param numInteropThreads: the number of threads to use for inter-op parallelism on the CPU (see torch.set_num_interop_threads);
+            if None, use torch's current setting. Note that torch allows this to be set only once, before any parallel work is started.
+        :param deterministic: whether to enforce deterministic (reproducible) computations during training (on the CPU and GPU, see
+            torch.use_deterministic_algorithms; operations without a deterministic implementation issue a warning); if False, use faster
+            but possibly non-deterministic algorithms (e.g. cuDNN's auto-tuned convolution algorithms).
+            The global torch settings are restored after training.
+        :param seed: the random seed with which to initialise torch's random number generators prior to training; if None, do not seed
+        :param numProcesses: the number of processes to use for data-parallel training on the CPU (using torch.distributed with the
+            gloo backend). If greater than 1, each process handles a subset of each epoch's batches, gradients are averaged across
+            processes (such that the effective batch size is numProcesses * batchSize) and validation is performed by the first process.
+            Since processes are spawned, all arguments (the model and the data) must be picklable.
+            If numThreads is None, the available intra-op threads are divided among the processes.
+        :param distributedPort: the local TCP port to use for the communication between processes in distributed training;
+            if None, use a free port
         :param optimiserArgs: keyword arguments to be passed on to the actual torch optimiser
         """
         if optimiser == 'lbfgs':
@@ -394,15 +462,25 @@ class NNOptimiser:
         self.optimiserLRDecay = optimiserLRDecay
         self.optimiserArgs = optimiserArgs
         self.useShrinkage = useShrinkage
+        self.prefetchQueueDepth = prefetchQueueDepth
+        self.prefetchWorkers = prefetchWorkers
+        self.prefetchPinMemory = prefetchPinMemory
+        self.numThreads = numThreads
+        self.numInteropThreads = numInteropThreads
+        self.deterministic = deterministic
+        self.seed = seed
+        self.numProcesses = numProcesses
+        self.distributedPort = distributedPort
 
         self.lossEvaluatorState = None
         self.trainingLog = None
         self.bestEpoch = None
+        self.epochTimings: Optional[List[TrainingEpochTimings]] = None
 
     def __str__(self):
         return f"{self.__class__.__name__}[cuda={self.cuda}, optimiser={self.optimiser}, lossEvaluator={self.lossEvaluator}, epochs={self.epochs}, " \
             f"batchSize={self.batchSize}, LR={self.optimiserLR}, clip={self.optimiserClip}, gpu={self.gpu}, useShrinkage={self.useShrinkage}, " \
-            f"optimiserArgs={self.optimiserArgs}]"
+            f"prefetchQueueDepth={self.prefetchQueueDepth}, numThreads={self.numThreads}, numProcesses={self.numProcesses}, deterministic={self.deterministic}, optimiserArgs={self.optimiserArgs}]"
 
     def fit(self, model: "TorchModel", data: Union[DataUtil, List[DataUtil], TorchDataSetProvider, TorchDataSet]):
         """
@@ -428,20 +506,63 @@ class NNOptimiser:
         # initialise data to be generated
         self.trainingLog = []
         self.bestEpoch = None
-
-        def trainingLog(s):
-            self.log.info(s)
-            self.trainingLog.append(s)
+        self.epochTimings = []
 
         self._init_cuda()
+        previousNumThreads = self._initThreads()
+        previousDeterminismSettings = self._initDeterminism()
+        try:
+            self._fit(model, data, useValidation, toDataSetProvider)
+        finally:
+            if previousNumThreads is not None:
+                torch.set_num_threads(previousNumThreads)
+            self._restoreDeterminism(previousDeterminismSettings)
 
-        # Set the random seed manually for reproducibility.
-        seed = 42
-        torch.manual_seed(seed)
-        if self.cuda:
-            torchcuda.manual_seed_all(seed)
-        torch.backends.cudnn.benchmark = False
-        torch.backends.cudnn.deterministic = True
+    def _logTraining(self, s: str):
+        self.log.info(s)
+        self.trainingLog.append(s)
+
+    def _initThreads(self) -> Optional[int]:
+        """
+        Applies the thread count settings
+
+        :return: the previous number of intra-op threads if it was changed, None otherwise
+        """
+        if self.numInteropThreads is not None and torch.get_num_interop_threads() != self.numInteropThreads:
+            try:
+                torch.set_num_interop_threads(self.numInteropThreads)
+            except RuntimeError as e:
+                self.log.warning(f"Could not set number of inter-op threads to {self.numInteropThreads}: {e}")
+        if self.numThreads is not None:
+            previousNumThreads = torch.get_num_threads()
+            torch.set_num_threads(self.numThreads)
+            return previousNumThreads
+        return None
+
+    def _initDeterminism(self) -> Tuple[bool, bool, bool, bool]:
+        """
+        Applies the determinism setting
+
+        :return: the previous settings (to be passed to _restoreDeterminism)
+        """
+        previousSettings = (torch.are_deterministic_algorithms_enabled(), torch.is_deterministic_algorithms_warn_only_enabled(),
+            torch.backends.cudnn.benchmark, torch.backends.cudnn.deterministic)
+        torch.use_deterministic_algorithms(self.deterministic, warn_only=True)
+        torch.backends.cudnn.benchmark = not self.deterministic
+        torch.backends.cudnn.deterministic = self.deterministic
+        return previousSettings
+
+    @staticmethod
+    def _restoreDeterminism(previousSettings: Tuple[bool, bool, bool, bool]):
+        deterministicAlgorithms, warnOnly, torch.backends.cudnn.benchmark, torch.backends.cudnn.deterministic = previousSettings
+        torch.use_deterministic_algorithms(deterministicAlgorithms, warn_only=warnOnly)
+
+    def _fit(self, model: "TorchModel", data, useValidation: bool, toDataSetProvider: Callable):
+        # Set the random seed manually for reproducibility (if requested)
+        if self.seed is not None:
+            torch.manual_seed(self.seed)
+            if self.cuda:
+                torchcuda.manual_seed_all(self.seed)
 
         # obtain data, splitting it into training and validation set(s)
         validationSets = []
@@ -461,19 +582,43 @@ class NNOptimiser:
             for idxDataSetProvider, dataSetProvider in enumerate(dataSetProviders):
                 outputScalers.append(dataSetProvider.getOutputTensorScaler())
                 trainS, valS = dataSetProvider.provideSplit(self.trainFraction)
-                trainingLog(f"Data set {idxDataSetProvider+1}/{len(dataSetProviders)}: #train={trainS.size()}, #validation={valS.size()}")
+                self._logTraining(f"Data set {idxDataSetProvider+1}/{len(dataSetProviders)}: #train={trainS.size()}, #validation={valS.size()}")
                 validationSets.append(valS)
                 trainingSets.append(trainS)
-            trainingLog("Number of validation sets: %d" % len(validationSets))
+            self._logTraining("Number of validation sets: %d" % len(validationSets))
+
+        if self.numProcesses > 1:
+            self._fitDistributed(model, trainingSets, validationSets, outputScalers, useValidation)
+            return
 
         torchModel = model.createTorchModule()
         if self.cuda:
             torchModel.cuda()
         model.setTorchModule(torchModel)
+        self._runTraining(model, torchModel, trainingSets, validationSets, outputScalers, useValidation)
+
+    def _runTraining(self, model: "TorchModel", torchModel: nn.Module, trainingSets: List[TorchDataSet], validationSets: List[TorchDataSet],
+            outputScalers: List[TensorScaler], useValidation: bool, rank=0, numProcesses=1, seed: Optional[int] = None):
+        """
+        Runs the training loop, which, in case of distributed training, is executed by each of the processes
+
+        :param model: the model whose module is being trained
+        :param torchModel: the module to train
+        :param trainingSets: the training sets
+        :param validationSets: the validation sets
+        :param outputScalers: the output scalers corresponding to the data sets
+        :param useValidation: whether to perform validation (and to retain the best model according to validation results)
+        :param rank: the rank of the process (in case of distributed training); only the process with rank 0 performs validation
+        :param numProcesses: the number of processes that are training the model
+        :param seed: the base seed with which to determine the order of batches in each epoch (for distributed training)
+        """
+        isMainProcess = rank == 0
+        isDistributed = numProcesses > 1
+        trainModule = DistributedDataParallel(torchModel) if isDistributed else torchModel
 
         nParams = sum([p.nelement() for p in torchModel.parameters()])
         self.log.info(f"Learning parameters of {model} via {self}")
-        trainingLog('Number of parameters: %d' % nParams)
+        self._logTraining('Number of parameters: %d' % nParams)
 
         criterion = self.lossEvaluator.getTrainingCriterion()
 
@@ -482,11 +627,14 @@ class NNOptimiser:
 
         best_val = 1e9
         best_epoch = 0
-        optim = _Optimiser(torchModel.parameters(), method=self.optimiser, lr=self.optimiserLR,
+        optim = _Optimiser(trainModule.parameters(), method=self.optimiser, lr=self.optimiserLR,
             max_grad_norm=self.optimiserClip, lr_decay=self.optimiserLRDecay, start_decay_at=self.startLRDecayAtEpoch,
             use_shrinkage=self.useShrinkage, **self.optimiserArgs)
 
-        bestModelBytes = model.getModuleBytes()
+        # the best model's state is retained in memory (as a copy of the module's state dict) rather than being serialised
+        getModelState = lambda: {k: v.detach().clone() for k, v in torchModel.state_dict().items()}
+        setModelState = torchModel.load_state_dict
+        bestModelState = getModelState() if isMainProcess else None
         self.lossEvaluatorState = self.lossEvaluator.createValidationLossEvaluator(self.cuda)
         validationMetricName = self.lossEvaluator.getValidationMetricName()
         try:
@@ -496,7 +644,18 @@ class NNOptimiser:
                 epoch_start_time = time.time()
 
                 # perform training step, processing all the training data once
-                train_loss = self._train(trainingSets, torchModel, criterion, optim, self.batchSize, self.cuda, outputScalers)
+                batchOrderSeed = None
+                if isDistributed:
+                    # all processes must use the same order of batches in order for each batch to be processed by exactly one process,
+                    # while other random operations (e.g. dropout) shall differ between processes
+                    batchOrderSeed = seed + epoch
+                    torch.manual_seed(seed + epoch * numProcesses + rank)
+                timings = TrainingEpochTimings()
+                train_loss = self._train(trainingSets, trainModule, criterion, optim, self.batchSize, self.cuda, outputScalers, timings=timings,
+                    rank=rank, numProcesses=numProcesses, batchOrderSeed=batchOrderSeed)
+                self.epochTimings.append(timings)
+                if not isMainProcess:
+                    continue
 
                 # perform validation, computing the mean metrics across all validation sets (if more than one),
                 # and check for new best result according to validation results
@@ -525,20 +684,75 @@ class NNOptimiser:
                     valStr = f' | validation {", ".join(["%s %5.4f" % e for e in metrics.items()])} | {bestStr}'
                 else:
                     valStr = ""
-                trainingLog(
-                    'Epoch {:3d}/{} completed in {:5.2f}s | train loss {:5.4f}{:s}'.format(
-                        epoch, self.epochs, (time.time() - epoch_start_time), train_loss, valStr))
+                self._logTraining(
+                    'Epoch {:3d}/{} completed in {:5.2f}s | train loss {:5.4f} | {:s}{:s}'.format(
+                        epoch, self.epochs, (time.time() - epoch_start_time), train_loss, str(timings), valStr))
                 if useValidation and isNewBest:
-                    bestModelBytes = model.getModuleBytes()
-            trainingLog("Training complete")
+                    bestModelState = getModelState()
+            self._logTraining("Training complete")
         except KeyboardInterrupt:
-            trainingLog('Exiting from training early')
+            self._logTraining('Exiting from training early')
 
         # reload best model according to validation results
-        if useValidation:
-            trainingLog(f'Best model is from epoch {best_epoch} with {validationMetricName} {best_val} on validation set')
+        if useValidation and isMainProcess:
+            self._logTraining(f'Best model is from epoch {best_epoch} with {validationMetricName} {best_val} on validation set')
             self.bestEpoch = best_epoch
-            model.setModuleBytes(bestModelBytes)
+            setModelState(bestModelState)
+
+    def _fitDistributed(self, model: "TorchModel", trainingSets: List[TorchDataSet], validationSets: List[TorchDataSet],
+            outputScalers: List[TensorScaler], useValidation: bool):
+        """
+        Trains the model using data-parallel training in multiple processes (see parameter numProcesses)
+        """
+        if self.cuda:
+            raise ValueError("Distributed training is only supported on the CPU (cuda=False)")
+        if self.optimiser == "lbfgs":
+            raise ValueError("Distributed training is not supported for the LBFGS optimiser")
+        port = self.distributedPort if self.distributedPort is not None else _findFreePort()
+        numThreads = self.numThreads if self.numThreads is not None else max(1, torch.get_num_threads() // self.numProcesses)
+        seed = self.seed if self.seed is not None else int(torch.randint(0, 2**31 - 1, (1,)).item())
+        self._logTraining(f"Starting distributed training with {self.numProcesses} processes ({numThreads} threads each)")
+        context = torch.multiprocessing.get_context("spawn")
+        resultQueue = context.SimpleQueue()
+        processContext = torch.multiprocessing.spawn(_runDistributedTrainingWorker, nprocs=self.numProcesses, join=False,
+            args=(self, model, trainingSets, validationSets, outputScalers, useValidation, port, numThreads, seed,
+                self.log.getEffectiveLevel(), resultQueue))
+        # retrieve the result while waiting for the processes to terminate (the main process may block until the result is retrieved)
+        result = None
+        while True:
+            if result is None and not resultQueue.empty():
+                result = resultQueue.get()
+            if processContext.join(timeout=0.1):
+                break
+        if result is None:
+            result = resultQueue.get()
+        stateDict, trainingLog, self.bestEpoch, self.epochTimings = result
+        self.trainingLog.extend(trainingLog)
+        torchModel = model.createTorchModule()
+        torchModel.load_state_dict({k: torch.from_numpy(v) for k, v in stateDict.items()})
+        model.setTorchModule(torchModel)
+
+    def _runDistributedTrainingWorker(self, rank: int, model: "TorchModel", trainingSets: List[TorchDataSet], validationSets: List[TorchDataSet],
+            outputScalers: List[TensorScaler], useValidation: bool, port: int, numThreads: int, seed: int, logLevel: int, resultQueue):
+        if rank == 0:
+            logging.basicConfig(level=logLevel)
+        torch.set_num_threads(numThreads)
+        self._initDeterminism()
+        dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=self.numProcesses)
+        try:
+            torch.manual_seed(seed)
+            self.trainingLog = []
+            self.epochTimings = []
+            self.bestEpoch = None
+            torchModel = model.createTorchModule()
+            model.setTorchModule(torchModel)
+            self._runTraining(model, torchModel, trainingSets, validationSets, outputScalers, useValidation, rank=rank,
+                numProcesses=self.numProcesses, seed=seed)
+            if rank == 0:
+                stateDict = {k: v.detach().numpy() for k, v in torchModel.state_dict().items()}
+                resultQueue.put((stateDict, self.trainingLog, self.bestEpoch, self.epochTimings))
+        finally:
+            dist.destroy_process_group()
 
     def getTrainingLog(self):
         return self.trainingLog
@@ -546,6 +760,12 @@ class NNOptimiser:
     def getBestEpoch(self):
         return self.bestEpoch
 
+    def getEpochTimings(self) -> Optional[List[TrainingEpochTimings]]:
+        """
+        :return: the timings of the training phases for each epoch of the last training process
+        """
+        return self.epochTimings
+
     def _applyModel(self, model, X, groundTruth, outputScaler: TensorScaler):
         output = model(X)
         if self.scaledOutputs:
@@ -558,30 +778,123 @@ class NNOptimiser:
         scaledTruth = outputScaler.denormalise(groundTruth)
         return scaledOutput, scaledTruth
 
+    def _iterBatches(self, dataSet: TorchDataSet, batchSize: int, shuffle: bool, shardIndex=0, numShards=1,
+            batchOrderSeed: Optional[int] = None):
+        """
+        :param dataSet: the data set
+        :param batchSize: the batch size
+        :param shuffle: whether to shuffle the data
+        :param shardIndex: the index of the shard of batches to provide (in case of distributed training)
+        :param numShards: the number of shards into which the batches are partitioned (in case of distributed training)
+        :param batchOrderSeed: the seed with which to determine the (shuffled) order of batches, which must be the same for all shards
+            (in case of distributed training)
+        :return: an iterator over the batches
+        """
+        if numShards > 1:
+            return self._iterBatchShard(dataSet, batchSize, shuffle, shardIndex, numShards, batchOrderSeed)
+        if self.prefetchQueueDepth > 0:
+            prefetcher = BatchPrefetcher(queueDepth=self.prefetchQueueDepth, numWorkers=self.prefetchWorkers, pinMemory=self.prefetchPinMemory)
+            return prefetcher.iterBatches(dataSet, batchSize, shuffle=shuffle)
+        else:
+            return dataSet.iterBatches(batchSize, shuffle=shuffle)
+
+    @staticmethod
+    def _iterBatchShard(dataSet: TorchDataSet, batchSize: int, shuffle: bool, shardIndex: int, numShards: int,
+            batchOrderSeed: Optional[int] = None):
+        # The order of batches is determined using the given seed without affecting the global random number generator,
+        # which is why the batch order must be determined at the beginning of the iteration (as done by all data sets in this package)
+        with torch.random.fork_rng(devices=[]):
+            if batchOrderSeed is not None:
+                torch.manual_seed(batchOrderSeed)
+            if isinstance(dataSet, TorchDataSetFromTensors):
+                # only assemble the batches of the shard
+                batchFactories = list(dataSet.iterBatchFactories(batchSize, shuffle=shuffle))
+            elif isinstance(dataSet, TorchDataSetFromMemMap):
+                # only read the blocks of the shard
+                batches = iter(dataSet.iterBatches(batchSize, shuffle=shuffle, shardIndex=shardIndex, numShards=numShards))
+                firstBatch = next(batches, None)
+            else:
+                log.warning(f"Sharding of {dataSet.__class__.__name__} is not supported: every process assembles all batches "
+                    f"and discards the ones of other processes")
+                batches = iter(dataSet.iterBatches(batchSize, shuffle=shuffle))
+                firstBatch = next(batches, None)
+        if isinstance(dataSet, TorchDataSetFromTensors):
+            for i, batchFactory in enumerate(batchFactories):
+                if i % numShards == shardIndex:
+                    yield batchFactory()
+        elif isinstance(dataSet, TorchDataSetFromMemMap):
+            if firstBatch is not None:
+                yield from itertools.chain([firstBatch], batches)
+        elif firstBatch is not None:
+            for i, batch in enumerate(itertools.chain([firstBatch], batches)):
+                if i % numShards == shardIndex:
+                    yield batch
+
+    @staticmethod
+    def _iterTimed(iterable, timings: TrainingEpochTimings):
+        """Iterates over the given iterable, adding the time spent waiting for items to the data time"""
+        iterator = iter(iterable)
+        while True:
+            startTime = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            timings.dataSecs += time.perf_counter() - startTime
+            yield item
+
     def _train(self, dataSets: Sequence[TorchDataSet], model: nn.Module, criterion: nn.modules.loss._Loss,
-            optim: _Optimiser, batch_size: int, cuda: bool, outputScalers: Sequence[TensorScaler]):
-        """Performs one training epoch"""
+            optim: _Optimiser, batch_size: int, cuda: bool, outputScalers: Sequence[TensorScaler],
+            timings: Optional[TrainingEpochTimings] = None, rank=0, numProcesses=1, batchOrderSeed: Optional[int] = None):
+        """
+        Performs one training epoch.
+        In case of distributed training (numProcesses > 1), the given model must be a DistributedDataParallel instance, each process
+        handles a subset of the batches and the returned loss as well as the number of samples in the timings refer to all processes.
+        """
+        if timings is None:
+            timings = TrainingEpochTimings()
+        epochStartTime = time.perf_counter()
         model.train()
         total_loss = 0
         n_samples = 0
         numOutputsPerDataPoint = None
-        for dataSet, outputScaler in zip(dataSets, outputScalers):
-            for X, Y in dataSet.iterBatches(batch_size, shuffle=True):
-                if numOutputsPerDataPoint is None:
-                    outputShape = Y.shape[1:]
-                    numOutputsPerDataPoint = functools.reduce(lambda x, y: x * y, outputShape, 1)
-
-                def closure():
-                    model.zero_grad()
-                    output, groundTruth = self._applyModel(model, X, Y, outputScaler)
-                    loss = criterion(output, groundTruth)
-                    loss.backward()
-                    return loss
-
-                loss = optim.step(closure)
-                total_loss += loss.item()
-                numDataPointsInBatch = Y.size(0)
-                n_samples += numDataPointsInBatch * numOutputsPerDataPoint
+        # in case of distributed training, processes may handle different numbers of batches, which requires joining
+        with model.join() if numProcesses > 1 else contextlib.nullcontext():
+            for dataSet, outputScaler in zip(dataSets, outputScalers):
+                for X, Y in self._iterTimed(self._iterBatches(dataSet, batch_size, shuffle=True, shardIndex=rank, numShards=numProcesses,
+                        batchOrderSeed=batchOrderSeed), timings):
+                    if numOutputsPerDataPoint is None:
+                        outputShape = Y.shape[1:]
+                        numOutputsPerDataPoint = functools.reduce(lambda x, y: x * y, outputShape, 1)
+
+                    closureSecs = 0.0
+
+                    def closure():
+                        nonlocal closureSecs
+                        startTime = time.perf_counter()
+                        model.zero_grad()
+                        output, groundTruth = self._applyModel(model, X, Y, outputScaler)
+                        loss = criterion(output, groundTruth)
+                        forwardEndTime = time.perf_counter()
+                        loss.backward()
+                        endTime = time.perf_counter()
+                        timings.forwardSecs += forwardEndTime - startTime
+                        timings.backwardSecs += endTime - forwardEndTime
+                        closureSecs += endTime - startTime
+                        return loss
+
+                    stepStartTime = time.perf_counter()
+                    loss = optim.step(closure)
+                    timings.stepSecs += time.perf_counter() - stepStartTime - closureSecs
+                    total_loss += loss.item()
+                    numDataPointsInBatch = Y.size(0)
+                    n_samples += numDataPointsInBatch * numOutputsPerDataPoint
+                    timings.numSamples += numDataPointsInBatch
+        if numProcesses > 1:
+            totals = torch.tensor([total_loss, n_samples, timings.numSamples], dtype=torch.float64)
+            dist.all_reduce(totals)
+            total_loss, n_samples, timings.numSamples = totals[0].item(), totals[1].item(), int(totals[2].item())
+        timings.totalSecs = time.perf_counter() - epochStartTime
         return total_loss / n_samples
 
     def _evaluate(self, dataSet: TorchDataSet, model: nn.Module, outputScaler: TensorScaler):
@@ -589,7 +902,7 @@ class NNOptimiser:
         model.eval()
 
         groundTruthShape = None
-        for X, Y in dataSet.iterBatches(self.batchSize, shuffle=False):
+        for X, Y in self._iterBatches(dataSet, self.batchSize, shuffle=False):
             if groundTruthShape is None:
                 groundTruthShape = Y.shape[1:]  # the shape of the output of a single model application
                 self.lossEvaluatorState.startValidationCollection(groundTruthShape)
@@ -0,0 +1,128 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class BatchSizePolicy(ABC):
+    """
+    Determines the sizes of the batches in which a model is applied to (potentially large) inputs
+    """
+    @abstractmethod
+    def getBatchSize(self, numRemainingRows: int, bytesPerRow: int) -> int:
+        """
+        :param numRemainingRows: the number of rows that have yet to be processed
+        :param bytesPerRow: the (estimated) number of bytes required per row for the model's inputs and outputs
+        :return: the size of the next batch
+        """
+        pass
+
+    def update(self, batchSize: int, durationSecs: float):
+        """
+        Informs the policy about the time it took to process a batch
+
+        :param batchSize: the number of rows in the batch
+        :param durationSecs: the time taken to process the batch
+        """
+        pass
+
+
+class BatchSizePolicyFixed(BatchSizePolicy):
+    def __init__(self, batchSize: int):
+        self.batchSize = batchSize
+
+    def getBatchSize(self, numRemainingRows: int, bytesPerRow: int) -> int:
+        return self.batchSize
+
+    def __str__(self):
+        return f"{self.__class__.__name__}[batchSize={self.batchSize}]"
+
+
+class BatchSizePolicyAdaptive(BatchSizePolicy):
+    """
+    Chooses batch sizes such that the processing of a batch takes approximately a given target duration (based on the
+    measured per-row latency), subject to a memory budget for the inputs and outputs of a batch.
+    Larger batches amortise per-call overheads, while bounding the batch duration keeps memory usage and the latency
+    of individual calls in check.
+    """
+    def __init__(self, targetBatchDurationSecs=0.05, memoryBudgetBytes: Optional[int] = 256 * 2**20, initialBatchSize=1024,
+            minBatchSize=1, maxBatchSize: Optional[int] = None, smoothing=0.5):
+        """
+        :param targetBatchDurationSecs: the desired duration of the processing of a single batch
+        :param memoryBudgetBytes: the maximum number of bytes to use for the inputs and outputs of a batch; if None, do not restrict.
+            Note that memory required for intermediate results (e.g. the activations of a neural network) is not accounted for.
+        :param initialBatchSize: the batch size to use as long as no latency measurements are available
+        :param minBatchSize: the minimum batch size
+        :param maxBatchSize: the maximum batch size; if None, do not restrict
+        :param smoothing: the weight with which a new latency measurement is incorporated into the (exponentially smoothed)
+            estimate of the per-row latency
+        """
+        self.targetBatchDurationSecs = targetBatchDurationSecs
+        self.memoryBudgetBytes = memoryBudgetBytes
+        self.initialBatchSize = initialBatchSize
+        self.minBatchSize = minBatchSize
+        self.maxBatchSize = maxBatchSize
+        self.smoothing = smoothing
+        self.perRowLatencySecs: Optional[float] = None
+
+    def __getstate__(self):
+        # the latency estimate is specific to the machine (and load) under which it was measured and is thus not persisted
+        state = dict(self.__dict__)
+        state["perRowLatencySecs"] = None
+        return state
+
+    def __str__(self):
+        return f"{self.__class__.__name__}[targetBatchDurationSecs={self.targetBatchDurationSecs}, memoryBudgetBytes={self.memoryBudgetBytes}]"
+
+    def getBatchSize(self, numRemainingRows: int, bytesPerRow: int) -> int:
+        if self.perRowLatencySecs is None or self.perRowLatencySecs == 0:
+            batchSize = self.initialBatchSize
+        else:
+            batchSize = int(self.targetBatchDurationSecs / self.perRowLatencySecs)
+        if self.memoryBudgetBytes is not None and bytesPerRow > 0:
+            batchSize = min(batchSize, self.memoryBudgetBytes // bytesPerRow)
+        if self.maxBatchSize is not None:
+            batchSize = min(batchSize, self.maxBatchSize)
+        return max(batchSize, self.minBatchSize, 1)
+
+    def update(self, batchSize: int, durationSecs: float):
+        if batchSize == 0:
+            return
+        latency = durationSecs / batchSize
+        if self.perRowLatencySecs is None:
+            self.perRowLatencySecs = latency
+        else:
+            self.perRowLatencySecs = self.smoothing * latency + (1 - self.smoothing) * self.perRowLatencySecs
+
+
+def applyBatched(fn: Callable[[np.ndarray], np.ndarray], x: np.ndarray, policy: BatchSizePolicy) -> np.ndarray:
+    """
+    Applies the given function to the given input array in batches, writing the results to a preallocated output array
+
+    :param fn: the function to apply, which maps an array of inputs (where the first dimension is the batch dimension) to an
+        array of outputs with the same number of rows
+    :param x: the input array
+    :param policy: the policy which determines the batch sizes
+    :return: the array of outputs
+    """
+    numRows = x.shape[0]
+    if numRows == 0:
+        return fn(x)
+    result = None
+    bytesPerRow = x[:1].nbytes
+    i = 0
+    while i < numRows:
+        batchSize = policy.getBatchSize(numRows - i, bytesPerRow)
+        batch = x[i:i+batchSize]
+        startTime = time.perf_counter()
+        y = fn(batch)
+        if len(y) != len(batch):
+            raise ValueError(f"The function returned {len(y)} rows for a batch of {len(batch)} rows")
+        policy.update(len(batch), time.perf_counter() - startTime)
+        if result is None:
+            result = np.empty((numRows, *y.shape[1:]), dtype=y.dtype)
+            bytesPerRow += y[:1].nbytes
+        result[i:i+len(batch)] = y
+        i += len(batch)
+    return result
@@ -389,12 +389,20 @@ class SqlitePersistentKeyValueCache(PersistentKeyValueCache):
     def _commit(self):
         self._connMutex.acquire()
         try:
-            log.info(f"Committing {self._numEntriesToBeCommitted} cache entries to the SQLite database {self.path}")
-            self.conn.commit()
-            self._numEntriesToBeCommitted = 0
+            if self._numEntriesToBeCommitted > 0:
+                log.info(f"Committing {self._numEntriesToBeCommitted} cache entries to the SQLite database {self.path}")
+                self.conn.commit()
+                self._numEntriesToBeCommitted = 0
         finally:
             self._connMutex.release()
 
+    def commit(self):
+        """
+        Immediately commits all pending cache entries (rather than waiting for the deferred commit),
+        making them visible to other connections/processes
+        """
+        self._commit()
+
     def set(self, key, value):
         self._connMutex.acquire()
         try:
@@ -1,11 +1,15 @@
 import geopandas as gp
 import numpy as np
+import shapely
 from abc import ABC, abstractmethod
-from shapely.geometry import MultiPoint
-from typing import Union
+from shapely.geometry import MultiPoint, MultiLineString
+from typing import Union, Sequence
 
 from sensai.clustering import ClusteringModel
 
+# shapely 2 provides vectorised constructors and accessors for geometries
+_isShapely2 = hasattr(shapely, "multipoints")
+
 TCoordinates = Union[np.ndarray, MultiPoint, gp.GeoDataFrame, ClusteringModel.Cluster]
 
 
@@ -21,18 +25,74 @@ def extractCoordinatesArray(coordinates: TCoordinates) -> np.ndarray:
     """
     if isinstance(coordinates, gp.GeoDataFrame):
         try:
-            coordinates = np.array(MultiPoint(list(coordinates.geometry)))
+            coordinates = np.column_stack((coordinates.geometry.x.values, coordinates.geometry.y.values))
         except Exception:
             raise ValueError(f"Could not extract coordinates from GeoDataFrame. "
                              f"Is the geometry column a sequence of Points?")
     elif isinstance(coordinates, MultiPoint):
-        coordinates = np.array(coordinates)
+        coordinates = multipointToCoordinatesArray(coordinates)
     elif isinstance(coordinates, ClusteringModel.Cluster):
         coordinates = coordinates.datapoints
     validateCoordinates(coordinates)
     return coordinates
 
 
+def multipointToCoordinatesArray(multipoint: MultiPoint) -> np.ndarray:
+    """
+    :param multipoint: a MultiPoint object
+    :return: an array of shape (n, 2) containing the coordinates of the points
+    """
+    if _isShapely2:
+        return shapely.get_coordinates(multipoint)
+    else:
+        return np.array([[p.x, p.y] for p in multipoint]).reshape(-1, 2)
+
+
+def multipointsFromCoordinateGroups(coordinates: np.ndarray, groupSizes: Sequence[int]) -> np.ndarray:
+    """
+    Creates MultiPoint objects from consecutive groups of coordinates
+
+    :param coordinates: an array of shape (n, 2) containing the coordinates of all groups (in order of the groups)
+    :param groupSizes: the number of coordinates in each group (which may be zero, resulting in an empty MultiPoint)
+    :return: an array of MultiPoint objects with one entry per group
+    """
+    groupSizes = np.asarray(groupSizes, dtype=int)
+    if _isShapely2:
+        result = np.empty(len(groupSizes), dtype=object)
+        result[:] = [MultiPoint()] * len(groupSizes)
+        isNonEmpty = groupSizes > 0
+        if np.any(isNonEmpty):
+            # the indices (of the non-empty group) to which each coordinate pair belongs
+            indices = np.repeat(np.arange(np.count_nonzero(isNonEmpty)), groupSizes[isNonEmpty])
+            result[isNonEmpty] = shapely.multipoints(coordinates, indices=indices)
+        return result
+    else:
+        result = np.empty(len(groupSizes), dtype=object)
+        result[:] = [MultiPoint(group) if len(group) > 0 else MultiPoint()
+            for group in np.split(coordinates, np.cumsum(groupSizes)[:-1])]
+        return result
+
+
+def multiLineStringFromCoordinatePairs(coordinatePairs: np.ndarray) -> MultiLineString:
+    """
+    :param coordinatePairs: an array of shape (m, 2, 2) containing the start and end coordinates of m line segments
+    :return: a MultiLineString comprising the line segments
+    """
+    if _isShapely2:
+        return shapely.multilinestrings(shapely.linestrings(coordinatePairs))
+    else:
+        return MultiLineString(list(coordinatePairs))
+
+
+def pointsFromCoordinates(coordinates: np.ndarray, crs=None) -> gp.GeoSeries:
+    """
+    :param coordinates: an array of shape (n, 2)
+    :param crs: the coordinate reference system
+    :return: a GeoSeries containing a Point for each coordinate pair
+    """
+    return gp.GeoSeries(gp.points_from_xy(coordinates[:, 0], coordinates[:, 1]), crs=crs)
+
+
 class GeoDataFrameWrapper(ABC):
     @abstractmethod
     def toGeoDF(self, *args, **kwargs) -> gp.GeoDataFrame:
@@ -1,13 +1,9 @@
 import logging
 import numpy as np
-from itertools import combinations
-from scipy.spatial.distance import euclidean
-from scipy.spatial.qhull import Delaunay
-from shapely.geometry import MultiLineString, Polygon
 from shapely.ops import polygonize, unary_union
 
-from .coordinates import extractCoordinatesArray, TCoordinates
-from .graph import delaunayGraph
+from .coordinates import extractCoordinatesArray, TCoordinates, multiLineStringFromCoordinatePairs
+from .graph import delaunayEdges
 
 log = logging.getLogger(__name__)
 
@@ -31,39 +27,27 @@ def alphaShape(coordinates: TCoordinates, alpha=0.5):
     """
     coordinates = extractCoordinatesArray(coordinates)
 
-    edge_index_pairs = set()
-    edge_vertex_pairs = []
-    graph = delaunayGraph(coordinates)
-    mean_edge_size = graph.size(weight="weight") / graph.number_of_edges()
-
-    def add_edge(edge_index_pair, edge_vertex_pair):
-        """
-        Add a line between the i-th and j-th points,
-        if not in the list already
-        """
-        edge_index_pair = tuple(sorted(edge_index_pair))
-        if edge_index_pair in edge_index_pairs:
-            # already added
-            return
-        edge_index_pairs.add(edge_index_pair)
-        edge_vertex_pairs.append(edge_vertex_pair)
-
-    tri = Delaunay(coordinates)
-    for simplex in tri.simplices:
-        vertices = tri.points[simplex]
-        area = Polygon(vertices).area
-        edges = combinations(vertices, 2)
-        product_edges_lengths = 1
-        for vertex_1, vertex_2 in edges:
-            product_edges_lengths *= euclidean(vertex_1, vertex_2)
-        # this is the radius of the circumscribed circle of the triangle
-        # see https://en.wikipedia.org/wiki/Circumscribed_circle#Triangles
-        circum_r = product_edges_lengths / (4.0 * area)
-
-        if circum_r < mean_edge_size/alpha:
-            for index_pair in combinations(simplex, 2):
-                add_edge(index_pair, tri.points[np.array(index_pair)])
-
-    remaining_edges = MultiLineString(edge_vertex_pairs)
+    edges, tri = delaunayEdges(coordinates)
+    points = tri.points
+    mean_edge_size = np.linalg.norm(points[edges[:, 0]] - points[edges[:, 1]], axis=1).mean()
+
+    # compute the radii of the circumscribed circles of all triangles at once
+    # see https://en.wikipedia.org/wiki/Circumscribed_circle#Triangles
+    vertices = points[tri.simplices]
+    side_lengths = np.linalg.norm(vertices - np.roll(vertices, 1, axis=1), axis=2)
+    edge_vectors_1, edge_vectors_2 = vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0]
+    areas = 0.5 * np.abs(edge_vectors_1[:, 0] * edge_vectors_2[:, 1] - edge_vectors_1[:, 1] * edge_vectors_2[:, 0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        circum_r = np.prod(side_lengths, axis=1) / (4.0 * areas)
+
+    # Among the edges of all triangles whose circumradius is small enough, retain only the boundary edges (which belong to a
+    # single such triangle): the union of the polygons enclosed by them is the same as the union of the polygons enclosed
+    # by all the edges, but polygonizing and merging them is much cheaper
+    retained_simplices = tri.simplices[circum_r < mean_edge_size/alpha]
+    retained_edges = np.sort(retained_simplices[:, [[0, 1], [0, 2], [1, 2]]].reshape(-1, 2), axis=1).astype(np.int64)
+    edge_codes, edge_counts = np.unique(retained_edges[:, 0] * len(points) + retained_edges[:, 1], return_counts=True)
+    boundary_edge_codes = edge_codes[edge_counts == 1]
+    boundary_edges = np.column_stack((boundary_edge_codes // len(points), boundary_edge_codes % len(points)))
+    remaining_edges = multiLineStringFromCoordinatePairs(points[boundary_edges])
 
     return unary_union(list(polygonize(remaining_edges)))
@@ -1,35 +1,83 @@
 import geopandas as gp
 import networkx as nx
 import numpy as np
-import scipy
 from itertools import combinations
-from scipy.spatial.distance import euclidean
-from shapely.geometry import MultiLineString
-from typing import Callable, Dict
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+from scipy.spatial import Delaunay
+from typing import Callable, Dict, Optional, Tuple
 
-from .coordinates import extractCoordinatesArray, GeoDataFrameWrapper
+from .coordinates import extractCoordinatesArray, GeoDataFrameWrapper, multiLineStringFromCoordinatePairs
 
 
-def delaunayGraph(data: np.ndarray, edge_weight: Callable[[np.ndarray, np.ndarray], float] = euclidean):
+def delaunayEdges(data: np.ndarray) -> Tuple[np.ndarray, Delaunay]:
+    """
+    Computes the (unique) edges of the Delaunay triangulation of the data
+
+    :param data: an array of shape (n, d) containing the datapoints
+    :return: a pair (edges, tri) where edges is an array of shape (m, 2) containing the index pairs (i, j) with i < j of the
+        datapoints connected by an edge and tri is the triangulation
+    """
+    tri = Delaunay(data)
+    simplices = tri.simplices
+    if simplices.shape[1] == 3:
+        # In two dimensions, the edge opposite the k-th vertex of a triangle is shared with the k-th neighbour (-1 if there is none),
+        # so we obtain each edge exactly once by considering it only for the triangle with the higher index
+        simplexIndices = np.arange(len(simplices))
+        edges = np.concatenate([simplices[tri.neighbors[:, k] < simplexIndices][:, [(k + 1) % 3, (k + 2) % 3]] for k in range(3)])
+        return np.sort(edges, axis=1).astype(np.int64), tri
+    vertexIndexPairs = np.array(list(combinations(range(simplices.shape[1]), 2)))
+    edges = np.sort(simplices[:, vertexIndexPairs].reshape(-1, 2), axis=1).astype(np.int64)
+    # remove duplicates (edges shared by several simplices) by means of a scalar encoding of the index pairs
+    numPoints = len(tri.points)
+    edgeCodes = np.unique(edges[:, 0] * numPoints + edges[:, 1])
+    return np.column_stack((edgeCodes // numPoints, edgeCodes % numPoints)), tri
+
+
+def _edgeWeights(points: np.ndarray, edges: np.ndarray, edge_weight: Optional[Callable[[np.ndarray, np.ndarray], float]]) -> np.ndarray:
+    if edge_weight is None:
+        return np.linalg.norm(points[edges[:, 0]] - points[edges[:, 1]], axis=1)
+    else:
+        return np.array([edge_weight(points[i], points[j]) for i, j in edges])
+
+
+def delaunayGraph(data: np.ndarray, edge_weight: Optional[Callable[[np.ndarray, np.ndarray], float]] = None):
     """
     The Delaunay triangulation of the data as networkx.Graph
 
     :param data:
-    :param edge_weight: function to compute weight given two coordinate points
+    :param edge_weight: function to compute weight given two coordinate points; if None, use the Euclidean distance
+        (which is computed for all edges at once)
     :return: instance of networx.Graph where the edges contain additional datapoints entries for
         "weight" and for constants.COORDINATE_PAIR_KEY
     """
-    tri = scipy.spatial.Delaunay(data)
+    edges, tri = delaunayEdges(data)
+    weights = _edgeWeights(tri.points, edges, edge_weight)
     graph = nx.Graph()
-
-    for simplex in tri.simplices:
-        for vertex_id_pair in combinations(simplex, 2):
-            coordinate_pair = tri.points[
-                np.array(vertex_id_pair)]  # vertex_id_pair is a tuple and needs to be cast to an array
-            graph.add_edge(*vertex_id_pair, weight=edge_weight(*coordinate_pair))
+    graph.add_weighted_edges_from(zip(edges[:, 0].tolist(), edges[:, 1].tolist(), weights.tolist()))
     return graph
 
 
+def delaunayMinimumSpanningTreeEdges(data: np.ndarray, edge_weight: Optional[Callable[[np.ndarray, np.ndarray], float]] = None) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the minimum spanning tree of the Delaunay graph of the data (see delaunayGraph) using scipy's sparse graph routines
+
+    :param data: an array of shape (n, d) containing the datapoints
+    :param edge_weight: function to compute weight given two coordinate points; if None, use the Euclidean distance
+    :return: a pair (edges, weights) where edges is an array of shape (m, 2) containing the index pairs of the datapoints
+        connected by the edges of the tree and weights is an array of shape (m,) containing the corresponding edge weights
+    """
+    edges, tri = delaunayEdges(data)
+    weights = _edgeWeights(tri.points, edges, edge_weight)
+    numPoints = len(tri.points)
+    # edges with weight 0 would be dropped by the sparse representation; treat them as having the smallest positive weight
+    sparseWeights = np.maximum(weights, np.finfo(float).tiny)
+    tree = minimum_spanning_tree(coo_matrix((sparseWeights, (edges[:, 0], edges[:, 1])), shape=(numPoints, numPoints))).tocoo()
+    treeEdges = np.column_stack((tree.row, tree.col)).astype(np.int64)
+    return treeEdges, _edgeWeights(tri.points, treeEdges, edge_weight)
+
+
 class SpanningTree:
     """
     Wrapper around a tree-finding algorithm that will be applied on the Delaunay graph of the datapoints
@@ -37,23 +85,47 @@ class SpanningTree:
     def __init__(self, datapoints: np.ndarray, tree_finder: Callable[[nx.Graph], nx.Graph] = nx.minimum_spanning_tree):
         """
         :param datapoints:
-        :param tree_finder: function mapping a graph to a subgraph. The default is minimum_spanning_tree
+        :param tree_finder: function mapping a graph to a subgraph. The default is minimum_spanning_tree, which is computed
+            directly on the edge arrays (without constructing a networkx graph) using scipy
         """
         datapoints = extractCoordinatesArray(datapoints)
-        self.tree = tree_finder(delaunayGraph(datapoints))
-        edgeWeights = []
-        self.coordinatePairs = []
-        for edge in self.tree.edges.data():
-            edgeCoordinateIndices, edgeData = [edge[0], edge[1]], edge[2]
-            edgeWeights.append(edgeData["weight"])
-            self.coordinatePairs.append(datapoints[edgeCoordinateIndices])
-        self.edgeWeights = np.array(edgeWeights)
+        if tree_finder is nx.minimum_spanning_tree:
+            self.edges, self.edgeWeights = delaunayMinimumSpanningTreeEdges(datapoints)
+            self._tree = None
+        else:
+            self._tree = tree_finder(delaunayGraph(datapoints))
+            edgeData = list(self._tree.edges.data("weight"))
+            self.edges = np.array([[i, j] for i, j, _ in edgeData], dtype=np.int64).reshape(-1, 2)
+            self.edgeWeights = np.array([w for _, _, w in edgeData], dtype=float)
+        # array of shape (m, 2, 2) containing the coordinates of the two datapoints connected by each edge
+        self.coordinatePairs = datapoints[self.edges]
+
+    def __setstate__(self, state):
+        # support instances pickled prior to the introduction of the edge arrays (which stored the networkx graph as attribute tree)
+        if "tree" in state:
+            tree = state.pop("tree")
+            edgeData = list(tree.edges.data("weight"))
+            state["_tree"] = tree
+            state["edges"] = np.array([[i, j] for i, j, _ in edgeData], dtype=np.int64).reshape(-1, 2)
+            state["edgeWeights"] = np.array([w for _, _, w in edgeData], dtype=float)
+            state["coordinatePairs"] = np.array(state["coordinatePairs"]).reshape(-1, 2, 2)
+        self.__dict__ = state
+
+    @property
+    def tree(self) -> nx.Graph:
+        """
+        The tree as networkx.Graph (which is constructed on demand if the tree was computed via scipy)
+        """
+        if self._tree is None:
+            self._tree = nx.Graph()
+            self._tree.add_weighted_edges_from(zip(self.edges[:, 0].tolist(), self.edges[:, 1].tolist(), self.edgeWeights.tolist()))
+        return self._tree
 
     def totalWeight(self):
         return self.edgeWeights.sum()
 
     def numEdges(self):
-        return len(self.tree.edges)
+        return len(self.edges)
 
     def meanEdgeWeight(self):
         return self.edgeWeights.mean()
@@ -79,7 +151,7 @@ class CoordinateSpanningTree(SpanningTree, GeoDataFrameWrapper):
         super().__init__(datapoints, tree_finder=tree_finder)
 
     def multiLineString(self):
-        return MultiLineString(self.coordinatePairs)
+        return multiLineStringFromCoordinatePairs(self.coordinatePairs)
 
     def toGeoDF(self, crs='epsg:3857'):
         """
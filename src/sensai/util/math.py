@@ -1,3 +1,6 @@
+from typing import Dict
+
+import numpy as np
 import scipy.stats
 
 from .string import objectRepr
@@ -23,3 +26,65 @@ class NormalDistribution:
 
     def __str__(self):
         return objectRepr(self, ["mean", "std", "unitMax"])
+
+
+class QuantileSketch:
+    """
+    A mergeable sketch for the approximation of quantiles of a stream of non-negative values with bounded relative error.
+    Values are counted in logarithmically sized buckets (as in DDSketch), such that the memory requirements depend only on the
+    range of the values and not on their number.
+    """
+    def __init__(self, relativeAccuracy=0.005):
+        """
+        :param relativeAccuracy: the maximum relative error of the quantile estimates
+        """
+        self.relativeAccuracy = relativeAccuracy
+        self._logGamma = np.log((1 + relativeAccuracy) / (1 - relativeAccuracy))
+        self._bucketCounts: Dict[int, int] = {}
+        self._zeroCount = 0
+        self.count = 0
+
+    def update(self, values: np.ndarray):
+        """
+        :param values: the (non-negative) values to add
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if np.any(values < 0):
+            raise ValueError("Sketch supports non-negative values only")
+        isZero = values == 0
+        self._zeroCount += int(np.sum(isZero))
+        bucketIndices = np.ceil(np.log(values[~isZero]) / self._logGamma).astype(np.int64)
+        for bucketIndex, count in zip(*np.unique(bucketIndices, return_counts=True)):
+            self._bucketCounts[int(bucketIndex)] = self._bucketCounts.get(int(bucketIndex), 0) + int(count)
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch"):
+        """
+        Adds the values counted by another sketch (with the same relative accuracy) to this sketch
+
+        :param other: the sketch to merge into this one
+        """
+        if other.relativeAccuracy != self.relativeAccuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracies")
+        for bucketIndex, count in other._bucketCounts.items():
+            self._bucketCounts[bucketIndex] = self._bucketCounts.get(bucketIndex, 0) + count
+        self._zeroCount += other._zeroCount
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: the quantile to compute, in [0, 1]
+        :return: the approximate quantile
+        """
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        cumulativeCount = self._zeroCount
+        if rank < cumulativeCount:
+            return 0.0
+        for bucketIndex in sorted(self._bucketCounts.keys()):
+            cumulativeCount += self._bucketCounts[bucketIndex]
+            if rank < cumulativeCount:
+                # return the value in the bucket's range (gamma^(i-1), gamma^i] with minimal relative error
+                return 2 * np.exp(bucketIndex * self._logGamma) / (1 + np.exp(self._logGamma))
+        return 2 * np.exp(max(self._bucketCounts.keys()) * self._logGamma) / (1 + np.exp(self._logGamma))
@@ -0,0 +1,136 @@
+import numpy as np
+from shapely.geometry import Polygon
+from sklearn.cluster import DBSCAN
+
+from sensai.clustering import GreedyAgglomerativeClustering, MergeCandidateDeterminationStrategyNeighbours, SKLearnClusteringModel, \
+    IncrementalClusteringModel
+from sensai.clustering.coordinate_clustering import SKLearnCoordinateClustering
+from sensai.evaluation.clustering_ground_truth import PolygonAnnotatedCoordinates
+from sensai.util.coordinates import multipointToCoordinatesArray
+
+
+class PointCluster(GreedyAgglomerativeClustering.Cluster):
+    """Cluster of points which may be merged with another cluster if the minimum distance between their points is below a threshold"""
+    def __init__(self, points: np.ndarray, threshold: float):
+        self.points = points
+        self.threshold = threshold
+
+    def mergeCost(self, other):
+        distances = np.linalg.norm(self.points[:, None, :] - other.points[None, :, :], axis=2)
+        minDistance = np.min(distances)
+        return minDistance if minDistance <= self.threshold else np.inf
+
+    def merge(self, other):
+        self.points = np.concatenate((self.points, other.points))
+
+
+def _clusterPointSets(points, threshold, strategy=None):
+    clusters = [PointCluster(points[i:i+1], threshold) for i in range(len(points))]
+    result = GreedyAgglomerativeClustering(clusters, mergeCandidateDeterminationStrategy=strategy, minHeapSizeForCompaction=10).applyClustering()
+    return sorted(sorted(map(tuple, c.points)) for c in result)
+
+
+def test_greedyAgglomerativeClusteringNeighbourStrategies():
+    rand = np.random.RandomState(42)
+    points = np.concatenate([rand.normal(loc=centre, scale=0.3, size=(30, 2)) for centre in ((0, 0), (5, 5), (0, 5))])
+    threshold = 0.5
+    expected = _clusterPointSets(points, threshold)
+    assert 3 <= len(expected) < len(points)
+    assert _clusterPointSets(points, threshold, MergeCandidateDeterminationStrategyNeighbours.fromRadius(points, threshold)) == expected
+    assert _clusterPointSets(points, threshold, MergeCandidateDeterminationStrategyNeighbours.fromDelaunayTriangulation(points)) == expected
+
+
+def test_clusteringModelSummary():
+    rand = np.random.RandomState(42)
+    data = np.concatenate([rand.normal(loc=centre, scale=0.3, size=(size, 2))
+        for centre, size in (((0, 0), 50), ((5, 5), 30), ((0, 5), 5), ((20, 20), 1))])
+    model = SKLearnClusteringModel(DBSCAN(eps=0.5, min_samples=2), minClusterSize=10)
+    model.fit(data)
+    labels = model.labels
+    assert model.numClusters == 2
+
+    summary = model.summaryDF()
+    assert list(summary.index) == sorted(model.clusterIdentifiers - {model.noiseLabel})
+    for clusterId, row in summary.iterrows():
+        clusterPoints = data[labels == clusterId]
+        assert row["numMembers"] == len(clusterPoints)
+        assert np.allclose(row["centroid"], clusterPoints.mean(axis=0))
+        assert np.isclose(row["radius"], np.max(np.linalg.norm(clusterPoints - clusterPoints.mean(axis=0), axis=1)))
+        cluster = model.getCluster(clusterId)
+        assert np.array_equal(cluster.datapoints, clusterPoints)
+        assert cluster.summaryDict()["numMembers"] == row["numMembers"]
+    assert np.array_equal(model.noiseCluster().datapoints, data[labels == model.noiseLabel])
+    assert len(model.noiseCluster()) >= 6
+
+    # cluster classes which compute centroids differently are respected
+    class MedianClusteringModel(SKLearnClusteringModel):
+        class Cluster(SKLearnClusteringModel.Cluster):
+            def _computeCentroid(self):
+                return np.median(self.datapoints, axis=0)
+
+    model = MedianClusteringModel(DBSCAN(eps=0.5, min_samples=2), minClusterSize=10)
+    model.fit(data)
+    summary = model.summaryDF()
+    for clusterId, row in summary.iterrows():
+        clusterPoints = data[labels == clusterId]
+        median = np.median(clusterPoints, axis=0)
+        assert np.allclose(row["centroid"], median)
+        assert np.allclose(model.getCluster(clusterId).centroid(), median)
+        assert np.isclose(model.getCluster(clusterId).radius(), np.max(np.linalg.norm(clusterPoints - median, axis=1)))
+
+
+def test_coordinateClusteringGeoExport():
+    rand = np.random.RandomState(42)
+    data = np.concatenate([rand.normal(loc=centre, scale=0.3, size=(size, 2))
+        for centre, size in (((0, 0), 50), ((5, 5), 30), ((20, 20), 1))])
+    model = SKLearnCoordinateClustering(DBSCAN(eps=0.5, min_samples=2))
+    model.fit(data)
+    gdf = model.toGeoDF(includeNoise=True)
+    assert set(gdf.index) == model.clusterIdentifiers
+    for clusterId, multipoint in gdf.geometry.items():
+        assert np.array_equal(multipointToCoordinatesArray(multipoint), model.getCluster(clusterId).datapoints)
+    gdfLarge = model.toGeoDF(condition=lambda c: len(c) >= 30)
+    assert list(gdfLarge.index) == [c.identifier for c in model.clusters() if len(c) >= 30]
+
+
+def test_polygonAnnotatedCoordinates():
+    region = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    polygons = [region, Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]), Polygon([(5, 5), (8, 5), (8, 8), (5, 8)])]
+    coordinates = np.array([[1, 1], [6, 6], [4, 4], [1.5, 0.5], [20, 20], [7, 7]])
+    annotated = PolygonAnnotatedCoordinates(coordinates, polygons)
+    coords, labels = annotated.getCoordinatesLabels()
+    assert np.array_equal(coords, np.array([[4, 4], [1, 1], [1.5, 0.5], [6, 6], [7, 7]]))
+    assert list(labels) == [-1, 0, 0, 1, 1]
+    assert list(annotated.toGeoDF(include_noise=False).index) == [0, 1]
+
+    # without a noise label (requiring the clusters to cover the region)
+    annotated = PolygonAnnotatedCoordinates(coordinates, [region, region], noiseLabel=None)
+    coords, labels = annotated.getCoordinatesLabels()
+    assert len(coords) == 5
+    assert list(labels) == [0] * 5
+
+
+def test_incrementalClusteringModel():
+    rand = np.random.RandomState(42)
+    centres = np.array([[0, 0], [10, 0], [0, 10]])
+    clusterIndices = rand.randint(0, 3, 3000)
+    data = centres[clusterIndices] + rand.normal(scale=0.5, size=(3000, 2))
+    model = IncrementalClusteringModel(0.5, consolidationInterval=1000)
+    for batch in np.array_split(data, 30):
+        model.partialFit(batch)
+    assert len(model.datapoints) == 3000 and model.numClusters == 3
+    summary = model.summaryDF()
+    assert summary["numMembers"].sum() == 3000
+    # each cluster comprises exactly the datapoints generated from one of the centres
+    for clusterId in model.clusterIdentifiers:
+        assert len(set(clusterIndices[model.labels == clusterId])) == 1
+
+    newData = np.concatenate((centres + 0.1, [[100, 100]]))
+    predictedLabels = model.predictLabels(newData)
+    assert len(set(predictedLabels[:3])) == 3 and predictedLabels[3] == model.noiseLabel
+    for i in range(3):
+        assert np.all(model.labels[clusterIndices == i] == predictedLabels[i])
+
+    oneShotModel = IncrementalClusteringModel(0.5)
+    oneShotModel.fit(data)
+    assert oneShotModel.numClusters == 3
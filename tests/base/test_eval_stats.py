@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensai.evaluation.eval_stats.eval_stats_classification import ClassificationEvalStats, ClassificationMetricTopNAccuracy, \
+    ClassificationMetricAccuracy, StreamingClassificationEvalStats
+from sensai.evaluation.eval_stats.eval_stats_regression import RegressionEvalStats, StreamingRegressionEvalStats
+
+
+def test_regressionMetricsMatchReferenceComputation():
+    rand = np.random.RandomState(42)
+    y_true = rand.randn(1000)
+    y_predicted = y_true + 0.5 * rand.randn(1000)
+    evalStats = RegressionEvalStats(y_predicted[:300], y_true[:300])
+    evalStats._addAll(y_predicted[300:], y_true[300:])  # data is added in chunks
+    for metric in evalStats.metrics:
+        assert np.isclose(evalStats.computeMetricValue(metric), metric.computeValue(y_true, y_predicted))
+
+    # the data is exposed as read-only arrays
+    with pytest.raises(ValueError):
+        evalStats.y_true[0] = 0.0
+    with pytest.raises(ValueError):
+        evalStats.y_predicted[0] = 0.0
+
+
+def test_classificationMetricsMatchReferenceComputation():
+    rand = np.random.RandomState(42)
+    labels = ["a", "b", "c"]
+    y_true = np.array(labels)[rand.randint(0, 3, 500)]
+    y_predicted = np.array(labels)[rand.randint(0, 3, 500)]
+    probabilities = pd.DataFrame(rand.rand(500, 3), columns=labels)
+    topN = ClassificationMetricTopNAccuracy(2)
+    evalStats = ClassificationEvalStats(pd.DataFrame({"y": y_predicted}), pd.DataFrame({"y": y_true}),
+        y_predictedClassProbabilities=probabilities, labels=labels, additionalMetrics=[topN])
+    assert np.isclose(evalStats.getAccuracy(), np.mean(y_true == y_predicted))
+    assert np.isclose(evalStats.getAccuracy(), ClassificationMetricAccuracy().computeValue(y_true, y_predicted))
+    expectedTopN = np.mean([y_true[i] in probabilities.iloc[i].sort_values(ascending=False).index[:2] for i in range(len(y_true))])
+    assert np.isclose(evalStats.computeMetricValue(topN), expectedTopN)
+
+    # data (including class probabilities) can be added in chunks
+    chunkedEvalStats = ClassificationEvalStats(y_predicted[:200], y_true[:200], y_predictedClassProbabilities=probabilities.iloc[:200],
+        labels=labels, additionalMetrics=[topN])
+    chunkedEvalStats.addAll(y_predicted[200:], y_true[200:], y_predictedClassProbabilities=probabilities.iloc[200:])
+    assert np.array_equal(chunkedEvalStats.y_predictedClassProbabilities.values, probabilities.values)
+    assert list(chunkedEvalStats.y_predictedClassProbabilities.columns) == labels
+    assert chunkedEvalStats.getAll() == evalStats.getAll()
+    with pytest.raises(ValueError):
+        chunkedEvalStats.addAll(y_predicted, y_true)
+
+
+def test_streamingRegressionEvalStatsMatchRegressionEvalStats():
+    rand = np.random.RandomState(42)
+    y_true = rand.randn(1000)
+    y_predicted = y_true + 0.5 * rand.randn(1000)
+    workerStats = [StreamingRegressionEvalStats(), StreamingRegressionEvalStats()]
+    for i in range(0, 1000, 100):
+        workerStats[i % 200 // 100].update(y_predicted[i:i+100], y_true[i:i+100])
+    streamingStats = workerStats[0].merge(workerStats[1])
+    expected = RegressionEvalStats(y_predicted, y_true).getAll()
+    actual = streamingStats.getAll()
+    assert expected.keys() == actual.keys()
+    for key in expected:
+        assert np.isclose(expected[key], actual[key])
+    assert np.isclose(streamingStats.getMedianAE(), np.median(np.abs(y_predicted - y_true)), rtol=0.02)
+
+
+def test_streamingClassificationEvalStatsMatchClassificationEvalStats():
+    rand = np.random.RandomState(42)
+    labels = ["a", "b", "c"]
+    y_true = np.array(labels)[rand.randint(0, 3, 500)]
+    y_predicted = np.array(labels)[rand.randint(0, 3, 500)]
+    probabilities = pd.DataFrame(rand.rand(500, 3), columns=labels)
+    streamingStats = StreamingClassificationEvalStats(y_predicted[:200], y_true[:200], probabilities.iloc[:200])
+    streamingStats.merge(StreamingClassificationEvalStats(y_predicted[200:], y_true[200:], probabilities.iloc[200:]))
+    evalStats = ClassificationEvalStats(y_predicted, y_true, y_predictedClassProbabilities=probabilities, labels=labels)
+    expected = evalStats.getAll()
+    actual = streamingStats.getAll()
+    assert expected.keys() == actual.keys()
+    for key in expected:
+        assert np.isclose(expected[key], actual[key])
+    assert np.all(streamingStats.getConfusionMatrix().confusionMatrix == evalStats.getConfusionMatrix().confusionMatrix)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from sensai import InputOutputData
+from sensai.evaluation import VectorRegressionModelEvaluator, VectorClassificationModelEvaluator
+from sensai.sklearn.sklearn_classification import SkLearnDecisionTreeVectorClassificationModel
+from sensai.sklearn.sklearn_regression import SkLearnLinearRegressionVectorRegressionModel
+
+
+def test_chunkedEvaluationMatchesUnchunkedEvaluation(irisDataSet):
+    inputs = irisDataSet.getInputOutputData().inputs
+    data = InputOutputData(inputs.iloc[:, :3], inputs.iloc[:, 3:])
+    model = SkLearnLinearRegressionVectorRegressionModel()
+    evaluator = VectorRegressionModelEvaluator(data, testFraction=0.4)
+    evaluator.fitModel(model)
+    expected = evaluator.evalModel(model).getEvalStats().getAll()
+
+    chunkedEvaluator = VectorRegressionModelEvaluator(data, testFraction=0.4, predictionChunkSize=7, numPredictionProcesses=2)
+    evalData = chunkedEvaluator.evalModel(model)
+    actual = evalData.getEvalStats().getAll()
+    for key in expected:
+        assert np.isclose(expected[key], actual[key])
+    timings = evalData.predictionTimings
+    assert timings.chunkSizes == [7] * 8 + [4]
+    assert timings.getThroughput() > 0
+
+
+def test_chunkedEvaluationUsesComputeOutputs(irisDataSet):
+    class ClippingEvaluator(VectorRegressionModelEvaluator):
+        def _computeOutputs(self, model, inputOutputData):
+            predictions, groundTruth = super()._computeOutputs(model, inputOutputData)
+            return predictions.clip(upper=1.0), groundTruth
+
+    inputs = irisDataSet.getInputOutputData().inputs
+    data = InputOutputData(inputs.iloc[:, :3], inputs.iloc[:, 3:])
+    model = SkLearnLinearRegressionVectorRegressionModel()
+    evaluator = ClippingEvaluator(data, testFraction=0.4, predictionChunkSize=7)
+    evaluator.fitModel(model)
+    predictions, groundTruth = evaluator.computeTestDataOutputs(model)
+    assert predictions.values.max() <= 1.0
+    assert len(predictions) == len(groundTruth) == 60
+    evalStats = evaluator.evalModel(model).getEvalStats()
+    assert np.max(evalStats.y_predicted) <= 1.0
+    assert evaluator.evalModel(model).predictionTimings.chunkSizes == [7] * 8 + [4]
+
+
+def test_chunkedClassificationEvaluationMatchesUnchunkedEvaluation(irisDataSet):
+    data = irisDataSet.getInputOutputData()
+    model = SkLearnDecisionTreeVectorClassificationModel(max_depth=2)
+    evaluator = VectorClassificationModelEvaluator(data, testFraction=0.4)
+    evaluator.fitModel(model)
+    expectedEvalStats = evaluator.evalModel(model).getEvalStats()
+
+    chunkedEvaluator = VectorClassificationModelEvaluator(data, testFraction=0.4, predictionChunkSize=7)
+    evalData = chunkedEvaluator.evalModel(model)
+    evalStats = evalData.getEvalStats()
+    assert evalData.predictionTimings.chunkSizes == [7] * 8 + [4]
+    assert np.array_equal(evalStats.y_predicted, expectedEvalStats.y_predicted)
+    assert evalStats.getAll() == expectedEvalStats.getAll()
+    predictions, classProbabilities, groundTruth = chunkedEvaluator.computeTestDataOutputs(model)
+    assert len(predictions) == len(groundTruth) == 60 and classProbabilities is None
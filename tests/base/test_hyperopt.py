@@ -0,0 +1,111 @@
+import os
+
+import pandas as pd
+import pytest
+
+from sensai.evaluation import VectorClassificationModelCrossValidator, CrossValidationPrunerBestRelative, VectorClassificationModelEvaluator
+from sensai.hyperopt import GridSearch, SqliteEvaluationResultStore, ParameterCombinationSkipDecider, SAHyperOpt
+from sensai.sklearn.sklearn_classification import SkLearnDecisionTreeVectorClassificationModel
+
+
+def test_gridSearchWithEvaluationResultStore(irisDataSet, tmpdir):
+    evaluator = VectorClassificationModelCrossValidator(irisDataSet.getInputOutputData(), folds=3)
+    createdModels = []
+
+    def createModel(**params):
+        createdModels.append(params)
+        return SkLearnDecisionTreeVectorClassificationModel(**params)
+
+    parameterOptions = {"min_samples_leaf": [1, 8], "max_depth": [2, 4]}
+    storePath = os.path.join(tmpdir, "results.sqlite")
+    csvPath = os.path.join(tmpdir, "results.csv")
+
+    store = SqliteEvaluationResultStore(storePath, createModel, evaluator, modelFactoryName="decisionTree")
+    df1 = GridSearch(createModel, parameterOptions, csvResultsPath=csvPath, evaluationResultStore=store).run(evaluator)
+    assert len(createdModels) == 4
+    assert len(pd.read_csv(csvPath)) == 4
+
+    # a second search with a new store on the same database must not evaluate any models
+    store = SqliteEvaluationResultStore(storePath, createModel, evaluator, modelFactoryName="decisionTree")
+    df2 = GridSearch(createModel, parameterOptions, evaluationResultStore=store).run(evaluator)
+    assert len(createdModels) == 4
+    assert list(df1["mean[ACC]"]) == list(df2["mean[ACC]"])
+
+    # results are not shared with other model factories
+    store = SqliteEvaluationResultStore(storePath, createModel, evaluator, modelFactoryName="otherModel")
+    GridSearch(createModel, parameterOptions, evaluationResultStore=store).run(evaluator)
+    assert len(createdModels) == 8
+
+
+def test_gridSearchWithPruning(irisDataSet):
+    crossValidator = VectorClassificationModelCrossValidator(irisDataSet.getInputOutputData(), folds=3)
+    pruner = CrossValidationPrunerBestRelative("ACC", minimiseMetric=False, relativeMargin=0.1, minFolds=1)
+    gridSearch = GridSearch(SkLearnDecisionTreeVectorClassificationModel, {"max_depth": [4, 1]}, pruner=pruner)
+    df = gridSearch.run(crossValidator).set_index("max_depth")
+    assert not df.loc[4, "pruned"]
+    assert df.loc[1, "pruned"]
+
+
+def test_gridSearchWithEvaluationResultStoreAndSkipDecider(irisDataSet, tmpdir):
+    class SkipDeepTreesAfterShallowTree(ParameterCombinationSkipDecider):
+        def __init__(self):
+            self.haveShallowTree = False
+
+        def tell(self, params, metrics):
+            if params["max_depth"] == 1:
+                self.haveShallowTree = True
+
+        def isSkipped(self, params):
+            return self.haveShallowTree and params["max_depth"] > 1
+
+    evaluator = VectorClassificationModelCrossValidator(irisDataSet.getInputOutputData(), folds=3)
+    storePath = os.path.join(tmpdir, "results.sqlite")
+    fingerprint = SqliteEvaluationResultStore.computeEvaluatorFingerprint(evaluator)
+
+    def runSearch(parameterOptions):
+        store = SqliteEvaluationResultStore(storePath, SkLearnDecisionTreeVectorClassificationModel, evaluator,
+            evaluatorFingerprint=fingerprint)
+        return GridSearch(SkLearnDecisionTreeVectorClassificationModel, parameterOptions, evaluationResultStore=store,
+            parameterCombinationSkipDecider=SkipDeepTreesAfterShallowTree()).run(evaluator)
+
+    # store the result for max_depth=3 (no skipping, as no shallow tree was seen)
+    assert len(runSearch({"max_depth": [3]})) == 1
+    # in a warm run, the stored result for max_depth=3 must be skipped just like in a cold run
+    dfWarm = runSearch({"max_depth": [1, 3]})
+    assert list(dfWarm["max_depth"]) == [1]
+
+
+def test_prunedResultsAreNotStored(irisDataSet, tmpdir):
+    crossValidator = VectorClassificationModelCrossValidator(irisDataSet.getInputOutputData(), folds=3)
+    storePath = os.path.join(tmpdir, "results.sqlite")
+    store = SqliteEvaluationResultStore(storePath, SkLearnDecisionTreeVectorClassificationModel, crossValidator)
+    pruner = CrossValidationPrunerBestRelative("ACC", minimiseMetric=False, relativeMargin=0.1, minFolds=1)
+    df = GridSearch(SkLearnDecisionTreeVectorClassificationModel, {"max_depth": [4, 1]}, pruner=pruner,
+        evaluationResultStore=store).run(crossValidator).set_index("max_depth")
+    assert df.loc[1, "pruned"]
+    assert store.get({"max_depth": 4}) is not None
+    assert store.get({"max_depth": 1}) is None
+
+
+def test_gridSearchWithPruningAndResultsStoredWithoutPruning(irisDataSet, tmpdir):
+    crossValidator = VectorClassificationModelCrossValidator(irisDataSet.getInputOutputData(), folds=3)
+    store = SqliteEvaluationResultStore(os.path.join(tmpdir, "results.sqlite"), SkLearnDecisionTreeVectorClassificationModel, crossValidator)
+    GridSearch(SkLearnDecisionTreeVectorClassificationModel, {"max_depth": [4]}, evaluationResultStore=store).run(crossValidator)
+
+    # the newly computed result (which has a "pruned" entry) is followed by the stored result (which has none)
+    pruner = CrossValidationPrunerBestRelative("ACC", minimiseMetric=False, relativeMargin=0.1, minFolds=1)
+    df = GridSearch(SkLearnDecisionTreeVectorClassificationModel, {"max_depth": [1, 4]}, pruner=pruner,
+        evaluationResultStore=store).run(crossValidator).set_index("max_depth")
+    assert len(df) == 2
+    assert df.loc[1, "pruned"] == False
+    assert pd.isna(df.loc[4, "pruned"])
+
+
+def test_pruningRequiresCrossValidator(irisDataSet):
+    evaluator = VectorClassificationModelEvaluator(irisDataSet.getInputOutputData(), testFraction=0.2)
+    pruner = CrossValidationPrunerBestRelative("ACC", minimiseMetric=False)
+    gridSearch = GridSearch(SkLearnDecisionTreeVectorClassificationModel, {"max_depth": [1, 4]}, pruner=pruner)
+    with pytest.raises(ValueError):
+        gridSearch.run(evaluator)
+    with pytest.raises(ValueError):
+        SAHyperOpt(SkLearnDecisionTreeVectorClassificationModel, [], {"max_depth": 1}, evaluator, "ACC", pruner=pruner)
@@ -0,0 +1,203 @@
+import functools
+import random
+import time
+
+import numpy as np
+import pytest
+
+from sensai.local_search import SAState, SAOperator, SACostValueNumeric, ParallelTempering, SAProbabilityFunctionLinear, \
+    MultiStartSimulatedAnnealing, SAProbabilitySchedule, SimulatedAnnealing, SATemperatureScheduleFixed, TabuSearch, LateAcceptanceHillClimbing
+
+
+class VectorState(SAState):
+    """State for the (trivial) problem of finding a given target vector of integers"""
+    def __init__(self, r: random.Random, target, result: dict):
+        self.target = target
+        self.values = [r.randint(0, 20) for _ in target]
+        self.result = result
+        super().__init__(r)
+
+    def computeCostValue(self):
+        return SACostValueNumeric(sum((v - t) ** 2 for v, t in zip(self.values, self.target)))
+
+    def getStateRepresentation(self):
+        return list(self.values)
+
+    def applyStateRepresentation(self, representation):
+        self.result["values"] = representation
+
+
+class ChangeOperator(SAOperator[VectorState]):
+    def applyStateChange(self, i, d):
+        self.state.values[i] += d
+
+    def costDelta(self, i, d):
+        v, t = self.state.values[i], self.state.target[i]
+        return SACostValueNumeric((v + d - t) ** 2 - (v - t) ** 2)
+
+    def chooseParams(self):
+        r = self.state.r
+        return (r.randrange(len(self.state.values)), r.choice((-1, 1))), None
+
+
+def test_parallelTemperingMultiProcess():
+    target = list(range(10))
+    result = {}
+    pt = ParallelTempering(3, [(ChangeOperator, 1)], probabilityFunction=SAProbabilityFunctionLinear(0.5, 0.01), maxSteps=5000,
+        numProcesses=2, stepsPerSync=50)
+    pt.optimise(functools.partial(VectorState, target=target, result=result))
+    assert result["values"] == target
+
+
+class RestorableVectorState(VectorState):
+    def restoreStateRepresentation(self, representation):
+        self.values = list(representation)
+
+
+def test_multiStartSimulatedAnnealing():
+    target = list(range(10))
+    result = {}
+    sa = MultiStartSimulatedAnnealing(lambda: SAProbabilitySchedule(None, SAProbabilityFunctionLinear(0.5, 0.01)), [(ChangeOperator, 1)],
+        numStarts=3, maxSteps=10000, numProcesses=2, stepsPerSync=100, restartAfterStagnantSteps=200)
+    sa.optimise(functools.partial(RestorableVectorState, target=target, result=result))
+    assert result["values"] == target
+
+
+def test_multiStartSimulatedAnnealingDegreeOfCompletion():
+    class RecordingSchedule(SATemperatureScheduleFixed):
+        def __init__(self):
+            super().__init__(1.0)
+            self.degrees = []
+
+        def temperature(self, degreeOfCompletion):
+            self.degrees.append(degreeOfCompletion)
+            return super().temperature(degreeOfCompletion)
+
+    class IncreasingOperator(ChangeOperator):
+        def chooseParams(self):
+            return (0, 1), None
+
+    schedule = RecordingSchedule()
+    sa = MultiStartSimulatedAnnealing(lambda: schedule, [(IncreasingOperator, 1)], numStarts=1, maxSteps=100, stepsPerSync=30)
+    sa.optimise(functools.partial(RestorableVectorState, target=[-1000], result={}))
+    # the degree of completion progresses with every step (rather than with every block of steps)
+    assert np.allclose(schedule.degrees, np.arange(100) / 100)
+
+
+def test_simulatedAnnealingStatsSampling():
+    target = list(range(10))
+    result = {}
+    sa = SimulatedAnnealing(lambda: SAProbabilitySchedule(None, SAProbabilityFunctionLinear(0.5, 0.01)), [(ChangeOperator, 1)],
+        maxSteps=5000, collectStats=True, statsSamplingInterval=10)
+    sa.optimise(functools.partial(VectorState, target=target, result=result))
+    assert result["values"] == target
+    bestCostValues = sa.getChain().getSeries("bestCostValues")
+    assert len(bestCostValues) == 500 and bestCostValues.iloc[-1] == 0
+
+
+def test_costDeltaMemoisation():
+    class CountingOperator(ChangeOperator):
+        memoiseCostDeltas = True
+        numComputations = 0
+
+        def costDelta(self, i, d):
+            CountingOperator.numComputations += 1
+            return super().costDelta(i, d)
+
+        def chooseParams(self):
+            return (0, 1), None
+
+    result = {}
+    sa = SimulatedAnnealing(lambda: SATemperatureScheduleFixed(1e-10), [(CountingOperator, 1)], maxSteps=100)
+    sa.optimise(functools.partial(VectorState, target=[1000], result=result))
+    # the moves are always accepted (they reduce costs), so the state changes in every step
+    assert CountingOperator.numComputations == 100
+
+    CountingOperator.numComputations = 0
+    sa.optimise(functools.partial(VectorState, target=[-1000], result=result))
+    # the moves are always rejected, so the cost delta is computed only once
+    assert CountingOperator.numComputations == 1
+
+
+def test_tabuSearch():
+    target = list(range(10))
+    result = {}
+    ts = TabuSearch([(ChangeOperator, 1)], neighbourhoodSize=10, tabuMemorySize=50, maxSteps=500, collectStats=True)
+    ts.optimise(functools.partial(RestorableVectorState, target=target, result=result))
+    assert result["values"] == target
+    assert ts.getChain().bestCost.value() == 0
+    assert ts.getChain().countTabuMoves > 0
+
+    # states must support restoreStateRepresentation
+    with pytest.raises(ValueError):
+        ts.optimise(functools.partial(VectorState, target=target, result=result))
+
+
+def test_tabuSearchEscapesLocalMinimum():
+    class LandscapeState(SAState):
+        """State on a one-dimensional landscape with a local minimum at the initial position 0 and the global minimum at position 4"""
+        costs = {0: 1, 1: 2, 2: 3, 3: 2, 4: 0}
+
+        def __init__(self, r: random.Random):
+            self.x = 0
+            super().__init__(r)
+
+        def computeCostValue(self):
+            return SACostValueNumeric(self.costs.get(self.x, 10))
+
+        def getStateRepresentation(self):
+            return self.x
+
+        def restoreStateRepresentation(self, representation):
+            self.x = representation
+
+        def applyStateRepresentation(self, representation):
+            pass
+
+    class MoveOperator(SAOperator[LandscapeState]):
+        def applyStateChange(self, d):
+            self.state.x += d
+
+        def costDelta(self, d):
+            return SACostValueNumeric(self.state.costs.get(self.state.x + d, 10) - self.state.costs.get(self.state.x, 10))
+
+        def chooseParams(self):
+            return (self.state.r.choice((-1, 1)),), None
+
+    # with a tabu memory containing only the current state, the search oscillates around the local minimum
+    ts = TabuSearch([(MoveOperator, 1)], neighbourhoodSize=10, tabuMemorySize=1, maxSteps=20, collectStats=True)
+    ts.optimise(LandscapeState)
+    assert ts.getChain().bestCost.value() == 1
+
+    # with a larger tabu memory, returning to the local minimum is tabu and the global minimum is reached
+    ts = TabuSearch([(MoveOperator, 1)], neighbourhoodSize=10, tabuMemorySize=10, maxSteps=20, collectStats=True)
+    ts.optimise(LandscapeState)
+    assert ts.getChain().bestCost.value() == 0
+    assert ts.getChain().countTabuMoves > 0
+
+
+def test_lateAcceptanceHillClimbing():
+    target = list(range(10))
+    result = {}
+    lahc = LateAcceptanceHillClimbing([(ChangeOperator, 1)], historyLength=20, maxSteps=5000)
+    lahc.optimise(functools.partial(VectorState, target=target, result=result))
+    assert result["values"] == target
+
+
+def test_durationBudgetWithSlowSteps():
+    class SlowChangeOperator(ChangeOperator):
+        def chooseParams(self):
+            time.sleep(0.02)
+            return super().chooseParams()
+
+    target = list(range(10))
+    scheduleFactory = lambda: SAProbabilitySchedule(None, SAProbabilityFunctionLinear(0.5, 0.01))
+    algorithms = [
+        SimulatedAnnealing(scheduleFactory, [(SlowChangeOperator, 1)], duration=0.3),
+        TabuSearch([(SlowChangeOperator, 1)], neighbourhoodSize=2, duration=0.3),
+        LateAcceptanceHillClimbing([(SlowChangeOperator, 1)], duration=0.3),
+        ParallelTempering(2, [(SlowChangeOperator, 1)], probabilityFunction=SAProbabilityFunctionLinear(0.5, 0.01), duration=0.3)]
+    for algorithm in algorithms:
+        startTime = time.time()
+        algorithm.optimise(functools.partial(RestorableVectorState, target=target, result={}))
+        assert time.time() - startTime < 1.0, algorithm
@@ -1,3 +1,55 @@
+import pickle
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from sensai.util.batching import applyBatched, BatchSizePolicyFixed, BatchSizePolicyAdaptive
+from sensai.util.geometry import alphaShape
+from sensai.util.graph import SpanningTree, delaunayGraph
+
+
 def test_util():
     import sensai.util
     assert True
+
+
+def test_applyBatched():
+    x = np.random.RandomState(42).randn(1000, 5)
+    fn = lambda a: a * 2
+    np.testing.assert_array_equal(applyBatched(fn, x, BatchSizePolicyFixed(64)), fn(x))
+    # the memory budget (accounting for both inputs and outputs) must bound the batch sizes
+    batchSizes = []
+    policy = BatchSizePolicyAdaptive(memoryBudgetBytes=x[:100].nbytes * 2)
+    np.testing.assert_array_equal(applyBatched(lambda a: batchSizes.append(len(a)) or fn(a), x, policy), fn(x))
+    assert max(batchSizes[1:]) <= 100
+    # the tuned latency estimate is not pickled
+    assert policy.perRowLatencySecs is not None
+    assert pickle.loads(pickle.dumps(policy)).perRowLatencySecs is None
+    # functions which do not return one row per input row are rejected
+    with pytest.raises(ValueError):
+        applyBatched(lambda a: a[:-1], x, BatchSizePolicyFixed(64))
+
+
+def test_delaunaySpanningTreeAndAlphaShape():
+    points = np.random.RandomState(42).rand(500, 2)
+    graph = delaunayGraph(points)
+    # Euler's formula for triangulations: number of edges = 3n - 3 - (number of points on the convex hull)
+    assert 2 * len(points) < graph.number_of_edges() < 3 * len(points)
+    tree = SpanningTree(points)
+    treeViaNetworkx = SpanningTree(points, tree_finder=lambda g: nx.minimum_spanning_tree(g))
+    assert tree.numEdges() == treeViaNetworkx.numEdges() == len(points) - 1
+    assert np.isclose(tree.totalWeight(), treeViaNetworkx.totalWeight())
+    assert np.isclose(tree.totalWeight(), tree.tree.size(weight="weight"))
+
+    # the state of instances pickled by earlier versions (which stored only the networkx graph and coordinate pairs) can be restored
+    oldTree = SpanningTree.__new__(SpanningTree)
+    oldTree.__setstate__(dict(tree=tree.tree, coordinatePairs=[points[[i, j]] for i, j in tree.tree.edges],
+        edgeWeights=np.array([w for _, _, w in tree.tree.edges.data("weight")])))
+    assert oldTree.numEdges() == tree.numEdges() and np.isclose(oldTree.totalWeight(), tree.totalWeight())
+    assert oldTree.coordinatePairs.shape == (len(points) - 1, 2, 2)
+    assert np.array_equal(points[oldTree.edges], oldTree.coordinatePairs)
+
+    # a square grid with a hole in the middle, which is filled by the alpha shape
+    grid = np.array([(x, y) for x in range(10) for y in range(10) if not (x in (4, 5) and y in (4, 5))], dtype=float)
+    assert np.isclose(alphaShape(grid, alpha=0.5).area, 81)
@@ -1,7 +1,11 @@
+import copy
 import re
 import os
 
 import sklearn
+import numpy as np
+import pytest
+import pandas as pd
 import torch
 
 import sensai.torch
@@ -9,9 +13,11 @@ from sensai import NormalisationMode, normalisation
 from sensai.data_transformation import DFTNormalisation
 from sensai.torch import NNOptimiser
 from sensai.torch.torch_base import TorchModelFromModuleFactory
-from sensai.torch.torch_data import TorchDataSetFromTensors
+from sensai.torch.torch_data import TorchDataSetFromTensors, VectorDataUtil, TorchDataSetProviderFromDataUtil, \
+    MemMapDataWriter, MemMapData, TorchDataSetProviderFromMemMap, BatchPrefetcher
+from sensai.torch.torch_models import MultiLayerPerceptronTorchModel, LSTNetworkVectorClassificationModel
 from sensai.torch.torch_modules import MultiLayerPerceptron
-from sensai.torch.torch_opt import NNLossEvaluatorClassification
+from sensai.torch.torch_opt import NNLossEvaluatorClassification, NNLossEvaluatorRegression
 from sensai.featuregen import FeatureGeneratorTakeColumns
 
 
@@ -41,4 +47,227 @@ def test_NNOptimiserWithoutValidation_MLPClassifier(irisDataSet):
             optimiser="adam").fit(model, dataSet)
     modelOutputs = model.apply(inputTensor, asNumpy=False)
     accuracy = torch.sum(torch.argmax(modelOutputs, 1) == outputTensor).item() / len(outputTensor)
-    assert accuracy > 0.9
\ No newline at end of file
+    assert accuracy > 0.9
+
+
+def test_VectorDataUtilSplit(irisDataSet):
+    iodata = irisDataSet.getInputOutputData()
+    outputs = iodata.inputs[[iodata.inputs.columns[0]]]
+    dataUtil = VectorDataUtil(iodata.inputs, outputs, False)
+    (x1, y1), (x2, y2) = dataUtil.splitInputOutputPairs(0.8)
+    assert len(x1) == 120 and len(x2) == 30
+    assert x1.dtype == torch.float32 and y1.dtype == torch.float32
+    assert np.shares_memory(x1.numpy(), dataUtil.inputValues)
+
+    dataUtil = VectorDataUtil(iodata.inputs, outputs, False, shuffle=True, storageDtype=np.float16)
+    (x1, y1), (x2, y2) = dataUtil.splitInputOutputPairs(0.8)
+    assert x1.dtype == torch.float16
+    assert len(x1) + len(x2) == len(iodata.inputs)
+    trainSet, _ = TorchDataSetProviderFromDataUtil(dataUtil, False).provideSplit(0.8)
+    X, Y = next(trainSet.iterBatches(10))
+    assert X.dtype == torch.float32 and Y.dtype == torch.float32
+
+    # the options can be set via the vector model
+    vectorModel = sensai.torch.TorchVectorRegressionModel(MultiLayerPerceptronTorchModel, [False, (4,), torch.sigmoid, None],
+        shuffle=True, randomSeed=1, storageDtype=np.float16)
+    vectorModel.model = vectorModel._createTorchModel()
+    dataUtil = vectorModel._createDataSetProvider(iodata.inputs, outputs).dataUtil
+    assert dataUtil.shuffle and dataUtil.randomSeed == 1 and dataUtil.inputValues.dtype == np.float16
+
+
+def test_NNOptimiserWithMemMapData_MLPClassifier(irisDataSet, tmp_path):
+    iodata = irisDataSet.getInputOutputData()
+    outputs = iodata.outputs.iloc[:, 0]
+    classLabels = list(outputs.unique())
+    outputDf = pd.DataFrame({"classIndex": [classLabels.index(l) for l in outputs]})
+    scaler = normalisation.VectorDataScaler(iodata.inputs, normalisation.NormalisationMode.MAX_BY_COLUMN)
+    data = MemMapDataWriter.write(str(tmp_path), iodata.inputs, outputDf, chunkSize=40, outputDtype=np.int64, inputScaler=scaler)
+    dataSetProvider = TorchDataSetProviderFromMemMap(data, False, modelOutputDim=len(classLabels), outputsAreClassIndices=True,
+        blockSize=16, numShuffledBlocks=10, randomSeed=42)
+
+    # shuffled iteration must provide each data point exactly once
+    dataSet = dataSetProvider.provideSplit(1.0)[0]
+    ys = [Y for X, Y in dataSet.iterBatches(20, shuffle=True)]
+    assert sorted(torch.cat(ys).tolist()) == sorted(outputDf.classIndex.tolist())
+
+    model = TorchModelFromModuleFactory(lambda: MultiLayerPerceptron(data.inputDim, len(classLabels),
+            (4, 3), hidActivationFn=torch.tanh, outputActivationFn=torch.nn.Softmax()), cuda=False)
+    NNOptimiser(lossEvaluator=NNLossEvaluatorClassification(), cuda=False, trainFraction=1.0, epochs=300,
+            optimiser="adam").fit(model, dataSetProvider)
+    modelOutputs = model.apply(dataSet, asNumpy=False)
+    accuracy = torch.sum(torch.argmax(modelOutputs, 1) == torch.tensor(outputDf.classIndex.values)).item() / len(outputDf)
+    assert accuracy > 0.9
+
+
+def test_MemMapDataWriterPropagatesErrors(irisDataSet, tmp_path):
+    inputs = irisDataSet.getInputOutputData().inputs
+    writer = MemMapDataWriter(str(tmp_path))
+    with pytest.raises(KeyError):
+        with writer:
+            writer.add(inputs, inputs[["nonExistentColumn"]])
+    assert writer._inputsFile.closed and writer._outputsFile.closed
+    assert not os.path.exists(os.path.join(str(tmp_path), MemMapData.META_FILENAME))
+
+
+def test_MemMapDataWriterInvalidatesOverwrittenData(irisDataSet, tmp_path):
+    inputs = irisDataSet.getInputOutputData().inputs
+    MemMapDataWriter.write(str(tmp_path), inputs, inputs)
+    with pytest.raises(KeyError):
+        with MemMapDataWriter(str(tmp_path)) as writer:
+            writer.add(inputs.iloc[:10], inputs.iloc[:10])
+            writer.add(inputs, inputs[["nonExistentColumn"]])
+    # the previous data set was partially overwritten and must therefore no longer be loadable
+    with pytest.raises(FileNotFoundError):
+        MemMapData(str(tmp_path))
+
+
+def test_BatchPrefetcher(irisDataSet, tmp_path):
+    iodata = irisDataSet.getInputOutputData()
+    inputs = iodata.inputs
+    outputs = inputs[[inputs.columns[0]]]
+    tensorDataSet = TorchDataSetFromTensors(torch.tensor(inputs.values), torch.tensor(outputs.values), False)
+    memMapDataSet = TorchDataSetProviderFromMemMap(MemMapDataWriter.write(str(tmp_path), inputs, outputs), False, blockSize=32).provideSplit(1.0)[0]
+    for dataSet in (tensorDataSet, memMapDataSet):
+        expectedBatches = list(dataSet.iterBatches(16))
+        for numWorkers in (1, 3):
+            batches = list(BatchPrefetcher(queueDepth=2, numWorkers=numWorkers).iterBatches(dataSet, 16))
+            assert len(batches) == len(expectedBatches)
+            for (X, Y), (expectedX, expectedY) in zip(batches, expectedBatches):
+                assert torch.equal(X, expectedX) and torch.equal(Y, expectedY)
+
+
+def test_NNOptimiserThreadsAndTimings():
+    x = torch.rand((100, 3))
+    dataSet = TorchDataSetFromTensors(x, x.sum(dim=1, keepdim=True), False)
+    model = TorchModelFromModuleFactory(lambda: MultiLayerPerceptron(3, 1, (4,), outputActivationFn=None), cuda=False)
+    numThreads = torch.get_num_threads()
+    optimiser = NNOptimiser(lossEvaluator=NNLossEvaluatorRegression(), cuda=False, trainFraction=1.0, epochs=5, batchSize=32,
+        numThreads=1, deterministic=False, seed=None)
+    optimiser.fit(model, dataSet)
+    assert torch.get_num_threads() == numThreads
+    timings = optimiser.getEpochTimings()
+    assert len(timings) == 5
+    assert all(t.numSamples == 100 and t.getThroughput() > 0 for t in timings)
+
+    # deterministic algorithms are enabled during training only
+    deterministicAlgorithmsEnabled = torch.are_deterministic_algorithms_enabled()
+    optimiser = NNOptimiser(lossEvaluator=NNLossEvaluatorRegression(), cuda=False, trainFraction=1.0, epochs=1, deterministic=True)
+    optimiser.fit(model, dataSet)
+    assert torch.are_deterministic_algorithms_enabled() == deterministicAlgorithmsEnabled
+
+
+def test_NNOptimiserBatchShardsWithDifferentRandomStates():
+    x = torch.arange(100, dtype=torch.float32).reshape(100, 1)
+    dataSet = TorchDataSetFromTensors(x, x, False)
+    values = []
+    for shardIndex in range(3):
+        # the random state differs between processes, but the batch order is determined by the shared seed
+        torch.manual_seed(shardIndex)
+        for X, Y in NNOptimiser._iterBatchShard(dataSet, 8, True, shardIndex, 3, batchOrderSeed=42):
+            values.extend(X[:, 0].tolist())
+    assert sorted(values) == x[:, 0].tolist()
+
+
+def test_NNOptimiserMemMapBatchShards(tmp_path):
+    df = pd.DataFrame({"x": np.arange(100, dtype=np.float32)})
+    data = MemMapDataWriter.write(str(tmp_path), df, df)
+    for shuffle in (False, True):
+        dataSet = TorchDataSetProviderFromMemMap(data, False, blockSize=8, numShuffledBlocks=2, randomSeed=42).provideSplit(1.0)[0]
+        shardDataSets = [copy.deepcopy(dataSet) for _ in range(3)]
+        for epoch in range(2):
+            shardValues = []
+            for shardIndex, shardDataSet in enumerate(shardDataSets):
+                values = []
+                for X, Y in NNOptimiser._iterBatchShard(shardDataSet, 8, shuffle, shardIndex, 3, batchOrderSeed=epoch):
+                    values.extend(X[:, 0].tolist())
+                shardValues.append(values)
+            # the shards are disjoint and, together, cover the full data set
+            assert sorted(sum(shardValues, [])) == df["x"].tolist()
+            assert all(0 < len(values) < 100 for values in shardValues)
+
+
+def test_NNOptimiserDistributed():
+    x = torch.rand((1000, 3))
+    dataSet = TorchDataSetFromTensors(x, x.sum(dim=1, keepdim=True), False)
+    model = MultiLayerPerceptronTorchModel(False, (8,), torch.tanh, None)
+    model.inputDim, model.outputDim = 3, 1
+    optimiser = NNOptimiser(lossEvaluator=NNLossEvaluatorRegression(), cuda=False, trainFraction=1.0, epochs=20, batchSize=32,
+        numProcesses=2)
+    optimiser.fit(model, dataSet)
+    assert len(optimiser.getEpochTimings()) == 20
+    assert optimiser.getEpochTimings()[0].numSamples == 1000
+    mse = torch.mean((model.apply(x, asNumpy=False) - x.sum(dim=1, keepdim=True)) ** 2).item()
+    assert mse < 0.1
+
+
+def test_MCDropoutVectorised():
+    torch.manual_seed(42)
+    module = MultiLayerPerceptron(3, 2, (32,), pDropout=0.2, outputActivationFn=None)
+    module.eval()
+    x = torch.rand((10, 3))
+    with torch.no_grad():
+        mean, sd = module.inferMCDropout(x, 2000, vectorised=False)
+        meanVec, sdVec = module.inferMCDropout(x, 2000, vectorised=True, maxBatchSize=1000)  # 100 samples per forward pass
+    assert mean.shape == meanVec.shape == sd.shape == sdVec.shape == (10, 2)
+    assert torch.all(sdVec > 0)
+    assert torch.allclose(mean, meanVec, atol=0.02)
+    assert torch.allclose(sd, sdVec, rtol=0.15, atol=0.005)
+
+
+def test_optimiseForInference():
+    model = MultiLayerPerceptronTorchModel(False, (16, 16), torch.relu, None)
+    model.inputDim, model.outputDim = 4, 2
+    model.setTorchModule(model.createTorchModule())
+    x = np.random.rand(100, 4).astype(np.float32)
+    y = model.apply(x)
+    model.optimiseForInference()
+    assert np.allclose(model.apply(x), y, atol=1e-6)
+    model.optimiseForInference(quantise=True)
+    assert np.allclose(model.apply(x), y, atol=0.05)
+    model.setTorchModule(model.createTorchModule())  # discards the optimised module
+    assert model._inferenceModule is None
+
+
+def test_saveWithSeparateWeights(irisClassificationTestCase, tmp_path):
+    model = sensai.torch.models.MultiLayerPerceptronVectorClassificationModel(hiddenDims=(16, 16), cuda=False, epochs=5)
+    model.fit(irisClassificationTestCase.data.inputs, irisClassificationTestCase.data.outputs)
+    path = str(tmp_path / "model.pickle")
+    model.save(path, separateWeights=True)
+    assert os.path.exists(path + ".weights")
+    loadedModel = type(model).load(path)
+    inputs = irisClassificationTestCase.data.inputs
+    assert (loadedModel.predict(inputs) == model.predict(inputs)).all().all()
+
+    # the loaded model (whose weights are memory-mapped) can be saved to the same path
+    loadedModel.save(path, separateWeights=True)
+    assert (loadedModel.predict(inputs) == model.predict(inputs)).all().all()
+    assert (type(model).load(path).predict(inputs) == model.predict(inputs)).all().all()
+    assert sorted(os.listdir(str(tmp_path))) == ["model.pickle", "model.pickle.weights"]
+
+
+class _ModuleWithDataDependentConstruction(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(3, 1)
+        # accessing tensor data is not possible on the meta device
+        self.scale = torch.nn.Parameter(torch.ones(1) * float(self.linear.weight.abs().sum()))
+
+
+def test_createTorchModuleWithStateFallsBackForDataDependentConstruction():
+    model = TorchModelFromModuleFactory(_ModuleWithDataDependentConstruction, cuda=False)
+    stateDict = _ModuleWithDataDependentConstruction().state_dict()
+    module = model._createTorchModuleWithState(stateDict)
+    for name, tensor in module.state_dict().items():
+        assert torch.equal(tensor, stateDict[name])
+
+
+def test_LSTNetSlidingWindows():
+    series = np.random.RandomState(42).randn(100, 3)
+    windows = LSTNetworkVectorClassificationModel.createSlidingWindows(series, 10, step=2)
+    assert windows.shape == (46, 10, 3)
+    assert np.array_equal(windows[5], series[10:20].astype(np.float32))
+    dataUtil = LSTNetworkVectorClassificationModel.DataUtil(windows, (windows[:, -1, 0] > 0).astype(int), 2)
+    assert dataUtil.inputDim() == 30
+    (x1, y1), (x2, y2) = dataUtil.splitInputOutputPairs(0.5)
+    assert x1.shape == (23, 10, 3) and y2.shape == (23, 1)
+    assert torch.equal(x2[0], torch.from_numpy(series[46:56].astype(np.float32)))